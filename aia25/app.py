@@ -1,11 +1,34 @@
 from aia25.bootstrap import *  # noqa: F403,E402
+from aia25.bootstrap import custom_client
 
+import asyncio
 import importlib
+import inspect
+from functools import partial
+from pathlib import Path
 from types import ModuleType
+from typing import Optional
 
 import mlflow
 import chainlit as cl
 from agents import enable_verbose_stdout_logging
+from chainlit.server import app as server_app
+
+from aia25.core.agent_tools import agent_tool_cache
+from aia25.core.answer_cache import ANSWER_CACHE_ENABLED, answer_cache, tools_called
+from aia25.core.calendar_store import get_calendar_store, ingest_calendar, list_file_events
+from aia25.core.calendar_sync import caldav_sync_from_env, run_periodic_sync
+from aia25.core.clarification import watch_clarifications
+from aia25.core.context import session_user_id
+from aia25.core.deadline import start_request_deadline
+from aia25.core.geo_cache import precompute_travel_times
+from aia25.core.history import compact_history, merge_history_summary, schedule_history_summary
+from aia25.core.pipeline import AGENT_MODE, EXECUTION_MODES, PIPELINE_MODE
+from aia25.core.stats_api import register_stats_routes
+from aia25.core.streaming import TokenStream
+from aia25.core.tools import MCPServerRepository
+from aia25.core.usage import current_session_id, log_usage_to_mlflow, usage
+from aia25.core.warmup import warm_up, warm_up_llm_connection
 
 
 EXERCISE_TO_MODULE_IMPORT = {
@@ -18,6 +41,34 @@ EXERCISE_TO_MODULE_IMPORT = {
     "Exercise 4 Solution": "solution_exercise04.my_agents",
 }
 
+# Exercises whose modules (and MCP servers) are loaded at startup, comma-separated, all by default
+WARMUP_EXERCISES = [
+    name.strip()
+    for name in os.getenv("WARMUP_EXERCISES", ",".join(EXERCISE_TO_MODULE_IMPORT)).split(",")
+    if name.strip()
+]
+
+# Token and latency accounting per agent and tool, see /stats (and /stats/sessions/{session_id} if enabled)
+register_stats_routes(server_app)
+
+_background_tasks: set[asyncio.Task] = set()  # Keeps references, so the tasks are not garbage collected
+
+
+def run_in_background(coroutine) -> asyncio.Task:
+    task = asyncio.create_task(coroutine)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+@cl.on_app_startup
+async def on_app_startup():
+    # Warm up in the background, the server accepts connections meanwhile (progress at /stats/readiness)
+    module_names = [
+        EXERCISE_TO_MODULE_IMPORT[name] for name in WARMUP_EXERCISES if name in EXERCISE_TO_MODULE_IMPORT
+    ]
+    run_in_background(warm_up(module_names, custom_client))
+
 
 async def load_exercise_agents_module(exercise_name: str) -> ModuleType:
     """
@@ -50,29 +101,66 @@ def mlflow_tracing_enabled() -> bool:
     return bool(os.getenv("MLFLOW_TRACING_ENABLED", "False"))
 
 
-async def get_agent_response(user_message: str) -> str:
+def mlflow_usage_metrics_enabled() -> bool:
+    """
+    Check if the token and latency accounting of a session should be logged to MLflow when it ends.
+
+    Returns:
+        True if MLflow tracing is enabled and MLFLOW_USAGE_METRICS is set, False otherwise.
+    """
+    return os.getenv("MLFLOW_TRACING_ENABLED") == "True" and os.getenv("MLFLOW_USAGE_METRICS", "").lower() == "true"
+
+
+async def get_agent_response(user_message: str, stream: Optional[TokenStream] = None) -> str:
     """
     Run the agent with the chat history and the given user message and update the history.
     Returns only the final output.
 
     Args:
         user_message: The user's message.
+        stream: Where to stream the answer to, if the exercise supports streaming.
 
     Returns:
         The agent's response.
     """
-    # Retrieve the history from the user session and add the user message to it
-    history = cl.user_session.get("history") or []
+    # Retrieve the history from the user session, older turns are compacted to bound the prompt size
+    history = compact_history(cl.user_session.get("history") or [])
 
     # Retrieve the exercise's agents module from the user session
     exercise = cl.user_session.get("exercise", await load_exercise_agents_module("Exercise 1"))
 
+    # Exercises that support different execution modes get the one selected in the settings
+    kwargs = {}
+    parameters = inspect.signature(exercise.execute_agent).parameters
+    if "mode" in parameters:
+        kwargs["mode"] = cl.user_session.get("mode", AGENT_MODE)
+    if stream is not None and "stream" in parameters:
+        kwargs["stream"] = stream
+
+    # The opening question of a conversation is answered from the cache if another user asked it recently
+    scope = f"{exercise.__name__}:{kwargs.get('mode', AGENT_MODE)}"
+    cacheable = ANSWER_CACHE_ENABLED and not history
+    cached = answer_cache.lookup(user_message, scope, session_user_id()) if cacheable else None
+    if cached is not None:
+        logger.info("Answered from the answer cache")
+        turn = [{"role": "user", "content": user_message}, {"role": "assistant", "content": cached}]
+        cl.user_session.set("history", turn)
+        return cached
+
     # Execute agent with input and handle exceptions in the service layer
-    response, updated_history = await exercise.execute_agent(user_input=user_message, history=history)
+    clarifications = watch_clarifications()
+    response, updated_history = await exercise.execute_agent(user_input=user_message, history=history, **kwargs)
+
+    if cacheable and updated_history is not None:
+        tools = tools_called(updated_history)
+        if kwargs.get("mode") == PIPELINE_MODE:
+            tools.add("gather_trip_data")  # The pipeline gathers its data without tool calls
+        answer_cache.store(user_message, response, scope, session_user_id(), tools, suspended=bool(clarifications))
 
-    # Only update history if we got a valid updated history back
+    # Only update history if we got a valid updated history back, including a summary written meanwhile
     if updated_history is not None:
-        cl.user_session.set("history", updated_history)
+        cl.user_session.set("history", merge_history_summary(updated_history))
+        schedule_history_summary()
 
     return response
 
@@ -95,6 +183,17 @@ async def on_chat_start():
                 ],
                 initial_index=0,
             ),
+            cl.input_widget.Select(
+                id="mode",
+                label="Execution mode",
+                values=EXECUTION_MODES,
+                initial_index=0,
+                description=(
+                    "In pipeline mode, trip requests are answered by gathering connections, appointments and "
+                    "location data in parallel and a single model call. Only supported by the solutions of "
+                    "exercises 3 and 4."
+                ),
+            ),
             cl.input_widget.Switch(
                 id="verbose_stdout_logging",
                 label="Enable verbose stdout logging",
@@ -110,30 +209,130 @@ async def on_chat_start():
     # Reset the chat history
     cl.user_session.set("history", [])
 
+    # Keep the user's calendar in sync with a CalDAV server, if one is configured
+    calendar_sync = caldav_sync_from_env(partial(get_calendar_store, session_user_id()))
+    if calendar_sync:
+        cl.user_session.set("calendar_store", calendar_sync.store)
+
+        async def on_change(_):
+            invalidate_calendar_answers()
+            schedule_travel_precompute(calendar_sync.store.list_events)
+
+        cl.user_session.set(
+            "calendar_sync", asyncio.create_task(run_periodic_sync(calendar_sync, on_change=on_change))
+        )
+
+
+@cl.on_chat_end
+async def on_chat_end():
+    for task_name in ("calendar_sync", "calendar_ingestion", "travel_precompute", "history_summary"):
+        task = cl.user_session.get(task_name)
+        if task and not task.done():
+            task.cancel()
+
+    # Optionally log the session's token and latency accounting to MLflow
+    session_stats = usage.stats(current_session_id())
+    if session_stats and mlflow_usage_metrics_enabled():
+        try:
+            await asyncio.to_thread(log_usage_to_mlflow, session_stats, f"session-{current_session_id()}")
+        except Exception as e:
+            logger.warning("Could not log the usage metrics to MLflow: %s", e)
+
 
 @cl.on_settings_update
 async def on_settings_update(settings):
     # Update the agent execution function based on the selected exercise
+    exercise = await load_exercise_agents_module(settings["exercise"])
     cl.user_session.set("exercise_name", settings["exercise"])
-    cl.user_session.set("exercise", await load_exercise_agents_module(settings["exercise"]))
+    cl.user_session.set("exercise", exercise)
+    cl.user_session.set("mode", settings.get("mode", AGENT_MODE))
+
+    # Reopen the connection to the LLM endpoint in case it was closed while the user was idle
+    run_in_background(warm_up_llm_connection(custom_client))
+
+    # Warm the geo cache for the exercise's example calendar, unless the user brought their own
+    example_calendar = Path(exercise.__file__).parent / "ExampleCalendar.ics"
+    if cl.user_session.get("calendar_store") is None and example_calendar.exists():
+        schedule_travel_precompute(partial(list_file_events, str(example_calendar)))
 
     # If user selected verbose logging, enable it (can't be disabled until restart)
     if settings["verbose_stdout_logging"]:
         enable_verbose_stdout_logging()
 
 
+def schedule_travel_precompute(list_events):
+    """
+    Geocodes the upcoming appointments and precomputes travel times between them in the background.
+
+    Args:
+        list_events: A function returning the calendar events in a time range
+    """
+    previous = cl.user_session.get("travel_precompute")
+    if previous and not previous.done():
+        previous.cancel()
+    cl.user_session.set("travel_precompute", asyncio.create_task(precompute_travel_times(list_events)))
+
+
+def invalidate_calendar_answers():
+    """
+    Drops the memoized sub-agent and chat answers based on the user's calendar, after it changed.
+    """
+    agent_tool_cache.invalidate(version_prefix=f"{session_user_id()}:")
+    answer_cache.invalidate(user_id=session_user_id())
+
+
+async def start_calendar_ingestion(file: cl.File):
+    """
+    Starts importing an uploaded ICS file into the user's calendar store in the background.
+    Progress is reported by updating a single message in the chat.
+
+    Args:
+        file: The uploaded ICS file
+    """
+    store = get_calendar_store(session_user_id())
+    cl.user_session.set("calendar_store", store)
+
+    progress_message = cl.Message(content=f"Importing calendar `{file.name}`...", author="Calendar")
+    await progress_message.send()
+
+    async def report_progress(fraction: float):
+        progress_message.content = f"Importing calendar `{file.name}`: {fraction:.0%}"
+        await progress_message.update()
+
+    async def ingest():
+        try:
+            count = await ingest_calendar(store, file.path, report_progress)
+            progress_message.content = f"Imported {count} appointments from `{file.name}`."
+            invalidate_calendar_answers()
+            schedule_travel_precompute(store.list_events)
+        except Exception as e:
+            progress_message.content = f"Could not import `{file.name}`: {e}"
+        await progress_message.update()
+
+    # Keep a reference to the task, otherwise it may be garbage collected before it finishes
+    cl.user_session.set("calendar_ingestion", asyncio.create_task(ingest()))
+
+
 @cl.on_message  # this function will be called every time a user inputs a message in the UI
 async def handle_message(message: cl.Message):
-    response = await get_agent_response(message.content)
+    calendar_files = [el for el in message.elements or [] if el.name.lower().endswith(".ics")]
+    if calendar_files:
+        await start_calendar_ingestion(calendar_files[-1])
+
+        # A plain upload does not need an answer from the agent
+        if not message.content.strip():
+            return
+
+    # The answer is streamed into the message while the agent works, then replaced by the final output
     author = cl.user_session.get("exercise_name")
-    await cl.Message(content=response, author=author).send()
+    stream = TokenStream(cl.Message(content="", author=author))
+    start_request_deadline()  # Shared by everything the request starts, see `aia25.core.deadline`
+    response = await get_agent_response(message.content, stream)
+    await stream.finish(response)
 
 
 @cl.server.app.on_event("shutdown")
 async def on_shutdown():
-    # Get the current selected exercise from the user session
-    current_exercise = cl.user_session.get("exercise", None)
-
-    if current_exercise and hasattr(current_exercise, "MCPServerRepository"):
-        repo = await current_exercise.MCPServerRepository.get_instance()
-        await repo.aclose()
+    # The MCP servers are shared by all exercises, close them if any exercise started them
+    if MCPServerRepository._instance is not None:
+        await MCPServerRepository._instance.aclose()
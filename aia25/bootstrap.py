@@ -6,18 +6,26 @@ import logging
 import sys
 from pathlib import Path
 
+import httpx
 import mlflow
 import requests
 from agents import set_default_openai_api, set_default_openai_client
-from openai import AsyncOpenAI
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 
 logging.getLogger("openai.agents").setLevel(logging.CRITICAL)
 
-# Set up defaults
+# Set up defaults. Idle connections to the LLM endpoint are kept open for a while (httpx closes them after
+# 5 seconds by default), so requests do not pay for a new TLS handshake, see aia25/core/warmup.py
+LLM_KEEPALIVE_SECONDS = float(os.getenv("LLM_KEEPALIVE_SECONDS", "60"))
+
 custom_client = AsyncOpenAI(
-    api_key=os.getenv("OPENROUTER_API_KEY"), base_url=os.getenv("BASE_URL")
+    api_key=os.getenv("OPENROUTER_API_KEY"),
+    base_url=os.getenv("BASE_URL"),
+    http_client=DefaultAsyncHttpxClient(
+        limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100, keepalive_expiry=LLM_KEEPALIVE_SECONDS)
+    ),
 )
 set_default_openai_client(custom_client)
 set_default_openai_api("chat_completions")
@@ -0,0 +1,69 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from agents import Agent, Tool
+
+logger = logging.getLogger("chainlit")
+
+
+class DeferredAgentTool:
+    """
+    A sub-agent tool whose agent is created by an async factory, e.g. because it needs MCP servers.
+
+    The factory runs in the background on first use and the agent is cached. The tool is added to the parent
+    agent once the sub-agent is ready, so loading an exercise does not wait for server processes to start and
+    requests before that are answered without the tool. A failed factory is retried on the next use.
+    """
+
+    def __init__(
+        self,
+        parent: Agent,
+        factory: Callable[[], Awaitable[Agent]],
+        make_tool: Callable[[Agent], Tool],
+    ):
+        """
+        Args:
+            parent: The agent the tool is added to
+            factory: Creates the sub-agent
+            make_tool: Turns the sub-agent into the tool of the parent, e.g. with `agent_tool`
+        """
+        self.parent = parent
+        self.factory = factory
+        self.make_tool = make_tool
+        self.agent: Optional[Agent] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Modules are loaded from the Chainlit event loop, start right away if there is one
+        try:
+            asyncio.get_running_loop()
+            self.start()
+        except RuntimeError:
+            pass
+
+    def start(self):
+        """
+        Starts creating the sub-agent in the background, unless it is ready or already being created.
+        """
+        if self.agent is None and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._create())
+
+    async def ready(self, timeout: Optional[float] = None) -> Optional[Agent]:
+        """
+        Waits up to `timeout` seconds (indefinitely if None) for the sub-agent and returns it, or None.
+        """
+        self.start()
+        if self.agent is None:
+            await asyncio.wait({self._task}, timeout=timeout)
+        return self.agent
+
+    async def _create(self):
+        try:
+            agent = await self.factory()
+        except Exception as e:
+            logger.warning("Could not create a sub-agent of %s, retrying on next use: %s", self.parent.name, e)
+            return
+
+        self.parent.tools.append(self.make_tool(agent))
+        self.agent = agent
+        logger.info("%s is ready and available to %s", agent.name, self.parent.name)
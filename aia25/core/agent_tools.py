@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, NamedTuple, Optional
+
+from agents import Agent, FunctionTool, ItemHelpers, RunContextWrapper, TResponseInputItem, function_tool
+
+from aia25.core.clarification import report_tool_error
+from aia25.core.deadline import DEADLINE_RESERVE, time_left
+from aia25.core.streaming import run_agent
+from aia25.core.topic_classifier import normalize_text
+
+AGENT_TOOL_CACHE_TTL = float(os.getenv("AGENT_TOOL_CACHE_TTL", "300"))  # Seconds a sub-agent answer is reused
+AGENT_TOOL_REALTIME_TTL = float(os.getenv("AGENT_TOOL_REALTIME_TTL", "60"))  # For answers about next departures
+AGENT_TOOL_CACHE_SIZE = 1024  # Number of sub-agent answers kept at most
+
+logger = logging.getLogger("chainlit")
+
+
+def context_message(context: Any) -> Optional[TResponseInputItem]:
+    """
+    Returns the request context (current date and time) as a message to append after the conversation.
+
+    Keeping the date and time out of the instructions keeps the prompt prefix identical across requests, so it
+    can be served from the provider's prompt cache. The time is rounded down to the minute for the same reason.
+    """
+    current_date = getattr(context, "current_date", "")
+    current_time = getattr(context, "current_time", "")
+    if not current_date and not current_time:
+        return None
+    return {"role": "system", "content": f"Current date: {current_date}\nCurrent time: {current_time[:5]}"}
+
+
+class AgentToolCacheKey(NamedTuple):
+    tool_name: str
+    agent_name: str
+    input: str  # Normalized, see `normalize_text`
+    current_date: str
+    version: str  # Version of the data the sub-agent reads, e.g. the user's calendar
+
+
+class AgentToolCache:
+    """
+    Memoizes the answers of sub-agents called as tools, within and across turns.
+
+    Answers expire after their TTL. Since the key contains the version of the data the sub-agent reads, answers
+    based on outdated data are not served. `invalidate` drops answers explicitly, e.g. when a calendar changed.
+    """
+
+    def __init__(self, max_size: int = AGENT_TOOL_CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[AgentToolCacheKey, tuple[float, str]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: AgentToolCacheKey) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: AgentToolCacheKey, answer: str, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, answer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tool_name: Optional[str] = None, version_prefix: Optional[str] = None) -> int:
+        """
+        Drops the cached answers of a tool and/or those whose data version starts with `version_prefix`
+        (e.g. a user id, see `calendar_version`), or all answers if neither is given.
+
+        Returns:
+            The number of dropped answers
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if (tool_name is None or key.tool_name == tool_name)
+                and (version_prefix is None or key.version.startswith(version_prefix))
+            ]
+            for key in keys:
+                del self._entries[key]
+        return len(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+agent_tool_cache = AgentToolCache()
+
+
+def agent_tool(
+    agent: Agent,
+    tool_name: str,
+    tool_description: str,
+    ttl: float = 0,
+    cache_version: Optional[Callable[[Any], Optional[str]]] = None,
+) -> FunctionTool:
+    """
+    Turns an agent into a tool, like `Agent.as_tool`, but the sub-agent receives the request context as a
+    trailing message (see `context_message`), so its instructions can stay static.
+
+    With a `ttl`, answers are memoized in `agent_tool_cache`, keyed on the normalized input, the current date
+    and the version of the data the sub-agent reads, so repeated calls (e.g. in follow-ups) return instantly.
+
+    The sub-agent is stopped `DEADLINE_RESERVE` seconds before the request deadline in the run context, so the
+    calling agent has time left to answer with what it has.
+
+    Args:
+        agent: The sub-agent to run when the tool is called
+        tool_name: The name of the tool
+        tool_description: The description of the tool, shown to the calling agent
+        ttl: Seconds an answer is reused, 0 disables memoization
+        cache_version: Returns the version of the data the sub-agent reads from the run context, e.g.
+            `calendar_version`. If it returns None, the answer is not memoized.
+    """
+
+    def cache_key(context: Any, input: str) -> Optional[AgentToolCacheKey]:
+        if not ttl:
+            return None
+        version = cache_version(context) if cache_version is not None else ""
+        if version is None:
+            return None
+        current_date = getattr(context, "current_date", "")
+        return AgentToolCacheKey(tool_name, agent.name, normalize_text(input), current_date, version)
+
+    @function_tool(
+        name_override=tool_name, description_override=tool_description, failure_error_function=report_tool_error
+    )
+    async def run_sub_agent(context: RunContextWrapper[Any], input: str) -> str:
+        key = cache_key(context.context, input)
+        if key is not None and (answer := agent_tool_cache.get(key)) is not None:
+            logger.info("Answered %s from the cache", tool_name)
+            return answer
+
+        items: list[TResponseInputItem] = [{"role": "user", "content": input}]
+        message = context_message(context.context)
+        if message is not None:
+            items.append(message)
+
+        left = time_left(getattr(context.context, "deadline", None), DEADLINE_RESERVE)
+        if left == 0:
+            logger.warning("Skipped %s, the request deadline is too close", tool_name)
+            return f"{tool_name} was not called, there is no time left. Answer with the information you have."
+
+        try:
+            async with asyncio.timeout(left):
+                result = await run_agent(agent, items, context=context.context)
+        except TimeoutError:
+            logger.warning("Stopped %s at the request deadline", tool_name)
+            return f"{tool_name} did not finish in time. Answer with the information you have."
+        answer = ItemHelpers.text_message_outputs(result.new_items)
+        if key is not None and answer:
+            agent_tool_cache.put(key, answer, ttl)
+        return answer
+
+    return run_sub_agent
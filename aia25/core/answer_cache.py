@@ -0,0 +1,365 @@
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Iterable, NamedTuple, Optional
+
+from aia25.core.agent_tools import AGENT_TOOL_CACHE_TTL, AGENT_TOOL_REALTIME_TTL
+from aia25.core.deadline import TIMEOUT_ANSWER
+from aia25.core.fast_path import get_connection_fast_path, normalize_query
+from aia25.core.topic_classifier import extract_features, normalize_text
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+# Cosine similarity of the questions' word and character n-grams (see `question_features`) above which a cached
+# answer is served
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+ANSWER_CACHE_TIME_BUCKET = int(os.getenv("ANSWER_CACHE_TIME_BUCKET", "15"))  # Minutes, for questions about "now"
+ANSWER_CACHE_SIZE = 1024  # Number of entity buckets kept at most
+ANSWER_CACHE_BUCKET_SIZE = 8  # Number of differently phrased questions kept per bucket
+
+
+class ToolData(NamedTuple):
+    ttl: float  # Seconds the data the tool returns stays fresh
+    per_user: bool  # Whether the data belongs to the user, e.g. their calendar
+
+
+# The data behind the tools the exercises' top-level agents call. An answer is fresh as long as the data of all
+# tools it is based on, answers based on other tools are not cached.
+TOOL_DATA = {
+    "get_connections": ToolData(AGENT_TOOL_REALTIME_TTL, per_user=False),
+    "find_transport_routes": ToolData(AGENT_TOOL_REALTIME_TTL, per_user=False),
+    "Public Transport Agent": ToolData(AGENT_TOOL_REALTIME_TTL, per_user=False),
+    "get_current_date_and_time": ToolData(AGENT_TOOL_REALTIME_TTL, per_user=False),
+    "get_calendar_appointments": ToolData(AGENT_TOOL_CACHE_TTL, per_user=True),
+    "select_best_connection": ToolData(AGENT_TOOL_REALTIME_TTL, per_user=True),
+    "gather_trip_data": ToolData(AGENT_TOOL_REALTIME_TTL, per_user=True),  # The pipeline, see `pipeline.py`
+    "explore_locations": ToolData(AGENT_TOOL_CACHE_TTL, per_user=False),
+    "get_nearby_places": ToolData(AGENT_TOOL_CACHE_TTL, per_user=False),
+    "think": None,  # No data
+}
+# Answers without tool calls may still be based on live data, e.g. from the connection fast path
+NO_TOOL_DATA = ToolData(AGENT_TOOL_REALTIME_TTL, per_user=False)
+
+_DAYS = {"today": 0, "heute": 0, "tomorrow": 1, "morgen": 1, "ubermorgen": 2}
+_WEEKDAYS = {
+    name: day
+    for day, names in enumerate(
+        [
+            ("monday", "montag"),
+            ("tuesday", "dienstag"),
+            ("wednesday", "mittwoch"),
+            ("thursday", "donnerstag"),
+            ("friday", "freitag"),
+            ("saturday", "samstag"),
+            ("sunday", "sonntag"),
+        ]
+    )
+    for name in names
+}
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+_DOTTED_DATE = re.compile(r"\b(\d{1,2})\.(\d{1,2})\.(\d{4})?")
+_CLOCK_TIME = re.compile(r"\b(\d{1,2})(?::(\d{2}))? ?(am|pm|uhr)\b|\b(\d{1,2}):(\d{2})\b")
+_NUMBER = re.compile(r"\d+")
+_MAX_STATION_WORDS = 4
+# Words that change what a question asks for while barely changing its n-grams, e.g. "direct" and "no direct"
+_QUALIFIER_WORDS = set(
+    "no not never without with direct directly nonstop only except avoid first last earliest latest fastest "
+    "before after arrive arriving arrival depart departing departure return back "
+    "kein keine keinen nicht nie ohne mit direkt nur ausser erste ersten letzte letzten".split()
+)
+_CONTRACTED_NOT = re.compile(r"n['’]t\b")  # "isn't", "don't"
+# Words that only change how a question is phrased, not what it asks for
+_FILLER_WORDS = set(
+    "please bitte hi hello hey thanks can could would you give me show tell find get what whats when is are does "
+    "do the a an i im need want looking for".split()
+)
+
+
+class QuestionEntities(NamedTuple):
+    stations: tuple[str, ...]  # API names, in the order they are mentioned
+    date: str  # YYYY-MM-DD, today unless the question names another day
+    time_bucket: str  # HH:MM rounded down to ANSWER_CACHE_TIME_BUCKET, empty for days other than today
+    numbers: tuple[str, ...]  # Other numbers, e.g. "in 2 hours", which the n-grams barely tell apart
+    qualifiers: tuple[str, ...]  # Negations and qualifiers, see `_QUALIFIER_WORDS`, sorted
+
+
+def _resolve_date(text: str, words: list[str], now: datetime) -> tuple[Optional[datetime], str]:
+    for pattern, order in ((_ISO_DATE, (0, 1, 2)), (_DOTTED_DATE, (2, 1, 0))):
+        match = pattern.search(text)
+        if match:
+            parts = [match.group(i + 1) for i in order]
+            try:
+                date = datetime(int(parts[0] or now.year), int(parts[1]), int(parts[2]))
+            except ValueError:
+                continue
+            return date, pattern.sub(" ", text, count=1)
+
+    if "day after tomorrow" in " ".join(words):
+        return now + timedelta(days=2), text
+    for word in words:
+        if word in _DAYS:
+            return now + timedelta(days=_DAYS[word]), text
+        if word in _WEEKDAYS:
+            return now + timedelta(days=(_WEEKDAYS[word] - now.weekday()) % 7), text
+    return None, text
+
+
+def _resolve_time(text: str) -> tuple[Optional[tuple[int, int]], str]:
+    match = _CLOCK_TIME.search(text)
+    if not match:
+        return None, text
+    if match.group(4) is not None:
+        hour, minute = int(match.group(4)), int(match.group(5))
+    else:
+        hour, minute = int(match.group(1)), int(match.group(2) or 0)
+        if match.group(3) == "pm" and hour < 12:
+            hour += 12
+        elif match.group(3) == "am" and hour == 12:
+            hour = 0
+    if hour > 23 or minute > 59:
+        return None, text
+    return (hour, minute), _CLOCK_TIME.sub(" ", text, count=1)
+
+
+def find_stations(words: list[str], stations: dict[str, str]) -> tuple[str, ...]:
+    """
+    Returns the stations of the station index mentioned in the words, preferring the longest names.
+    """
+    found = []
+    i = 0
+    while i < len(words):
+        for n in range(min(_MAX_STATION_WORDS, len(words) - i), 0, -1):
+            station = stations.get(" ".join(words[i : i + n]))
+            if station:
+                found.append(station)
+                i += n
+                break
+        else:
+            i += 1
+    return tuple(found)
+
+
+def extract_entities(question: str, now: Optional[datetime] = None) -> QuestionEntities:
+    """
+    Resolves the stations, the date and the time a question is about, and its negations and qualifiers, so
+    questions that only differ in them never share an answer.
+    """
+    now = now or datetime.now()
+    text = question.lower()
+    words = normalize_query(text).replace(":", " ").split()
+
+    date, text = _resolve_date(text, words, now)
+    clock, text = _resolve_time(text)
+    if clock is None and date is not None and date.date() != now.date():
+        time_bucket = ""
+    else:
+        hour, minute = clock or (now.hour, now.minute)
+        minute -= minute % ANSWER_CACHE_TIME_BUCKET
+        time_bucket = f"{hour:02d}:{minute:02d}"
+
+    qualifiers = {word for word in words if word in _QUALIFIER_WORDS}
+    if _CONTRACTED_NOT.search(question.lower()):
+        qualifiers.add("not")
+
+    return QuestionEntities(
+        stations=find_stations(words, get_connection_fast_path().stations),
+        date=(date or now).strftime("%Y-%m-%d"),
+        time_bucket=time_bucket,
+        numbers=tuple(_NUMBER.findall(text)),
+        qualifiers=tuple(sorted(qualifiers)),
+    )
+
+
+def question_features(question: str) -> dict[str, float]:
+    """
+    Returns the word and character n-grams of a question without filler words, see `extract_features`.
+    """
+    return extract_features(" ".join(w for w in normalize_text(question).split() if w not in _FILLER_WORDS))
+
+
+def tools_called(items: Iterable[Any]) -> set[str]:
+    """
+    Returns the names of the tools called in the given conversation items.
+    """
+    return {item["name"] for item in items if isinstance(item, dict) and item.get("type") == "function_call"}
+
+
+def answer_data(tools: set[str]) -> Optional[ToolData]:
+    """
+    Combines the data behind the tools an answer is based on: the shortest TTL applies and the answer belongs to
+    the user if any tool read their data. Returns None if the answer must not be cached.
+    """
+    tools = {tool for tool in tools if not tool.startswith("transfer_to_")}  # Handoffs carry no data
+    if any(tool not in TOOL_DATA for tool in tools):
+        return None
+    data = [TOOL_DATA[tool] for tool in tools if TOOL_DATA[tool] is not None]
+    if not data:
+        return NO_TOOL_DATA
+    return ToolData(min(d.ttl for d in data), any(d.per_user for d in data))
+
+
+def _cosine(a: dict[str, float], b: dict[str, float]) -> float:
+    dot = sum(value * b.get(feature, 0.0) for feature, value in a.items())
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    features: dict[str, float]  # See `question_features`
+    answer: str
+    stored_at: float  # `time.monotonic()`
+    ttl: float
+
+
+class AnswerCacheKey(NamedTuple):
+    scope: str  # The exercise and execution mode that produced the answer
+    user_id: str  # Empty for answers that do not depend on the user's data
+    entities: QuestionEntities
+
+
+class AnswerCache:
+    """
+    Serves the answers of near-identical questions, e.g. many users asking for the same route at the same hour,
+    without running the agent.
+
+    Answers are bucketed by the entities of the question (see `extract_entities`), within a bucket the question
+    has to be similar to a cached one (see `ANSWER_CACHE_SIMILARITY`). An answer expires with the data of the
+    tools it is based on (see `TOOL_DATA`) and answers based on a user's calendar are only served to that user.
+    """
+
+    def __init__(self, similarity: float = ANSWER_CACHE_SIMILARITY, max_size: int = ANSWER_CACHE_SIZE):
+        self.similarity = similarity
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0  # Misses for which a similar answer had expired
+        self.stores = 0
+        self.skipped = 0  # Answers that could not be cached, e.g. clarification questions
+        self._served_age = 0.0  # Sum of the ages of the served answers in seconds
+        self._served_staleness = 0.0  # Sum of the ages of the served answers as a fraction of their TTL
+        self._buckets: OrderedDict[AnswerCacheKey, list[CachedAnswer]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, question: str, scope: str, user_id: str, now: Optional[datetime] = None) -> Optional[str]:
+        """
+        Returns the answer to a similar question with the same entities, or None.
+
+        Args:
+            question: The user's message
+            scope: The exercise and execution mode that would answer the question
+            user_id: The user asking, answers based on their own data are served too
+            now: The time the question is asked, for relative dates and times
+        """
+        entities = extract_entities(question, now)
+        features = question_features(question)
+        with self._lock:
+            stale = False
+            for key in (AnswerCacheKey(scope, user_id, entities), AnswerCacheKey(scope, "", entities)):
+                entry, expired = self._find(key, features)
+                stale = stale or expired
+                if entry is not None:
+                    self.hits += 1
+                    age = time.monotonic() - entry.stored_at
+                    self._served_age += age
+                    self._served_staleness += age / entry.ttl
+                    return entry.answer
+            self.misses += 1
+            self.stale += stale
+            return None
+
+    def _find(self, key: AnswerCacheKey, features: dict[str, float]) -> tuple[Optional[CachedAnswer], bool]:
+        bucket = self._buckets.get(key)
+        if not bucket:
+            return None, False
+
+        now = time.monotonic()
+        best, best_similarity, expired = None, self.similarity, False
+        for entry in list(bucket):
+            similarity = _cosine(features, entry.features)
+            if entry.stored_at + entry.ttl < now:
+                bucket.remove(entry)
+                expired = expired or similarity >= self.similarity
+            elif similarity >= best_similarity:
+                best, best_similarity = entry, similarity
+        if not bucket:
+            del self._buckets[key]
+        elif best is not None:
+            self._buckets.move_to_end(key)
+        return best, expired and best is None
+
+    def store(
+        self,
+        question: str,
+        answer: Any,
+        scope: str,
+        user_id: str,
+        tools: set[str],
+        suspended: bool = False,
+        now: Optional[datetime] = None,
+    ):
+        """
+        Caches the answer to a question, unless it is based on tools whose data cannot be cached or the run was
+        suspended to ask the user a question (see `watch_clarifications`).
+
+        Args:
+            question: The user's message
+            answer: The final output of the agent
+            scope: The exercise and execution mode that answered the question
+            user_id: The user who asked
+            tools: The names of the tools the answer is based on, see `tools_called`
+            suspended: Whether the answer is a clarification question rather than an answer
+            now: The time the question was asked
+        """
+        data = answer_data(tools)
+        answer = str(answer) if answer is not None else ""
+        if suspended or data is None or not answer.strip() or TIMEOUT_ANSWER in answer:
+            with self._lock:
+                self.skipped += 1
+            return
+
+        key = AnswerCacheKey(scope, user_id if data.per_user else "", extract_entities(question, now))
+        entry = CachedAnswer(question, question_features(question), answer, time.monotonic(), data.ttl)
+        with self._lock:
+            bucket = self._buckets.setdefault(key, [])
+            bucket.append(entry)
+            del bucket[:-ANSWER_CACHE_BUCKET_SIZE]
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_size:
+                self._buckets.popitem(last=False)
+            self.stores += 1
+
+    def invalidate(self, user_id: Optional[str] = None) -> int:
+        """
+        Drops the cached answers based on the data of a user (e.g. after their calendar changed), or all answers.
+
+        Returns:
+            The number of dropped answers
+        """
+        with self._lock:
+            keys = [key for key in self._buckets if user_id is None or key.user_id == user_id]
+            dropped = sum(len(self._buckets.pop(key)) for key in keys)
+        return dropped
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": sum(len(bucket) for bucket in self._buckets.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_misses": self.stale,
+                "stores": self.stores,
+                "skipped": self.skipped,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "mean_served_age_seconds": self._served_age / self.hits if self.hits else 0.0,
+                "mean_served_staleness": self._served_staleness / self.hits if self.hits else 0.0,
+            }
+
+
+answer_cache = AnswerCache()
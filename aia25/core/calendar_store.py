@@ -0,0 +1,433 @@
+import asyncio
+import codecs
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, Iterator, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from aia25.core.calendar_client import CalendarEvent
+
+logger = logging.getLogger("chainlit")
+
+CALENDAR_STORE_DIR = Path(os.getenv("CALENDAR_STORE_DIR", ".calendars"))
+CHUNK_SIZE = 64 * 1024  # Bytes read from the uploaded file per chunk
+COMMIT_EVERY = 500  # Events written per transaction, queries see each committed batch
+DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"  # Lexically sortable, used for the indexed columns
+
+_DURATION_RE = re.compile(r"([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?")
+
+
+def read_chunks(path: str, chunk_size: int = CHUNK_SIZE, on_progress: Optional[Callable[[float], None]] = None):
+    """
+    Reads a file in binary chunks and reports the fraction of bytes read so far.
+
+    Args:
+        path: Path of the file to read
+        chunk_size: Number of bytes per chunk
+        on_progress: Optional callback receiving a value between 0 and 1 after each chunk
+    """
+    total = os.path.getsize(path) or 1
+    done = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            done += len(chunk)
+            yield chunk
+            if on_progress:
+                on_progress(done / total)
+
+
+def iter_ics_lines(chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Decodes a stream of ICS chunks and yields unfolded content lines (RFC 5545, section 3.1).
+
+    Lines may be split at arbitrary positions between chunks, including inside multi-byte characters.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""  # Incomplete physical line at the end of the last chunk
+    logical = None  # Logical line that may still be continued by a folded line
+
+    def physical_lines(text: str, final: bool) -> Iterator[str]:
+        nonlocal pending
+        lines = (pending + text).split("\n")
+        pending = "" if final else lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+
+    def unfold(lines: Iterator[str]) -> Iterator[str]:
+        nonlocal logical
+        for line in lines:
+            if line[:1] in (" ", "\t") and logical is not None:
+                logical += line[1:]
+                continue
+            if logical:
+                yield logical
+            logical = line
+
+    for chunk in chunks:
+        yield from unfold(physical_lines(decoder.decode(chunk), final=False))
+    yield from unfold(physical_lines(decoder.decode(b"", final=True), final=True))
+    if logical:
+        yield logical
+
+
+def _split_content_line(line: str) -> tuple[str, dict[str, str], str]:
+    """Splits `NAME;PARAM=VALUE:content` into its name, parameters and value."""
+    head, _, value = line.partition(":")
+    name, *params = head.split(";")
+    return name.upper(), dict(p.partition("=")[::2] for p in params), value
+
+
+def _unescape(value: str) -> str:
+    return re.sub(r"\\([\\;,nN])", lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def parse_ics_datetime(value: str, params: dict[str, str]) -> tuple[datetime, bool]:
+    """
+    Parses an ICS DATE or DATE-TIME value into a naive UTC datetime.
+
+    Args:
+        value: The raw value, e.g. 20250910T090000, 20250910T090000Z or 20250910
+        params: The content line parameters, e.g. {"TZID": "Europe/Zurich"}
+
+    Returns:
+        A tuple of (naive UTC datetime, whether the value was an all-day DATE)
+    """
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value[:8], "%Y%m%d"), True
+
+    parsed = datetime.strptime(value.rstrip("Z")[:15], "%Y%m%dT%H%M%S")
+    if value.endswith("Z"):
+        return parsed, False
+
+    try:
+        zone = ZoneInfo(params["TZID"].strip('"')) if "TZID" in params else timezone.utc
+    except (ZoneInfoNotFoundError, ValueError):
+        zone = timezone.utc
+    return parsed.replace(tzinfo=zone).astimezone(timezone.utc).replace(tzinfo=None), False
+
+
+def parse_ics_duration(value: str) -> timedelta:
+    """Parses an ICS DURATION value such as PT1H30M or P1D."""
+    match = _DURATION_RE.fullmatch(value.strip())
+    if not match:
+        return timedelta()
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    duration = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+        minutes=int(minutes or 0), seconds=int(seconds or 0),
+    )
+    return -duration if sign == "-" else duration
+
+
+def iter_vevents(lines: Iterable[str]) -> Iterator[tuple[str, CalendarEvent]]:
+    """
+    Yields (uid, event) for every VEVENT found in a stream of unfolded ICS lines.
+
+    Nested components (e.g. VALARM) are skipped, events without a start are ignored.
+    """
+    props: Optional[dict[str, tuple[dict[str, str], str]]] = None
+    depth = 0
+    for line in lines:
+        name, params, value = _split_content_line(line)
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and props is None:
+                props, depth = {}, 0
+            elif props is not None:
+                depth += 1
+            continue
+        if name == "END" and props is not None:
+            if depth:
+                depth -= 1
+                continue
+            event = _build_event(props)
+            if event:
+                yield event
+            props = None
+            continue
+        if props is not None and not depth:
+            props.setdefault(name, (params, value))
+
+
+def _build_event(props: dict[str, tuple[dict[str, str], str]]) -> Optional[tuple[str, CalendarEvent]]:
+    if "DTSTART" not in props:
+        return None
+    try:
+        start, all_day = parse_ics_datetime(props["DTSTART"][1], props["DTSTART"][0])
+        if "DTEND" in props:
+            end, _ = parse_ics_datetime(props["DTEND"][1], props["DTEND"][0])
+        elif "DURATION" in props:
+            end = start + parse_ics_duration(props["DURATION"][1])
+        else:
+            end = start + timedelta(days=1) if all_day else start
+    except ValueError:
+        return None
+
+    uid = props.get("UID", ({}, ""))[1]
+    return uid, CalendarEvent(
+        start=start,
+        end=end,
+        name=_unescape(props.get("SUMMARY", ({}, ""))[1]),
+        location=_unescape(props.get("LOCATION", ({}, ""))[1]),
+    )
+
+
+class CalendarStore:
+    """
+    An indexed, per-user calendar store backed by SQLite.
+
+    Events are written in batches while an upload is being ingested, so queries can be answered
+    from the part of the calendar that has already been indexed instead of waiting for a full parse.
+    The store exposes the same `list_events` interface as `ICSClient`.
+    """
+
+    def __init__(self, path: Path):
+        """
+        Initialize the store, creating the database if needed.
+
+        Args:
+            path (Path): Path of the SQLite database file
+        """
+        self.path = path
+        self.status = "ready" if path.exists() else "empty"  # empty | ingesting | ready | failed
+        self.progress = 1.0 if self.status == "ready" else 0.0
+        self.error: Optional[str] = None
+        self.revision = 0  # Incremented whenever the stored events change
+        self._write_lock = threading.Lock()
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS events (
+                    uid TEXT NOT NULL,
+                    start TEXT NOT NULL,
+                    end TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    location TEXT NOT NULL,
+                    resource TEXT NOT NULL DEFAULT ''
+                );
+                CREATE INDEX IF NOT EXISTS events_start ON events(start);
+                CREATE INDEX IF NOT EXISTS events_end ON events(end);
+                CREATE INDEX IF NOT EXISTS events_resource ON events(resource);
+                CREATE TABLE IF NOT EXISTS resources (href TEXT PRIMARY KEY, etag TEXT NOT NULL);
+                CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    @property
+    def is_complete(self) -> bool:
+        return self.status == "ready"
+
+    def ingest(self, source_path: str, on_progress: Optional[Callable[[float], None]] = None) -> int:
+        """
+        Streams an ICS file into the store, replacing previously stored events.
+
+        Args:
+            source_path (str): Path of the ICS file to ingest
+            on_progress (Callable, optional): Called with the fraction of the file read so far
+
+        Returns:
+            int: The number of ingested events
+        """
+
+        def track_progress(fraction: float):
+            self.progress = fraction
+            if on_progress:
+                on_progress(fraction)
+
+        with self._write_lock:
+            self.status, self.progress, self.error = "ingesting", 0.0, None
+            count = 0
+            try:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM events")
+                    conn.execute("DELETE FROM resources")
+                    conn.execute("DELETE FROM meta")
+                    conn.commit()
+
+                    batch = []
+                    lines = iter_ics_lines(read_chunks(source_path, on_progress=track_progress))
+                    for uid, event in iter_vevents(lines):
+                        batch.append(_event_row(uid, event))
+                        if len(batch) >= COMMIT_EVERY:
+                            count += self._write_batch(conn, batch)
+                    count += self._write_batch(conn, batch)
+            except Exception as e:
+                self.status, self.error = "failed", str(e)
+                self.revision += 1
+                raise
+
+            self.status, self.progress = "ready", 1.0
+            self.revision += 1
+            return count
+
+    @staticmethod
+    def _write_batch(conn: sqlite3.Connection, batch: list[tuple]) -> int:
+        conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)", batch)
+        conn.commit()
+        written = len(batch)
+        batch.clear()
+        return written
+
+    def resource_etags(self) -> dict[str, str]:
+        """
+        Returns the ETag of every remote resource (e.g. CalDAV event) stored, keyed by href.
+        """
+        with self._connect() as conn:
+            return dict(conn.execute("SELECT href, etag FROM resources").fetchall())
+
+    def apply_changes(
+        self,
+        changed: dict[str, tuple[str, list[tuple[str, CalendarEvent]]]],
+        deleted: Iterable[str] = (),
+        meta: Optional[dict[str, str]] = None,
+    ):
+        """
+        Patches the store in place with changed and deleted remote resources in a single transaction.
+
+        Args:
+            changed: Maps each changed href to its new ETag and the (uid, event) pairs it contains
+            deleted: Hrefs of resources that were removed remotely
+            meta: Optional metadata to store alongside, e.g. the collection's sync token
+        """
+        with self._write_lock, self._connect() as conn:
+            for href in [*changed, *deleted]:
+                conn.execute("DELETE FROM events WHERE resource = ?", (href,))
+                conn.execute("DELETE FROM resources WHERE href = ?", (href,))
+            for href, (etag, events) in changed.items():
+                conn.executemany(
+                    "INSERT INTO events VALUES (?, ?, ?, ?, ?, ?)",
+                    [_event_row(uid, event, href) for uid, event in events],
+                )
+                conn.execute("INSERT INTO resources VALUES (?, ?)", (href, etag))
+            for key, value in (meta or {}).items():
+                conn.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+            conn.commit()
+            self.status, self.progress = "ready", 1.0
+            self.revision += 1
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def list_events(self, start: datetime, end: datetime) -> list[CalendarEvent]:
+        """
+        List all events within the specified time range.
+
+        Args:
+            start (datetime): Start of the time range (can be timezone-aware or naive)
+            end (datetime): End of the time range (can be timezone-aware or naive)
+
+        Returns:
+            List[CalendarEvent]: Events overlapping the range, ordered by start time
+        """
+        start, end = _to_naive_utc(start), _to_naive_utc(end)
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT start, end, name, location FROM events WHERE start < ? AND end > ? ORDER BY start",
+                (end.strftime(DATETIME_FORMAT), start.strftime(DATETIME_FORMAT)),
+            ).fetchall()
+
+        return [
+            CalendarEvent(
+                start=datetime.strptime(row[0], DATETIME_FORMAT),
+                end=datetime.strptime(row[1], DATETIME_FORMAT),
+                name=row[2],
+                location=row[3],
+            )
+            for row in rows
+        ]
+
+
+def _event_row(uid: str, event: CalendarEvent, resource: str = "") -> tuple:
+    return (
+        uid,
+        event.start.strftime(DATETIME_FORMAT),
+        event.end.strftime(DATETIME_FORMAT),
+        event.name,
+        event.location,
+        resource,
+    )
+
+
+def parse_ics_text(text: str) -> list[tuple[str, CalendarEvent]]:
+    """
+    Parses all VEVENTs of an in-memory ICS document, e.g. a single CalDAV resource.
+    """
+    return list(iter_vevents(iter_ics_lines([text.encode("utf8")])))
+
+
+def list_file_events(path: str, start: datetime, end: datetime) -> list[CalendarEvent]:
+    """
+    Streams an ICS file and returns the events overlapping the range, ordered by start time.
+    Useful for one-off scans of a calendar that is not imported into a store.
+    """
+    start, end = _to_naive_utc(start), _to_naive_utc(end)
+    events = iter_vevents(iter_ics_lines(read_chunks(path)))
+    return sorted((event for _, event in events if event.start < end and event.end > start), key=lambda e: e.start)
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+_stores: dict[str, CalendarStore] = {}
+
+
+def get_calendar_store(user_id: str) -> CalendarStore:
+    """
+    Returns the calendar store of the given user, creating it on first use.
+
+    Args:
+        user_id: Identifier of the Chainlit user or session owning the store
+    """
+    if user_id not in _stores:
+        file_name = hashlib.sha256(user_id.encode("utf8")).hexdigest()[:32] + ".sqlite"
+        _stores[user_id] = CalendarStore(CALENDAR_STORE_DIR / file_name)
+    return _stores[user_id]
+
+
+async def ingest_calendar(
+    store: CalendarStore,
+    source_path: str,
+    on_progress: Optional[Callable[[float], Awaitable[None]]] = None,
+    report_step: float = 0.05,
+) -> int:
+    """
+    Ingests an ICS file into the store in a background thread without blocking the event loop.
+
+    Args:
+        store: The store to write to
+        source_path: Path of the ICS file to ingest
+        on_progress: Optional coroutine function receiving the fraction of the file read so far
+        report_step: Minimum progress increase between two progress reports
+
+    Returns:
+        The number of ingested events
+    """
+    loop = asyncio.get_running_loop()
+    last_reported = 0.0
+
+    def report(fraction: float):
+        nonlocal last_reported
+        if on_progress and (fraction - last_reported >= report_step or fraction >= 1.0):
+            last_reported = fraction
+            asyncio.run_coroutine_threadsafe(on_progress(fraction), loop)
+
+    count = await asyncio.to_thread(store.ingest, source_path, report)
+    logger.info(f"Ingested {count} calendar events into {store.path}")
+    return count
@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import os
+import xml.etree.ElementTree as ET
+from typing import Awaitable, Callable, NamedTuple, Optional
+
+import requests
+
+from aia25.core.calendar_store import CalendarStore, parse_ics_text
+
+logger = logging.getLogger("chainlit")
+
+DAV = "DAV:"
+CALDAV = "urn:ietf:params:xml:ns:caldav"
+CALSERVER = "http://calendarserver.org/ns/"
+MULTIGET_BATCH_SIZE = 50  # Resources fetched per calendar-multiget REPORT
+
+_PROPFIND_COLLECTION = f"""<?xml version="1.0" encoding="utf-8"?>
+<d:propfind xmlns:d="{DAV}" xmlns:cs="{CALSERVER}">
+  <d:prop><cs:getctag/><d:sync-token/></d:prop>
+</d:propfind>"""
+
+_PROPFIND_ETAGS = f"""<?xml version="1.0" encoding="utf-8"?>
+<d:propfind xmlns:d="{DAV}"><d:prop><d:getetag/></d:prop></d:propfind>"""
+
+_SYNC_COLLECTION = """<?xml version="1.0" encoding="utf-8"?>
+<d:sync-collection xmlns:d="DAV:">
+  <d:sync-token>{token}</d:sync-token>
+  <d:sync-level>1</d:sync-level>
+  <d:prop><d:getetag/></d:prop>
+</d:sync-collection>"""
+
+_CALENDAR_MULTIGET = f"""<?xml version="1.0" encoding="utf-8"?>
+<c:calendar-multiget xmlns:d="{DAV}" xmlns:c="{CALDAV}">
+  <d:prop><d:getetag/><c:calendar-data/></d:prop>
+  {{hrefs}}
+</c:calendar-multiget>"""
+
+
+class InvalidSyncToken(Exception):
+    """Raised when the server no longer accepts the stored sync token and a full listing is required."""
+
+
+class CollectionState(NamedTuple):
+    ctag: str
+    sync_token: str
+
+
+class SyncResult(NamedTuple):
+    """
+    Summary of a single synchronization run.
+
+    Attributes:
+        changed (int): Number of added or modified resources that were downloaded
+        deleted (int): Number of resources removed from the local store
+        full (bool): Whether a full listing was needed because no valid sync token was available
+    """
+
+    changed: int
+    deleted: int
+    full: bool
+
+
+def _responses(xml_text: str) -> list[tuple[str, Optional[str], dict[str, str]]]:
+    """
+    Parses a DAV multistatus document into (href, status, properties) per response.
+    The status is only set for responses without a propstat, e.g. deleted members in a sync report.
+    """
+    root = ET.fromstring(xml_text)
+    results = []
+    for response in root.iter(f"{{{DAV}}}response"):
+        href = response.findtext(f"{{{DAV}}}href", default="").strip()
+        status = response.findtext(f"{{{DAV}}}status")
+        props = {}
+        for propstat in response.iter(f"{{{DAV}}}propstat"):
+            if " 200 " not in (propstat.findtext(f"{{{DAV}}}status") or " 200 "):
+                continue
+            prop_element = propstat.find(f"{{{DAV}}}prop")
+            for prop in prop_element if prop_element is not None else []:
+                props[prop.tag] = (prop.text or "").strip()
+        results.append((href, status, props))
+    return results
+
+
+class CalDAVClient:
+    """
+    A minimal CalDAV client for a single calendar collection.
+
+    Only the requests needed for incremental synchronization are implemented: collection state
+    (ctag and sync token), WebDAV sync-collection reports (RFC 6578), ETag listings and
+    calendar-multiget reports to download changed events.
+    """
+
+    def __init__(self, collection_url: str, auth: Optional[tuple[str, str]] = None, timeout: float = 10):
+        """
+        Initialize the client.
+
+        Args:
+            collection_url (str): URL of the calendar collection, ending with a slash
+            auth (tuple, optional): Username and password for basic authentication
+            timeout (float): Timeout in seconds for each HTTP request
+        """
+        self.collection_url = collection_url if collection_url.endswith("/") else collection_url + "/"
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.auth = auth
+
+    def _request(self, method: str, body: str, depth: str) -> requests.Response:
+        return self.session.request(
+            method,
+            self.collection_url,
+            data=body.encode("utf8"),
+            headers={"Depth": depth, "Content-Type": "application/xml; charset=utf-8"},
+            timeout=self.timeout,
+        )
+
+    def get_collection_state(self) -> CollectionState:
+        """
+        Returns the collection's ctag and current sync token.
+        """
+        response = self._request("PROPFIND", _PROPFIND_COLLECTION, depth="0")
+        response.raise_for_status()
+        props = _responses(response.text)[0][2]
+        return CollectionState(
+            ctag=props.get(f"{{{CALSERVER}}}getctag", ""),
+            sync_token=props.get(f"{{{DAV}}}sync-token", ""),
+        )
+
+    def list_etags(self) -> dict[str, str]:
+        """
+        Returns the ETag of every event resource in the collection, keyed by href.
+        """
+        response = self._request("PROPFIND", _PROPFIND_ETAGS, depth="1")
+        response.raise_for_status()
+        return {
+            href: props[f"{{{DAV}}}getetag"]
+            for href, _, props in _responses(response.text)
+            if f"{{{DAV}}}getetag" in props and href.endswith(".ics")
+        }
+
+    def sync_collection(self, sync_token: str) -> tuple[dict[str, str], list[str], str]:
+        """
+        Returns the changes since the given sync token.
+
+        Returns:
+            A tuple of (changed hrefs with their new ETags, deleted hrefs, new sync token)
+
+        Raises:
+            InvalidSyncToken: If the server rejects the sync token
+        """
+        response = self._request("REPORT", _SYNC_COLLECTION.format(token=sync_token), depth="1")
+        if response.status_code in (403, 409) and "valid-sync-token" in response.text:
+            raise InvalidSyncToken(sync_token)
+        response.raise_for_status()
+
+        changed, deleted = {}, []
+        for href, status, props in _responses(response.text):
+            if status and " 404 " in status:
+                deleted.append(href)
+            elif f"{{{DAV}}}getetag" in props:
+                changed[href] = props[f"{{{DAV}}}getetag"]
+        new_token = ET.fromstring(response.text).findtext(f"{{{DAV}}}sync-token", default="").strip()
+        return changed, deleted, new_token
+
+    def multiget(self, hrefs: list[str]) -> dict[str, tuple[str, str]]:
+        """
+        Downloads the given event resources.
+
+        Returns:
+            The ETag and ICS text of each resource, keyed by href
+        """
+        body = _CALENDAR_MULTIGET.replace("{hrefs}", "".join(f"<d:href>{h}</d:href>" for h in hrefs))
+        response = self._request("REPORT", body, depth="1")
+        response.raise_for_status()
+        return {
+            href: (props.get(f"{{{DAV}}}getetag", ""), props.get(f"{{{CALDAV}}}calendar-data", ""))
+            for href, _, props in _responses(response.text)
+            if f"{{{CALDAV}}}calendar-data" in props
+        }
+
+
+class CalendarSync:
+    """
+    Keeps a `CalendarStore` in sync with a CalDAV collection by transferring only what changed.
+
+    The collection ctag short-circuits runs where nothing changed. Otherwise the stored sync token is used
+    to ask the server for the changed and deleted members, and only events whose ETag differs from the
+    stored one are downloaded and patched into the store. Without a valid sync token, the ETags of all
+    members are listed and compared instead of downloading the whole calendar.
+    """
+
+    def __init__(self, store: CalendarStore, client: CalDAVClient):
+        self.store = store
+        self.client = client
+
+    def sync(self) -> SyncResult:
+        """
+        Runs one synchronization and patches the store in place.
+        """
+        state = self.client.get_collection_state()
+        if state.ctag and state.ctag == self.store.get_meta("ctag"):
+            return SyncResult(changed=0, deleted=0, full=False)
+
+        known = self.store.resource_etags()
+        sync_token = self.store.get_meta("sync_token")
+        full = not sync_token
+        if sync_token:
+            try:
+                changed, deleted, new_token = self.client.sync_collection(sync_token)
+            except InvalidSyncToken:
+                logger.info("CalDAV sync token expired, comparing all ETags instead")
+                full = True
+        if full:
+            remote = self.client.list_etags()
+            changed = remote
+            deleted = [href for href in known if href not in remote]
+            new_token = state.sync_token
+
+        to_fetch = [href for href, etag in changed.items() if known.get(href) != etag]
+        downloaded = {}
+        for i in range(0, len(to_fetch), MULTIGET_BATCH_SIZE):
+            for href, (etag, ics_text) in self.client.multiget(to_fetch[i : i + MULTIGET_BATCH_SIZE]).items():
+                downloaded[href] = (etag or changed.get(href, ""), parse_ics_text(ics_text))
+
+        deleted = [href for href in deleted if href in known]
+        self.store.apply_changes(
+            downloaded, deleted, meta={"ctag": state.ctag, "sync_token": new_token or state.sync_token}
+        )
+        return SyncResult(changed=len(downloaded), deleted=len(deleted), full=full)
+
+
+def caldav_sync_from_env(open_store: Callable[[], CalendarStore]) -> Optional[CalendarSync]:
+    """
+    Creates a `CalendarSync` for the collection configured with `CALDAV_URL`, or None if it is not set.
+    Credentials are read from `CALDAV_USERNAME` and `CALDAV_PASSWORD`.
+
+    Args:
+        open_store: Returns the store to synchronize into, only called if a collection is configured
+    """
+    url = os.getenv("CALDAV_URL")
+    if not url:
+        return None
+    username = os.getenv("CALDAV_USERNAME")
+    auth = (username, os.getenv("CALDAV_PASSWORD", "")) if username else None
+    return CalendarSync(open_store(), CalDAVClient(url, auth=auth))
+
+
+async def run_periodic_sync(
+    calendar_sync: CalendarSync,
+    interval: float = float(os.getenv("CALDAV_SYNC_INTERVAL", "60")),
+    on_change: Optional[Callable[[SyncResult], Awaitable[None]]] = None,
+):
+    """
+    Synchronizes the calendar in a background thread every `interval` seconds until cancelled.
+    A failing run is logged and retried after the interval.
+
+    Args:
+        calendar_sync: The synchronization to run
+        interval: Seconds between two synchronization runs
+        on_change: Optional coroutine function called after runs that changed the store
+    """
+    while True:
+        try:
+            result = await asyncio.to_thread(calendar_sync.sync)
+            if (result.changed or result.deleted) and on_change:
+                await on_change(result)
+        except (requests.RequestException, ET.ParseError) as e:
+            logger.warning(f"CalDAV sync failed: {e}")
+        except Exception:
+            # Keeps the loop alive, e.g. after an unexpected server response or a failing `on_change`
+            logger.exception("CalDAV sync failed")
+        await asyncio.sleep(interval)
@@ -0,0 +1,68 @@
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from agents import AgentsException, ItemHelpers, ModelResponse, RunContextWrapper, TResponseInputItem
+from agents.tool import default_tool_error_function
+
+# Questions the runs of the current request were suspended with, see `watch_clarifications`
+_clarifications: ContextVar[Optional[list[str]]] = ContextVar("clarifications", default=None)
+
+
+class ClarificationRequested(AgentsException):
+    """
+    Raised by `ask_for_clarification` to suspend the run until the user has answered the question.
+    """
+
+    def __init__(self, question: str):
+        super().__init__(question)
+        self.question = question
+
+
+def watch_clarifications() -> list[str]:
+    """
+    Starts collecting the questions the runs of the current task (and the tasks it starts) are suspended with.
+    The returned list is filled as runs are suspended, e.g. to tell a question from an answer after the run.
+    """
+    questions: list[str] = []
+    _clarifications.set(questions)
+    return questions
+
+
+def report_tool_error(context: RunContextWrapper[Any], error: Exception) -> str:
+    """
+    Reports a failed tool call to the model like the SDK does by default, except for clarification requests,
+    which end the run (also when raised by a sub-agent called as a tool).
+    """
+    if isinstance(error, ClarificationRequested):
+        raise error
+    return default_tool_error_function(context, error)
+
+
+@dataclass
+class SuspendedRun:
+    """
+    The result of a run that was suspended to ask the user a question, in place of a `RunResult`.
+
+    The question is the final output. The conversation, including the completed turns of the run and the
+    question, is kept as input items, so the run continues from there when the user's answer is appended.
+    Waiting for the answer holds no coroutine or thread, only the conversation in the session.
+    """
+
+    final_output: str
+    input_items: list[TResponseInputItem]
+    raw_responses: list[ModelResponse]
+
+    @classmethod
+    def from_exception(cls, error: ClarificationRequested, input: str | list[TResponseInputItem]) -> "SuspendedRun":
+        run_data = error.run_data
+        items = ItemHelpers.input_to_new_input_list(run_data.input if run_data else input)
+        if run_data:
+            items += [item.to_input_item() for item in run_data.new_items]
+        items.append({"role": "assistant", "content": error.question})
+        if (questions := _clarifications.get()) is not None:
+            questions.append(error.question)
+        return cls(error.question, items, run_data.raw_responses if run_data else [])
+
+    def to_input_list(self) -> list[TResponseInputItem]:
+        return list(self.input_items)
@@ -0,0 +1,131 @@
+import asyncio
+import os
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any, Optional
+
+import chainlit as cl
+from pydantic import BaseModel, PrivateAttr
+
+from aia25.core.calendar_client import ICSClient
+from aia25.core.calendar_store import CalendarStore, get_calendar_store, list_file_events
+from aia25.core.deadline import request_deadline
+from aia25.core.tenant_cache import calendar_cache
+
+STORE_SOURCE = "store"  # The user's calendar store, filled by uploads or CalDAV sync
+USER_CALENDAR_DIR = os.getenv("USER_CALENDAR_DIR")  # Optional directory with one <user id>.ics per user
+
+
+class GlobalContext(BaseModel):
+    """
+    This class holds the global context for the agent, including the current date and time.
+    It is used to provide context to the agent during its execution.
+    """
+
+    current_date: str = ""  # Date in YYYY-MM-DD format
+    current_time: str = ""  # Time in HH:MM:SS format
+    user_id: str = ""  # Chainlit user (or session, for anonymous users) the request belongs to
+    calendar_source: str = ""  # STORE_SOURCE, path of an ICS file, or empty for the exercise's example calendar
+    deadline: Optional[float] = None  # `time.monotonic()` by which the request must be answered, see `deadline.py`
+
+    _side_effect_gate: Optional[asyncio.Event] = PrivateAttr(default=None)
+
+    @classmethod
+    def for_session(cls, **kwargs) -> "GlobalContext":
+        """
+        Creates the context for a request of the current Chainlit session, with its user, calendar and deadline
+        resolved.
+        """
+        user_id = session_user_id()
+        kwargs.setdefault("deadline", request_deadline())
+        return cls(user_id=user_id, calendar_source=resolve_calendar_source(user_id), **kwargs)
+
+    def hold_side_effects(self):
+        """
+        Makes tools with side effects (e.g. messages to the user) wait until `release_side_effects` is called.
+        """
+        self._side_effect_gate = asyncio.Event()
+
+    def release_side_effects(self):
+        if self._side_effect_gate is not None:
+            self._side_effect_gate.set()
+
+    async def side_effects_allowed(self):
+        """
+        Waits until tools are allowed to cause side effects. Returns immediately unless they are held back.
+        """
+        if self._side_effect_gate is not None:
+            await self._side_effect_gate.wait()
+
+
+def session_user_id() -> str:
+    """
+    Returns an identifier for the current user, falling back to the session ID for anonymous users.
+    """
+    try:
+        user = cl.user_session.get("user")
+        return user.identifier if user else cl.user_session.get("id") or ""
+    except Exception:  # Not running inside a Chainlit session (e.g. scripts)
+        return ""
+
+
+def resolve_calendar_source(user_id: str) -> str:
+    """
+    Resolves which calendar the user's requests should read from.
+    An uploaded or synced calendar wins over a configured per-user file, which wins over the example calendar.
+    """
+    try:
+        store = cl.user_session.get("calendar_store")
+    except Exception:
+        store = None
+    if isinstance(store, CalendarStore) and store.status != "empty":
+        return STORE_SOURCE
+
+    if USER_CALENDAR_DIR and user_id:
+        user_calendar = Path(USER_CALENDAR_DIR) / f"{user_id}.ics"
+        if user_calendar.exists():
+            return str(user_calendar)
+    return ""
+
+
+def open_calendar(context: Any, default_calendar_path: Path):
+    """
+    Returns the calendar of the request's user, which can be listed with `list_events(start, end)`.
+
+    Per-user calendar files are served from the shared, memory-budgeted `calendar_cache`.
+
+    Args:
+        context: The run context, usually a `GlobalContext`
+        default_calendar_path: The calendar to use if the user has none
+    """
+    user_id = getattr(context, "user_id", "")
+    source = getattr(context, "calendar_source", "")
+
+    if source == STORE_SOURCE and user_id:
+        return get_calendar_store(user_id)
+    if source:
+        stat = os.stat(source)
+        loader = partial(list_file_events, source, datetime.min, datetime.max)
+        return calendar_cache.get(user_id, source, f"{stat.st_mtime_ns}:{stat.st_size}", loader)
+    return ICSClient(str(default_calendar_path))
+
+
+def calendar_version(context: Any, default_calendar_path: Path) -> Optional[str]:
+    """
+    Returns a version of the request's calendar (see `open_calendar`) that changes whenever its events change,
+    so results derived from the calendar can be cached. None while the calendar is being ingested.
+
+    Args:
+        context: The run context, usually a `GlobalContext`
+        default_calendar_path: The calendar to use if the user has none
+    """
+    user_id = getattr(context, "user_id", "")
+    source = getattr(context, "calendar_source", "")
+
+    if source == STORE_SOURCE and user_id:
+        store = get_calendar_store(user_id)
+        return f"{user_id}:{STORE_SOURCE}:{store.revision}" if store.is_complete else None
+    path = source or str(default_calendar_path)
+    stat = os.stat(path)
+    return f"{user_id if source else ''}:{path}:{stat.st_mtime_ns}:{stat.st_size}"
@@ -0,0 +1,65 @@
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from agents import ModelResponse, TResponseInputItem
+
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT", "45"))  # Seconds a request may take in total
+DEADLINE_RESERVE = float(os.getenv("DEADLINE_RESERVE", "8"))  # Seconds kept to answer from the results so far
+
+TIMEOUT_ANSWER = (
+    "I could not finish looking this up in time. Please try again, or ask about one thing at a time "
+    "(e.g. only the connection or only the appointments)."
+)
+
+# Deadline of the request being handled, as `time.monotonic()`. It is copied into the run context, see
+# `GlobalContext.for_session`, and reaches MCP calls, which have no run context, through this variable.
+_request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def start_request_deadline(timeout: float = REQUEST_TIMEOUT) -> float:
+    """
+    Sets the deadline of the request handled by the current task (and the tasks it starts).
+    """
+    deadline = time.monotonic() + timeout
+    _request_deadline.set(deadline)
+    return deadline
+
+
+def request_deadline() -> Optional[float]:
+    return _request_deadline.get()
+
+
+def time_left(deadline: Optional[float], reserve: float = 0.0) -> Optional[float]:
+    """
+    Returns the seconds until `reserve` seconds before the deadline (at least 0), or None without a deadline.
+    """
+    if deadline is None:
+        return None
+    return max(deadline - reserve - time.monotonic(), 0.0)
+
+
+def bounded_timeout(timeout: float, deadline: Optional[float], reserve: float = DEADLINE_RESERVE) -> float:
+    """
+    Shortens the timeout of a call (e.g. an HTTP request) so it ends `reserve` seconds before the deadline.
+    """
+    left = time_left(deadline, reserve)
+    return timeout if left is None else max(min(timeout, left), 0.1)
+
+
+@dataclass
+class PartialRun:
+    """
+    The result of a run that was cut off at the request deadline, in place of a `RunResult`.
+
+    The final output is the part of the answer streamed so far, or `TIMEOUT_ANSWER` if nothing was streamed.
+    """
+
+    final_output: str
+    input_items: list[TResponseInputItem]
+    raw_responses: list[ModelResponse]
+
+    def to_input_list(self) -> list[TResponseInputItem]:
+        return list(self.input_items)
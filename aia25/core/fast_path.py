@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import re
+import threading
+import unicodedata
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from aia25.core.transport import get_transport_client
+
+STATIONS_PATH = Path(__file__).parent / "data" / "stations.txt"
+
+logger = logging.getLogger("chainlit")
+
+
+class ConnectionQuery(NamedTuple):
+    start: str  # Station names as understood by the transport API
+    end: str
+    date: str  # YYYY-MM-DD
+    time: str  # HH:MM
+    is_arrival_time: bool
+
+
+def normalize_query(text: str) -> str:
+    """
+    Lowercases the text, strips accents and keeps only words, digits and colons separated by single spaces.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[a-z0-9:]+", text))
+
+
+def load_station_index(path: Path = STATIONS_PATH) -> dict[str, str]:
+    """
+    Loads the station index, mapping the normalized names and aliases of a station to its API name.
+    """
+    index = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip() and not line.startswith("#"):
+                names = line.strip().split("|")
+                for name in names:
+                    index[normalize_query(name)] = names[0]
+    return index
+
+
+_PREFIX = (
+    r"(?:(?:can you|could you) )?(?:(?:show|give|find|get|tell) (?:me )?)?"
+    r"(?:(?:i need|i want|i am looking for|im looking for|ich brauche|ich suche) )?"
+    r"(?:(?:what is|whats|what s|when is|when does|when do|when are|how do i get|how can i get"
+    r"|wann fahrt|wann geht) )?"
+    r"(?:(?:the|a|der|die|das|den) )?"
+    r"(?:(?P<which>next|first|earliest|last|nachste|nachster|nachsten|erste|erster|ersten|letzte|letzter) )?"
+    r"(?:(?:train|trains|bus|buses|tram|connection|connections|s bahn|zug|zuge|verbindung|verbindungen) )?"
+    r"(?:(?:leave|leaves|leaving|go|goes|depart|departs|run|runs|fahrt|geht) )?"
+)
+_ROUTE = r"(?:from|von|ab) (?P<start>.+?) (?:to|nach) (?P<end>.+?)"
+_BARE_ROUTE = r"(?P<start>.+?) (?:to|nach) (?P<end>.+?)"  # "Bern to Zürich", the message starts with the station
+_TIME = (
+    r"(?: (?:(?P<arrival>arriving at|arriving by|arriving before|arrive at|arrive by|arrive before|by|before"
+    r"|ankunft um|an um|bis) |(?:at|around|after|leaving at|departing at|um|ab|gegen) )"
+    r"(?P<hour>\d{1,2})(?:(?::| )(?P<minute>\d{2}))?(?: ?(?P<ampm>am|pm))?(?P<uhr> uhr)?)?"
+)
+# Without "from", words like "Zug" (train) in the prefix could be taken for a station
+CONNECTION_QUERY_GRAMMARS = [re.compile(_PREFIX + _ROUTE + _TIME), re.compile(_BARE_ROUTE + _TIME)]
+_AMBIGUOUS_BARE_STARTS = {"zug"}  # "Zug nach Chur" is "train to Chur" rather than "Zug to Chur"
+_DAYS = {"today": 0, "heute": 0, "tomorrow": 1, "morgen": 1}
+_FILLER = re.compile(r"\b(?:please|bitte)\b")
+_STATION_SUFFIX = re.compile(r" (?:station|railway station|bahnhof|train station)$")
+
+
+class ConnectionFastPath:
+    """
+    Answers simple connection queries ("next train from Bern to Zürich at 8:15") without the agent loop.
+
+    A query is only answered if the whole message matches the grammar and both stations are in the station
+    index. Everything else, e.g. via stations, preferences or relative times like "tonight", is left to the agent.
+    The fast path calls the transport API directly and renders the connections with a template.
+    """
+
+    def __init__(self, stations: Optional[dict[str, str]] = None):
+        self.stations = stations if stations is not None else load_station_index()
+        self.hits = 0
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.fallbacks
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.fallbacks
+            return {
+                "hits": self.hits,
+                "fallbacks": self.fallbacks,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+    def _station(self, name: str) -> Optional[str]:
+        return self.stations.get(name) or self.stations.get(_STATION_SUFFIX.sub("", name))
+
+    def parse(self, text: str, now: Optional[datetime] = None) -> Optional[ConnectionQuery]:
+        """
+        Parses a connection query, returns None if the message is not a simple connection query.
+        """
+        now = now or datetime.now()
+        words = _FILLER.sub(" ", normalize_query(text)).split()
+
+        day_offsets = [_DAYS[w] for w in words if w in _DAYS]
+        if len(day_offsets) > 1:
+            return None
+        words = [w for w in words if w not in _DAYS]
+
+        text = " ".join(words)
+        match = next(filter(None, (grammar.fullmatch(text) for grammar in CONNECTION_QUERY_GRAMMARS)), None)
+        which = match.groupdict().get("which") if match else None
+        if not match or (which or "").startswith(("last", "letzt")):
+            return None
+        if match.re is CONNECTION_QUERY_GRAMMARS[1] and match["start"] in _AMBIGUOUS_BARE_STARTS:
+            return None
+
+        start, end = self._station(match["start"]), self._station(match["end"])
+        if not start or not end or start == end:
+            return None
+
+        date = (now + timedelta(days=day_offsets[0] if day_offsets else 0)).strftime("%Y-%m-%d")
+        if match["hour"] is not None:
+            hour, minute = int(match["hour"]), int(match["minute"] or 0)
+            if match["ampm"] == "pm" and hour < 12:
+                hour += 12
+            elif match["ampm"] == "am" and hour == 12:
+                hour = 0
+            elif not (match["ampm"] or match["minute"] or match["uhr"]) and 1 <= hour <= 12:
+                # A bare hour ("at 8") could be in the morning or evening, the next of the two today is meant
+                if day_offsets and day_offsets[0] != 0:
+                    return None
+                upcoming = [h for h in (hour % 12, hour % 12 + 12) if h and h * 60 >= now.hour * 60 + now.minute]
+                if not upcoming:
+                    return None
+                hour = upcoming[0]
+            if hour > 23 or minute > 59:
+                return None
+            time = f"{hour:02d}:{minute:02d}"
+        elif which in ("first", "earliest", "erste", "erster", "ersten"):
+            time = "00:00"
+        elif day_offsets and day_offsets[0] != 0:
+            return None  # "tomorrow" without a time is ambiguous
+        else:
+            time = now.strftime("%H:%M")
+
+        return ConnectionQuery(start, end, date, time, is_arrival_time=match["arrival"] is not None)
+
+    async def answer(self, text: str) -> Optional[str]:
+        """
+        Answers a simple connection query, or returns None if the agent has to handle the message.
+        """
+        query = self.parse(text)
+        answer = None
+        if query is not None:
+            try:
+                connections = await asyncio.to_thread(get_transport_client().get_connections, *query)
+                answer = render_connections(query, connections)
+            except Exception as e:  # E.g. no connections found, the agent can ask the user
+                logger.info("Connection fast path failed for %s: %s", query, e)
+
+        with self._lock:
+            if answer is None:
+                self.fallbacks += 1
+            else:
+                self.hits += 1
+        logger.info(
+            "Connection fast path %s, hit ratio %.0f%% of %d requests",
+            "hit" if answer else "fallback", self.hit_ratio * 100, self.hits + self.fallbacks,
+        )
+        return answer
+
+
+def render_connections(query: ConnectionQuery, connections: list[dict]) -> str:
+    """
+    Renders connections as returned by `TransportClient.get_connections` into a chat answer.
+    """
+
+    def clock(time: dict) -> str:
+        return f"{time['hour']:02d}:{time['minute']:02d}"
+
+    reference = "arriving by" if query.is_arrival_time else "departing at"
+    lines = [f"Connections from **{connections[0]['from']}** to **{connections[0]['to']}**, "
+             f"{reference} {query.time} on {query.date}:", ""]
+    for connection in connections:
+        line = f"- **{clock(connection['departure_time'])} → {clock(connection['arrival_time'])}**"
+        line += f" ({connection['duration']})"
+        if connection["departure_platform"]:
+            line += f", platform {connection['departure_platform']}"
+        if connection["departure_delay"]:
+            line += f", delayed by {connection['departure_delay']} min"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+_connection_fast_path: Optional[ConnectionFastPath] = None
+
+
+def get_connection_fast_path() -> ConnectionFastPath:
+    """
+    Returns the process-wide connection fast path.
+    """
+    global _connection_fast_path
+    if _connection_fast_path is None:
+        _connection_fast_path = ConnectionFastPath()
+    return _connection_fast_path
@@ -0,0 +1,312 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+from zoneinfo import ZoneInfo
+
+from mcp.types import CallToolResult, TextContent
+
+from aia25.core.calendar_client import CalendarEvent
+from aia25.core.transport import TRANSPORT_API_URL, get_http_session
+
+logger = logging.getLogger("chainlit")
+
+GEO_CACHE_PATH = Path(os.getenv("GEO_CACHE_PATH", ".cache/geo.sqlite"))
+PRECOMPUTE_DAYS = int(os.getenv("GEO_PRECOMPUTE_DAYS", "2"))  # Today plus the following days
+LOCAL_TIMEZONE = ZoneInfo(os.getenv("LOCAL_TIMEZONE", "Europe/Zurich"))
+
+GEOCODE_TTL = timedelta(days=30)
+TRAVEL_TIME_TTL = timedelta(days=1)
+NOMINATIM_MIN_INTERVAL = 1.0  # Seconds between two geocoding requests (Nominatim usage policy)
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+WALKING_ROUTE_URL = (
+    "https://routing.openstreetmap.de/routed-foot/route/v1/driving/{from_lon},{from_lat};{to_lon},{to_lat}"
+)
+USER_AGENT = "aia25-workshop/0.1"
+
+
+class GeocodedLocation(NamedTuple):
+    latitude: float
+    longitude: float
+    display_name: str
+
+
+def location_key(location: str) -> str:
+    """
+    Normalizes a free-text location (e.g. an appointment location spanning several lines) into a cache key.
+    """
+    return re.sub(r"[\s,]+", " ", location).strip().lower()
+
+
+def address_candidates(location: str) -> list[str]:
+    """
+    Returns the queries to try when geocoding a location, most specific first.
+    Calendar locations often start with a venue name that geocoders do not know, e.g.
+    "Der Hauptsitz\\nSpeichergasse 4, 3011 Bern", so the address without its first line is tried as well.
+    """
+    lines = [line.strip() for line in location.splitlines() if line.strip()]
+    candidates = [", ".join(lines)]
+    if len(lines) > 1:
+        candidates.append(", ".join(lines[1:]))
+    return candidates
+
+
+class GeoCache:
+    """
+    A persistent cache of geocoded locations and travel times between them, backed by SQLite.
+
+    The cache is filled in the background by `precompute_travel_times` and read by the tools before
+    they fall back to a geocoding round trip.
+    """
+
+    def __init__(self, path: Path = GEO_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(
+                """
+                PRAGMA journal_mode=WAL;
+                CREATE TABLE IF NOT EXISTS geocodes (
+                    key TEXT PRIMARY KEY,
+                    latitude REAL,
+                    longitude REAL,
+                    display_name TEXT,
+                    updated REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS travel_times (
+                    origin TEXT NOT NULL,
+                    destination TEXT NOT NULL,
+                    mode TEXT NOT NULL,
+                    minutes REAL,
+                    updated REAL NOT NULL,
+                    PRIMARY KEY (origin, destination, mode)
+                );
+                """
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get_location(self, location: str) -> tuple[bool, Optional[GeocodedLocation]]:
+        """
+        Looks up a geocoded location.
+
+        Returns:
+            A tuple of (whether a fresh entry exists, the location or None if it could not be geocoded)
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT latitude, longitude, display_name, updated FROM geocodes WHERE key = ?",
+                (location_key(location),),
+            ).fetchone()
+        if not row or time.time() - row[3] > GEOCODE_TTL.total_seconds():
+            return False, None
+        return True, GeocodedLocation(row[0], row[1], row[2]) if row[0] is not None else None
+
+    def set_location(self, location: str, geocoded: Optional[GeocodedLocation]):
+        # Failed lookups are stored as well, so they are not retried on every run. Successful ones are also
+        # stored under the bare address, which is what agents usually pass to the geocoding tool.
+        keys = {location_key(location)}
+        if geocoded:
+            keys.update(location_key(candidate) for candidate in address_candidates(location))
+        values = geocoded or (None, None, None)
+        with self._lock, self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?, ?)",
+                [(key, *values, time.time()) for key in keys],
+            )
+
+    def get_travel_minutes(self, origin: str, destination: str, mode: str) -> tuple[bool, Optional[float]]:
+        """
+        Looks up the travel time between two locations for the given mode ("walking" or "transit").
+
+        Returns:
+            A tuple of (whether a fresh entry exists, the travel time in minutes or None if unknown)
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT minutes, updated FROM travel_times WHERE origin = ? AND destination = ? AND mode = ?",
+                (location_key(origin), location_key(destination), mode),
+            ).fetchone()
+        if not row or time.time() - row[1] > TRAVEL_TIME_TTL.total_seconds():
+            return False, None
+        return True, row[0]
+
+    def set_travel_minutes(self, origin: str, destination: str, mode: str, minutes: Optional[float]):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO travel_times VALUES (?, ?, ?, ?, ?)",
+                (location_key(origin), location_key(destination), mode, minutes, time.time()),
+            )
+
+
+_geo_cache: Optional[GeoCache] = None
+
+
+def get_geo_cache() -> GeoCache:
+    """
+    Returns the process-wide geo cache.
+    """
+    global _geo_cache
+    if _geo_cache is None:
+        _geo_cache = GeoCache()
+    return _geo_cache
+
+
+_last_geocode_request = 0.0
+_geocode_throttle_lock = threading.Lock()  # Precomputations of concurrent sessions share the request interval
+
+
+def geocode(location: str) -> Optional[GeocodedLocation]:
+    """
+    Geocodes a location with Nominatim, trying the full location first and then the address only.
+    """
+    global _last_geocode_request
+    for query in address_candidates(location):
+        with _geocode_throttle_lock:
+            time.sleep(max(0.0, _last_geocode_request + NOMINATIM_MIN_INTERVAL - time.time()))
+            _last_geocode_request = time.time()
+        response = get_http_session().get(
+            NOMINATIM_URL,
+            params={"q": query, "format": "json", "limit": 1},
+            headers={"User-Agent": USER_AGENT},
+            timeout=10,
+        )
+        results = response.json() if response.status_code == 200 else []
+        if results:
+            return GeocodedLocation(float(results[0]["lat"]), float(results[0]["lon"]), results[0]["display_name"])
+    return None
+
+
+def walking_minutes(origin: GeocodedLocation, destination: GeocodedLocation) -> Optional[float]:
+    response = get_http_session().get(
+        WALKING_ROUTE_URL.format(
+            from_lon=origin.longitude, from_lat=origin.latitude,
+            to_lon=destination.longitude, to_lat=destination.latitude,
+        ),
+        params={"overview": "false"},
+        headers={"User-Agent": USER_AGENT},
+        timeout=10,
+    )
+    routes = response.json().get("routes") if response.status_code == 200 else None
+    return round(routes[0]["duration"] / 60, 1) if routes else None
+
+
+def transit_minutes(origin: str, destination: str, departure: datetime) -> Optional[float]:
+    """
+    Returns the duration of the first public transport connection leaving after `departure` (naive UTC).
+    """
+    local_departure = departure.replace(tzinfo=timezone.utc).astimezone(LOCAL_TIMEZONE)
+    response = get_http_session().get(
+        f"{TRANSPORT_API_URL}/connections",
+        params={
+            "from": address_candidates(origin)[-1],
+            "to": address_candidates(destination)[-1],
+            "date": local_departure.strftime("%Y-%m-%d"),
+            "time": local_departure.strftime("%H:%M"),
+            "limit": 1,
+        },
+        timeout=10,
+    )
+    connections = response.json().get("connections") if response.status_code == 200 else None
+    if not connections:
+        return None
+    match = re.match(r"(\d{2})d(\d{2}):(\d{2}):(\d{2})", connections[0]["duration"])
+    if not match:
+        return None
+    days, hours, minutes, _ = map(int, match.groups())
+    return float(days * 24 * 60 + hours * 60 + minutes)
+
+
+def _precompute(list_events: Callable[[datetime, datetime], list[CalendarEvent]], days: int) -> int:
+    cache = get_geo_cache()
+    today = datetime.now(timezone.utc).replace(tzinfo=None, hour=0, minute=0, second=0, microsecond=0)
+    computed = 0
+
+    for offset in range(days):
+        day_start = today + timedelta(days=offset)
+        events = sorted(list_events(day_start, day_start + timedelta(days=1)), key=lambda e: e.start)
+
+        geocoded = {}
+        for event in events:
+            if not event.location:
+                continue
+            fresh, location = cache.get_location(event.location)
+            if not fresh:
+                # A failed request is not cached, the location is retried on the next run
+                try:
+                    location = geocode(event.location)
+                except Exception as e:
+                    logger.warning(f"Geocoding {event.location!r} failed: {e}")
+                    continue
+                cache.set_location(event.location, location)
+                computed += 1
+            geocoded[event.location] = location
+
+        for previous, current in zip(events, events[1:]):
+            origin, destination = geocoded.get(previous.location), geocoded.get(current.location)
+            if not origin or not destination or location_key(previous.location) == location_key(current.location):
+                continue
+            travel_times = {
+                "walking": lambda: walking_minutes(origin, destination),
+                "transit": lambda: transit_minutes(previous.location, current.location, previous.end),
+            }
+            for mode, compute in travel_times.items():
+                if cache.get_travel_minutes(previous.location, current.location, mode)[0]:
+                    continue
+                try:
+                    minutes = compute()
+                except Exception as e:
+                    logger.warning(f"Computing the {mode} time to {current.location!r} failed: {e}")
+                    continue
+                cache.set_travel_minutes(previous.location, current.location, mode, minutes)
+                computed += 1
+
+    return computed
+
+
+async def precompute_travel_times(
+    list_events: Callable[[datetime, datetime], list[CalendarEvent]], days: int = PRECOMPUTE_DAYS
+) -> int:
+    """
+    Geocodes the locations of the upcoming appointments and precomputes walking and public transport times
+    between consecutive appointments, in a background thread. Cached results are not requested again.
+    Locations or routes that fail are logged and skipped, the others are still computed.
+
+    Args:
+        list_events: A function returning the events in a time range, e.g. `CalendarStore.list_events`
+        days: Number of days to precompute, starting today
+
+    Returns:
+        The number of newly computed cache entries
+    """
+    try:
+        computed = await asyncio.to_thread(_precompute, list_events, days)
+    except Exception as e:
+        logger.warning(f"Precomputing travel times failed: {e}")
+        return 0
+    logger.info(f"Precomputed {computed} geocoding and travel time entries")
+    return computed
+
+
+def cached_tool_result(tool_name: str, arguments: Optional[dict]) -> Optional[CallToolResult]:
+    """
+    Answers an OpenStreetMap MCP geocoding call from the geo cache, if possible.
+    This saves the MCP round trip for locations that were already geocoded in the background.
+    """
+    if tool_name != "geocode_address" or not arguments or not arguments.get("address"):
+        return None
+    fresh, location = get_geo_cache().get_location(arguments["address"])
+    if not fresh or location is None:
+        return None
+    result = [{"display_name": location.display_name, "lat": location.latitude, "lon": location.longitude}]
+    return CallToolResult(content=[TextContent(type="text", text=json.dumps(result))])
@@ -0,0 +1,214 @@
+import asyncio
+import functools
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+import chainlit as cl
+from agents import (
+    Agent,
+    GuardrailFunctionOutput,
+    InputGuardrailTripwireTriggered,
+    RunContextWrapper,
+    RunResult,
+    TResponseInputItem,
+)
+
+from aia25.core.context import GlobalContext
+from aia25.core.streaming import TokenStream, run_agent
+from aia25.core.topic_classifier import TopicVerdict, get_topic_classifier, is_simple_message, normalize_text
+
+# "concurrent" runs the input guardrails next to the agent, "blocking" leaves them to the SDK
+GUARDRAIL_MODE = os.getenv("GUARDRAIL_MODE", "concurrent")
+GUARDRAIL_CONTEXT_TURNS = int(os.getenv("GUARDRAIL_CONTEXT_TURNS", "2"))  # Earlier user messages shown as context
+GUARDRAIL_MAX_MESSAGE_CHARS = 500  # Longer messages are truncated in the guardrail window
+GUARDRAIL_CACHE_SIZE = 4096  # Verdicts kept in the process-wide cache
+GUARDRAIL_SESSION_CACHE_SIZE = 256  # Verdicts kept per Chainlit session
+
+
+def user_messages(input: str | list[TResponseInputItem]) -> list[str]:
+    """
+    Returns the text of all user messages of a run input, oldest first.
+    """
+    if isinstance(input, str):
+        return [input]
+
+    messages = []
+    for item in input:
+        if not isinstance(item, dict) or item.get("role") != "user":
+            continue
+        content = item.get("content")
+        if isinstance(content, list):  # Content parts, e.g. [{"type": "input_text", "text": "..."}]
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        messages.append(content or "")
+    return messages
+
+
+def guardrail_window(
+    input: str | list[TResponseInputItem], context_turns: int = GUARDRAIL_CONTEXT_TURNS
+) -> list[TResponseInputItem]:
+    """
+    Reduces a run input to what an input guardrail has to judge: the newest user message and up to
+    `context_turns` earlier user messages as context. Assistant messages and tool outputs are dropped and
+    long messages are truncated, so the guardrail prompt does not grow with the conversation.
+    """
+    messages = user_messages(input)[-(context_turns + 1):]
+    return [{"role": "user", "content": message[:GUARDRAIL_MAX_MESSAGE_CHARS]} for message in messages]
+
+
+class GuardrailVerdictCache:
+    """
+    Remembers guardrail verdicts by a hash of the normalized guardrail window.
+
+    Verdicts are kept per session, so a session never re-judges a window it has already seen, and in a
+    process-wide LRU cache, so common messages are judged once for all users.
+    """
+
+    def __init__(self, size: int = GUARDRAIL_CACHE_SIZE, session_size: int = GUARDRAIL_SESSION_CACHE_SIZE):
+        self.size = size
+        self.session_size = session_size
+        self._verdicts: OrderedDict[str, GuardrailFunctionOutput] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(guardrail_name: str, window: list[TResponseInputItem]) -> str:
+        text = "\n".join(normalize_text(message) for message in user_messages(window))
+        return hashlib.sha256(f"{guardrail_name}\n{text}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _session_verdicts() -> Optional[OrderedDict]:
+        try:
+            verdicts = cl.user_session.get("guardrail_verdicts")
+            if verdicts is None:
+                verdicts = OrderedDict()
+                cl.user_session.set("guardrail_verdicts", verdicts)
+            return verdicts
+        except Exception:  # Not running inside a Chainlit session (e.g. scripts)
+            return None
+
+    def get(self, key: str) -> Optional[GuardrailFunctionOutput]:
+        session_verdicts = self._session_verdicts()
+        verdict = session_verdicts.get(key) if session_verdicts is not None else None
+        with self._lock:
+            if verdict is None and key in self._verdicts:
+                self._verdicts.move_to_end(key)
+                verdict = self._verdicts[key]
+            if verdict is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return verdict
+
+    def put(self, key: str, verdict: GuardrailFunctionOutput):
+        session_verdicts = self._session_verdicts()
+        if session_verdicts is not None:
+            session_verdicts[key] = verdict
+            while len(session_verdicts) > self.session_size:
+                session_verdicts.popitem(last=False)
+        with self._lock:
+            self._verdicts[key] = verdict
+            self._verdicts.move_to_end(key)
+            while len(self._verdicts) > self.size:
+                self._verdicts.popitem(last=False)
+
+
+guardrail_verdicts = GuardrailVerdictCache()
+
+
+def windowed_guardrail(
+    func: Callable[[RunContextWrapper, Agent, list[TResponseInputItem]], Awaitable[GuardrailFunctionOutput]],
+):
+    """
+    Decorator for input guardrail functions, to be applied below `@input_guardrail`.
+
+    The guardrail function only receives the `guardrail_window` of the input and its verdicts are memoized in
+    `guardrail_verdicts`, so already judged messages are not sent to the model again.
+    """
+
+    @functools.wraps(func)
+    async def wrapper(
+        ctx: RunContextWrapper, agent: Agent, input: str | list[TResponseInputItem]
+    ) -> GuardrailFunctionOutput:
+        window = guardrail_window(input)
+        key = GuardrailVerdictCache.key(func.__name__, window)
+        verdict = guardrail_verdicts.get(key)
+        if verdict is None:
+            verdict = await func(ctx, agent, window)
+            guardrail_verdicts.put(key, verdict)
+        return verdict
+
+    return wrapper
+
+
+def classify_topic_locally(input: str | list[TResponseInputItem]) -> TopicVerdict:
+    """
+    Classifies the newest user message with the local topic classifier.
+
+    Only short, single-sentence messages are decided locally, a longer one can append an off-topic request to an
+    on-topic question. Off-topic verdicts are also only trusted for the first message of a conversation, follow-ups
+    such as "and the one after that?" can only be judged together with the earlier turns.
+
+    Returns:
+        The verdict, `is_relevant` is None if the message has to be escalated to the LLM guardrail
+    """
+    messages = user_messages(input)
+    message = messages[-1] if messages else ""
+    verdict = get_topic_classifier().classify(message)
+    if not is_simple_message(message) or (verdict.is_relevant is False and len(messages) > 1):
+        return TopicVerdict(None, verdict.probability)
+    return verdict
+
+
+async def run_guarded(
+    starting_agent: Agent,
+    input: str | list[TResponseInputItem],
+    context: Any = None,
+    stream: Optional[TokenStream] = None,
+    **kwargs,
+) -> RunResult:
+    """
+    Runs an agent whose input guardrails are checked concurrently with the whole run.
+
+    The SDK only overlaps the guardrails with the first model call and still waits for them before the
+    second turn. Here the agent keeps working while the guardrail verdict is pending. Tools with side effects
+    wait until the guardrails have passed (see `GlobalContext.side_effects_allowed`). If a tripwire fires, the
+    run is cancelled and `InputGuardrailTripwireTriggered` is raised, exactly like with `Runner.run`.
+
+    Args:
+        starting_agent: The agent to run, its `input_guardrails` are checked concurrently
+        input: The input of the run
+        context: The run context, side effects are only held back for a `GlobalContext`
+        stream: Where to stream the answer to, tokens are held back until the guardrails have passed
+        **kwargs: Passed on to `Runner.run` or `Runner.run_streamed`
+
+    Returns:
+        The result of the run
+    """
+    guardrails = starting_agent.input_guardrails
+    if GUARDRAIL_MODE != "concurrent" or not guardrails:
+        return await run_agent(starting_agent, input, context=context, stream=stream, **kwargs)
+
+    if isinstance(context, GlobalContext):
+        context.hold_side_effects()
+
+    run_task = asyncio.create_task(
+        run_agent(starting_agent.clone(input_guardrails=[]), input, context=context, stream=stream, **kwargs)
+    )
+    try:
+        context_wrapper = RunContextWrapper(context=context)
+        results = await asyncio.gather(*(g.run(starting_agent, input, context_wrapper) for g in guardrails))
+        tripped = next((r for r in results if r.output.tripwire_triggered), None)
+        if tripped:
+            raise InputGuardrailTripwireTriggered(tripped)
+    except BaseException:
+        run_task.cancel()
+        await asyncio.gather(run_task, return_exceptions=True)
+        raise
+
+    if isinstance(context, GlobalContext):
+        context.release_side_effects()
+    return await run_task
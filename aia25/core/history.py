@@ -0,0 +1,175 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Optional
+
+import chainlit as cl
+from agents import Agent, TResponseInputItem
+
+from aia25.core.model_routing import apply_model_routing
+from aia25.core.streaming import run_agent
+
+HISTORY_KEEP_TURNS = int(os.getenv("HISTORY_KEEP_TURNS", "6"))  # Most recent turns that are kept verbatim
+HISTORY_SUMMARY_THRESHOLD = int(os.getenv("HISTORY_SUMMARY_THRESHOLD", "6000"))  # Estimated tokens
+TOOL_OUTPUT_MAX_CHARS = 400  # Longer tool outputs of older turns are replaced by a reference
+
+logger = logging.getLogger("chainlit")
+
+summarizer_agent = Agent(
+    name="History Summarizer",
+    instructions=(
+        "Summarize the earlier part of a conversation between a user and a trip planning assistant. Keep every "
+        "fact the assistant may need later: places, stations, dates, times, appointment names, the connections "
+        "that were recommended and the user's preferences. Write at most a few short paragraphs."
+    ),
+)
+
+apply_model_routing(summarizer_agent)
+
+
+def estimate_tokens(items: list[TResponseInputItem]) -> int:
+    """
+    Estimates the number of prompt tokens of input items, about four characters per token.
+    """
+    return sum(len(json.dumps(item, default=str)) for item in items) // 4
+
+
+def split_turns(items: list[TResponseInputItem]) -> tuple[list[TResponseInputItem], list[list[TResponseInputItem]]]:
+    """
+    Splits a history into the items before the first user message (e.g. a summary) and the turns, each
+    starting with a user message and containing everything the assistant did to answer it.
+    """
+    preface: list[TResponseInputItem] = []
+    turns: list[list[TResponseInputItem]] = []
+    for item in items:
+        if isinstance(item, dict) and item.get("role") == "user":
+            turns.append([item])
+        elif turns:
+            turns[-1].append(item)
+        else:
+            preface.append(item)
+    return preface, turns
+
+
+def _elide_tool_outputs(items: list[TResponseInputItem]) -> list[TResponseInputItem]:
+    tool_names = {item.get("call_id"): item.get("name") for item in items if item.get("type") == "function_call"}
+    elided = []
+    for item in items:
+        output = item.get("output") if item.get("type") == "function_call_output" else None
+        if isinstance(output, str) and len(output) > TOOL_OUTPUT_MAX_CHARS:
+            name = tool_names.get(item.get("call_id"), "tool")
+            item = {**item, "output": f"[Output of {name} from an earlier turn omitted, {len(output)} characters]"}
+        elided.append(item)
+    return elided
+
+
+def compact_history(
+    history: list[TResponseInputItem], keep_turns: int = HISTORY_KEEP_TURNS
+) -> list[TResponseInputItem]:
+    """
+    Keeps the last `keep_turns` turns verbatim and replaces bulky tool outputs of older turns by short references,
+    so the prompt size of a request stays bounded. Older turns are summarized by `schedule_history_summary`.
+
+    Args:
+        history: The conversation history as stored in the session
+        keep_turns: The number of most recent turns (user message and everything answering it) kept verbatim
+
+    Returns:
+        The compacted history
+    """
+    preface, turns = split_turns(history)
+    if len(turns) <= keep_turns:
+        return list(history)
+
+    older, recent = turns[: len(turns) - keep_turns], turns[len(turns) - keep_turns :]
+    compacted = list(preface)
+    for turn in older:
+        compacted.extend(_elide_tool_outputs(turn))
+    for turn in recent:
+        compacted.extend(turn)
+    return compacted
+
+
+def _render(items: list[TResponseInputItem]) -> str:
+    lines = []
+    for item in items:
+        if item.get("type") == "function_call":
+            lines.append(f"Tool call: {item.get('name')}({item.get('arguments')})")
+        elif item.get("type") == "function_call_output":
+            lines.append(f"Tool output: {str(item.get('output'))[:TOOL_OUTPUT_MAX_CHARS]}")
+        else:
+            content = item.get("content")
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+            lines.append(f"{str(item.get('role', 'assistant')).capitalize()}: {content}")
+    return "\n".join(lines)
+
+
+def apply_summary(
+    history: list[TResponseInputItem], summarized: list[TResponseInputItem], summary: TResponseInputItem
+) -> Optional[list[TResponseInputItem]]:
+    """
+    Replaces the summarized items at the start of a history by their summary.
+
+    Tool outputs are compared as `compact_history` leaves them, since a request that started before the summary
+    was written compacts the same turns on its own.
+
+    Returns:
+        The history starting with the summary, or None if it does not start with the summarized items
+    """
+    prefix = history[: len(summarized)]
+    if len(prefix) < len(summarized) or _elide_tool_outputs(prefix) != _elide_tool_outputs(summarized):
+        return None
+    return [summary] + history[len(summarized) :]
+
+
+def merge_history_summary(history: list[TResponseInputItem]) -> list[TResponseInputItem]:
+    """
+    Applies the session's latest history summary to a history about to be stored, if it still starts with the
+    summarized turns. A request that was running while the summary was written stores the history it started
+    with, without this its summary would be lost.
+    """
+    summarized, summary = cl.user_session.get("history_summary_result") or ([], None)
+    if summary is None:
+        return history
+    return apply_summary(history, summarized, summary) or history
+
+
+async def _summarize_history(items: list[TResponseInputItem]):
+    try:
+        result = await run_agent(summarizer_agent, _render(items))
+    except Exception as e:
+        logger.warning("Could not summarize the conversation history: %s", e)
+        return
+
+    # The summary is kept, so it is also applied to the history of a request that is still running
+    summary = {"role": "system", "content": f"Summary of the earlier conversation:\n{result.final_output}"}
+    cl.user_session.set("history_summary_result", (items, summary))
+    cl.user_session.set("history", merge_history_summary(cl.user_session.get("history") or []))
+
+
+def schedule_history_summary(
+    keep_turns: int = HISTORY_KEEP_TURNS, threshold: int = HISTORY_SUMMARY_THRESHOLD
+) -> Any:
+    """
+    Summarizes the older turns of the session's history in the background once it exceeds `threshold` tokens.
+    The previous summary and all turns but the last `keep_turns` are replaced by a new summary.
+
+    Returns:
+        The summary task, or None if no summary is needed or one is already being written
+    """
+    history = cl.user_session.get("history") or []
+    running = cl.user_session.get("history_summary")
+    if estimate_tokens(history) <= threshold or (running and not running.done()):
+        return None
+
+    preface, turns = split_turns(history)
+    older_turns = len(turns) - keep_turns
+    if older_turns <= 0:
+        return None
+
+    items = preface + [item for turn in turns[:older_turns] for item in turn]
+    task = asyncio.create_task(_summarize_history(items))
+    cl.user_session.set("history_summary", task)
+    return task
@@ -0,0 +1,177 @@
+import asyncio
+import logging
+import os
+import time
+import tomllib
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from agents import Agent, Model, ModelSettings, OpenAIProvider
+
+MODEL_CONFIG_PATH = Path(os.getenv("MODEL_CONFIG", Path(__file__).resolve().parents[2] / "models.toml"))
+FALLBACK_COOLDOWN = 60  # Seconds an agent keeps using its fallback model after exceeding its latency budget
+
+logger = logging.getLogger("chainlit")
+
+
+class AgentModelConfig(NamedTuple):
+    model: Optional[str] = None  # Model name or tier, None for the default model (OPENAI_DEFAULT_MODEL)
+    max_tokens: Optional[int] = None  # Cap on the tokens generated per model call
+    latency_budget: Optional[float] = None  # Seconds a model call may take before the fallback model is used
+    fallback_model: Optional[str] = None  # Model name or tier, None for the default model
+    parallel_tool_calls: Optional[bool] = None  # Whether the model may request several tool calls per turn
+
+
+class ModelConfig(NamedTuple):
+    tiers: dict[str, Optional[str]]
+    default: AgentModelConfig
+    agents: dict[str, AgentModelConfig]  # By lowercased agent name
+
+    def for_agent(self, name: str) -> AgentModelConfig:
+        return self.agents.get(name.lower(), self.default)
+
+    def resolve(self, model: Optional[str]) -> Optional[str]:
+        """
+        Resolves a tier to its model name. Tiers whose environment variable is not set resolve to None.
+        """
+        return self.tiers.get(model, model) if model else None
+
+    def effective(self, model: Optional[str]) -> Optional[str]:
+        """
+        Returns the model name a model or tier is served by, taking the default model into account.
+        """
+        return self.resolve(model) or os.getenv("OPENAI_DEFAULT_MODEL")
+
+
+def load_model_config(path: Path = MODEL_CONFIG_PATH) -> ModelConfig:
+    """
+    Loads the per-agent model configuration from a TOML file, see `models.toml` in the repository root.
+    A missing file results in an empty configuration, i.e. all agents use the default model.
+    """
+    if not path.exists():
+        return ModelConfig(tiers={}, default=AgentModelConfig(), agents={})
+
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+
+    tiers = {}
+    for tier, value in data.get("tiers", {}).items():
+        expanded = os.path.expandvars(value)
+        tiers[tier] = expanded if expanded and "$" not in expanded else None
+
+    default = AgentModelConfig(**data.get("default", {}))
+    agents = {
+        name.lower(): default._replace(**values) for name, values in data.get("agents", {}).items()
+    }
+    return ModelConfig(tiers=tiers, default=default, agents=agents)
+
+
+class LatencyBudgetModel(Model):
+    """
+    A model that falls back to a faster model when the primary model exceeds a latency budget.
+
+    If the primary model has not answered within the budget, the same request is sent to the fallback model
+    and the first answer wins. Streamed requests are switched to the fallback model if the primary model has not
+    sent its first event within the budget, since two streams cannot be merged. For `FALLBACK_COOLDOWN` seconds
+    afterwards, requests go to the fallback model directly, so a slow provider does not cost the budget on every
+    call.
+    """
+
+    def __init__(self, primary: Model, fallback: Model, budget: float, name: str = ""):
+        self.primary = primary
+        self.fallback = fallback
+        self.budget = budget
+        self.name = name
+        self._slow_until = 0.0
+
+    async def get_response(self, *args, **kwargs) -> Any:
+        if time.monotonic() < self._slow_until:
+            return await self.fallback.get_response(*args, **kwargs)
+
+        primary = asyncio.create_task(self.primary.get_response(*args, **kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=self.budget)
+        if done:
+            return primary.result()
+
+        logger.warning("%s exceeded its latency budget of %.1fs, asking the fallback model", self.name, self.budget)
+        self._slow_until = time.monotonic() + FALLBACK_COOLDOWN
+        fallback = asyncio.create_task(self.fallback.get_response(*args, **kwargs))
+        try:
+            error: Optional[BaseException] = None
+            for next_done in asyncio.as_completed({primary, fallback}):
+                try:
+                    return await next_done
+                except Exception as e:  # Still wait for the other model
+                    error = e
+            raise error
+        finally:
+            primary.cancel()
+            fallback.cancel()
+
+    async def stream_response(self, *args, **kwargs):
+        if time.monotonic() < self._slow_until:
+            async for event in self.fallback.stream_response(*args, **kwargs):
+                yield event
+            return
+
+        primary = self.primary.stream_response(*args, **kwargs)
+        try:
+            async with asyncio.timeout(self.budget):
+                first = await anext(primary)
+        except StopAsyncIteration:
+            return
+        except TimeoutError:
+            logger.warning(
+                "%s exceeded its latency budget of %.1fs, streaming from the fallback model", self.name, self.budget
+            )
+            self._slow_until = time.monotonic() + FALLBACK_COOLDOWN
+            await primary.aclose()
+            async for event in self.fallback.stream_response(*args, **kwargs):
+                yield event
+            return
+
+        yield first
+        async for event in primary:
+            yield event
+
+
+_model_config: Optional[ModelConfig] = None
+_provider: Optional[OpenAIProvider] = None
+
+
+def get_model_config() -> ModelConfig:
+    """
+    Returns the process-wide model configuration.
+    """
+    global _model_config
+    if _model_config is None:
+        _model_config = load_model_config()
+    return _model_config
+
+
+def apply_model_routing(*agents: Agent):
+    """
+    Configures the model, the `max_tokens` cap, parallel tool calls and the latency budget of agents from the
+    model configuration. Agents are matched by name (case-insensitive), agents without an entry get the
+    `[default]` settings.
+    """
+    global _provider
+    config = get_model_config()
+    for agent in agents:
+        entry = config.for_agent(agent.name)
+        if entry.max_tokens:
+            agent.model_settings = agent.model_settings.resolve(ModelSettings(max_tokens=entry.max_tokens))
+        if entry.parallel_tool_calls is not None and (agent.tools or agent.mcp_servers):
+            agent.model_settings = agent.model_settings.resolve(
+                ModelSettings(parallel_tool_calls=entry.parallel_tool_calls)
+            )
+
+        model, fallback = config.resolve(entry.model), config.resolve(entry.fallback_model)
+        # Without a distinct fallback (e.g. OPENAI_SMALL_MODEL unset), the budget would resend to the same model
+        if entry.latency_budget and config.effective(entry.model) != config.effective(entry.fallback_model):
+            _provider = _provider or OpenAIProvider()
+            agent.model = LatencyBudgetModel(
+                _provider.get_model(model), _provider.get_model(fallback), entry.latency_budget, name=agent.name
+            )
+        elif model:
+            agent.model = model
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from textwrap import dedent
+from typing import Any, Optional
+
+import chainlit as cl
+from agents import Agent, InputGuardrail, TResponseInputItem
+from pydantic import BaseModel
+
+from aia25.core.agent_tools import context_message
+from aia25.core.context import GlobalContext
+from aia25.core.deadline import DEADLINE_RESERVE, bounded_timeout, time_left
+from aia25.core.guardrails import run_guarded
+from aia25.core.model_routing import apply_model_routing
+from aia25.core.streaming import TokenStream, run_agent
+from aia25.core.tools import list_appointments
+from aia25.core.transport import get_transport_client
+
+AGENT_MODE = "agent"  # The triage agent decides which sub-agents to call, one after the other
+PIPELINE_MODE = "pipeline"  # Extract the trip, gather all data in parallel, answer with one model call
+EXECUTION_MODES = [AGENT_MODE, PIPELINE_MODE]
+
+logger = logging.getLogger("chainlit")
+
+
+class TripParameters(BaseModel):
+    is_trip_request: bool  # False if the message is not about a concrete trip, the agent mode handles it then
+    start: Optional[str] = None  # Departure station or address
+    end: Optional[str] = None  # Arrival station or address
+    date: str = ""  # YYYY-MM-DD
+    time: str = ""  # HH:MM
+    is_arrival_time: bool = False
+    location_question: Optional[str] = None  # A question about places or directions, if the user asked one
+
+
+extraction_agent_system_prompt = dedent(
+    """
+    You extract the parameters of a trip from the conversation with a user of a trip planning assistant.
+    Only the last user message asks something new, earlier messages are context. The current date and time
+    are given in a context message after the conversation.
+
+    - Set "is_trip_request" to true only if the user wants to travel between two places and both can be
+      determined from the conversation. Otherwise set it to false and leave the other fields empty.
+    - Resolve relative dates and times ("tomorrow", "tonight") to YYYY-MM-DD and HH:MM. Without a given
+      time, use the current time. Set "is_arrival_time" if the user has to be somewhere at that time.
+    - Set "location_question" only if the user also asks about places, e.g. restaurants near the destination,
+      or about walking directions. Phrase it as a self-contained question.
+    """
+)
+
+
+extraction_agent = Agent(
+    name="Trip Extraction Agent",
+    instructions=extraction_agent_system_prompt,
+    output_type=TripParameters,
+)
+
+
+synthesis_agent_system_prompt = """
+You are a smart assistant that helps users plan their trips based on public transport
+schedules, their calendar appointments, and other relevant information.
+
+The last message contains the data gathered for the user's request: the public transport
+connections, the user's appointments on the travel date and, if requested, location information.
+Use only this data. Recommend the connection that best fits the appointments (avoid conflicts,
+keep a buffer of at least 15 minutes, prefer short journeys with few transfers) and explain why.
+If some data could not be retrieved, say so briefly.
+
+When referring to an appointment, always mention the name of the appointment.
+Answer in a friendly and helpful manner.
+"""
+
+synthesis_agent = Agent(
+    name="Trip Synthesis Agent",
+    instructions=synthesis_agent_system_prompt,
+)
+
+apply_model_routing(extraction_agent, synthesis_agent)
+
+
+@cl.step(type="tool", name="gather_trip_data")
+async def gather_trip_data(
+    trip: TripParameters,
+    context: GlobalContext,
+    default_calendar_path: Path,
+    location_agent: Optional[Agent] = None,
+) -> dict[str, Any]:
+    """
+    Fetches the connections, the appointments on the travel date and the location information concurrently.
+    Failures are reported in the returned data instead of failing the whole request.
+    """
+
+    async def locations() -> Optional[str]:
+        if location_agent is None or not trip.location_question:
+            return None
+        # Stopped before the deadline, so the answer can still be synthesized from the other data
+        async with asyncio.timeout(time_left(context.deadline, DEADLINE_RESERVE)):
+            result = await run_agent(location_agent, trip.location_question, context=context)
+        return str(result.final_output)
+
+    connections, appointments, location_info = await asyncio.gather(
+        asyncio.to_thread(
+            get_transport_client().get_connections,
+            trip.start,
+            trip.end,
+            trip.date,
+            trip.time,
+            trip.is_arrival_time,
+            bounded_timeout(15, context.deadline),
+        ),
+        asyncio.to_thread(list_appointments, context, default_calendar_path, trip.date),
+        locations(),
+        return_exceptions=True,
+    )
+
+    def describe(value: Any) -> Any:
+        if isinstance(value, BaseException):
+            logger.warning("Pipeline data source failed: %s", value)
+            return f"Not available ({value})"
+        if isinstance(value, list):
+            return [v.model_dump(mode="json") if isinstance(v, BaseModel) else v for v in value]
+        return value
+
+    data = {
+        "trip": trip.model_dump(),
+        "connections": describe(connections),
+        "appointments": describe(appointments),
+    }
+    if trip.location_question:
+        data["location_information"] = describe(location_info)
+    return data
+
+
+async def run_pipeline(
+    input: list[TResponseInputItem],
+    context: GlobalContext,
+    default_calendar_path: Path,
+    location_agent: Optional[Agent] = None,
+    input_guardrails: Optional[list[InputGuardrail]] = None,
+    stream: Optional[TokenStream] = None,
+) -> Optional[tuple[Any, list[TResponseInputItem]]]:
+    """
+    Answers a trip request with a fixed pipeline instead of the triage agent's sequential tool calls.
+
+    A structured extraction call determines the trip, then connections, appointments and (optionally)
+    location information are gathered concurrently, and a single synthesis call writes the answer.
+
+    Args:
+        input: The conversation including the new user message
+        context: The run context
+        default_calendar_path: The exercise's example calendar, used if the user has none
+        location_agent: Agent answering `location_question`, e.g. the OpenStreetMap agent
+        input_guardrails: Guardrails checked concurrently with the extraction, as in `run_guarded`
+        stream: Where to stream the synthesized answer to
+
+    Returns:
+        The response and the updated history, or None if the request is not a trip and needs the agent mode
+    """
+    extractor = extraction_agent.clone(input_guardrails=input_guardrails or [])
+    message = context_message(context)
+    extraction = await run_guarded(extractor, input + ([message] if message else []), context=context)
+    trip = extraction.final_output
+    if not isinstance(trip, TripParameters):
+        # The request deadline passed or a clarification was requested, the answer is the partial one or the question
+        return trip, input + [{"role": "assistant", "content": trip}]
+    if not trip.is_trip_request or not trip.start or not trip.end:
+        return None
+
+    trip.date = trip.date or context.current_date
+    trip.time = trip.time or context.current_time[:5]
+
+    data = await gather_trip_data(trip, context, default_calendar_path, location_agent)
+    data_message = {"role": "user", "content": f"Gathered data:\n{json.dumps(data, indent=1, default=str)}"}
+    result = await run_agent(synthesis_agent, input + [data_message], context=context, stream=stream)
+
+    # The gathered data is not kept in the history, later turns would carry it along forever
+    return result.final_output, input + [{"role": "assistant", "content": result.final_output}]
@@ -0,0 +1,75 @@
+import inspect
+import os
+import re
+from typing import Any
+
+from agents import Agent, ModelSettings
+from openai.types.shared import Reasoning
+
+TOOL_PLANNING = "tool"  # Agents plan with the `think` tool, one extra model round trip per plan
+INLINE_PLANNING = "inline"  # Agents plan in the text of the same turn in which they call the tools
+NATIVE_PLANNING = "native"  # Agents plan in the provider's reasoning, enabled with `reasoning_effort`
+PLANNING_MODES = [TOOL_PLANNING, INLINE_PLANNING, NATIVE_PLANNING]
+
+PLANNING_MODE = os.getenv("PLANNING_MODE", TOOL_PLANNING)
+REASONING_EFFORT = os.getenv("REASONING_EFFORT", "low")  # Used by the native planning mode
+
+PLANNING_NOTES = {
+    INLINE_PLANNING: (
+        "\n\nThere is no separate planning tool. If a request needs several steps, write a short plan in one or "
+        "two sentences and call the tools for the first step in the same response. Never answer with a plan only."
+    ),
+    NATIVE_PLANNING: (
+        "\n\nThere is no separate planning tool. Plan in your reasoning and call the tools directly."
+    ),
+}
+
+# Prompt lines that only make sense with the `think` tool
+_THINK_INSTRUCTIONS = [
+    re.compile(r"^\s*- think:.*\n", re.MULTILINE),
+    re.compile(r"\s*Whenever you plan something, immediately follow up with the plan before answering the question\."),
+]
+
+
+def strip_think_instructions(instructions: str) -> str:
+    for pattern in _THINK_INSTRUCTIONS:
+        instructions = pattern.sub("", instructions)
+    return instructions
+
+
+def _planning_instructions(instructions: Any, note: str) -> Any:
+    if not callable(instructions):
+        return strip_think_instructions(instructions or "") + note
+
+    async def dynamic_instructions(context, agent):
+        text = instructions(context, agent)
+        if inspect.isawaitable(text):
+            text = await text
+        return strip_think_instructions(text) + note
+
+    return dynamic_instructions
+
+
+def apply_planning_mode(*agents: Agent, mode: str = PLANNING_MODE):
+    """
+    Configures how agents plan their tool calls.
+
+    In the default tool mode nothing changes. The inline and native modes remove the `think` tool, which costs a
+    full model round trip and returns its input unchanged, together with the prompt lines that refer to it.
+    Agents then plan in the text of the turn that calls the tools, or in the provider's native reasoning.
+
+    Args:
+        agents: The agents to configure
+        mode: One of PLANNING_MODES, defaults to the PLANNING_MODE environment variable
+    """
+    if mode not in PLANNING_MODES:
+        raise ValueError(f"Unknown planning mode {mode!r}, expected one of {PLANNING_MODES}")
+    if mode == TOOL_PLANNING:
+        return
+
+    for agent in agents:
+        agent.tools = [tool for tool in agent.tools if getattr(tool, "name", None) != "think"]
+        agent.instructions = _planning_instructions(agent.instructions, PLANNING_NOTES[mode])
+        if mode == NATIVE_PLANNING:
+            reasoning = ModelSettings(reasoning=Reasoning(effort=REASONING_EFFORT))
+            agent.model_settings = agent.model_settings.resolve(reasoning)
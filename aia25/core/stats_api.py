@@ -0,0 +1,68 @@
+import os
+
+from fastapi import APIRouter, FastAPI, HTTPException
+from fastapi.responses import JSONResponse
+
+from aia25.core.agent_tools import agent_tool_cache
+from aia25.core.answer_cache import answer_cache
+from aia25.core.fast_path import get_connection_fast_path
+from aia25.core.streaming import time_to_first_token
+from aia25.core.usage import usage
+from aia25.core.warmup import readiness
+
+# The usage of single sessions is only served if enabled, the routes are not authenticated
+STATS_SESSION_ROUTE = os.getenv("STATS_SESSION_ROUTE", "").lower() == "true"
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+session_router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("")
+async def process_stats() -> dict:
+    """
+    Returns the token and latency accounting of the whole process.
+    """
+    return {
+        "usage": usage.stats(),
+        "time_to_first_token": time_to_first_token.summary(),
+        "agent_tool_cache": agent_tool_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "connection_fast_path": get_connection_fast_path().stats(),
+    }
+
+
+@router.get("/readiness")
+async def readiness_status() -> JSONResponse:
+    """
+    Returns the warm-up status of the components, with status code 503 until all of them are ready.
+    """
+    status = readiness.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+@session_router.get("/sessions/{session_id}")
+async def session_stats(session_id: str) -> dict:
+    """
+    Returns the token and latency accounting of a single session.
+    """
+    stats = usage.stats(session_id)
+    if stats is None:
+        raise HTTPException(status_code=404, detail=f"No usage recorded for session {session_id}")
+    return {"usage": stats}
+
+
+def register_stats_routes(app: FastAPI):
+    """
+    Adds the stats routes to the Chainlit server.
+
+    Chainlit serves its frontend from a catch-all route, so the stats routes are moved in front of it.
+    The route with the usage of a single session is only added if STATS_SESSION_ROUTE is set.
+    """
+    app.include_router(router)
+    if STATS_SESSION_ROUTE:
+        app.include_router(session_router)
+    routes = app.router.routes
+    stats_routes = [route for route in routes if getattr(route, "path", "").startswith(router.prefix)]
+    for route in stats_routes:
+        routes.remove(route)
+    routes[0:0] = stats_routes
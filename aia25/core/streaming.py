@@ -0,0 +1,183 @@
+import asyncio
+import logging
+import statistics
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import replace
+from typing import Any, Optional
+
+import chainlit as cl
+from agents import (
+    Agent,
+    ItemHelpers,
+    ModelSettings,
+    RawResponsesStreamEvent,
+    RunConfig,
+    Runner,
+    RunResult,
+    RunResultStreaming,
+    TResponseInputItem,
+)
+
+from aia25.core.clarification import ClarificationRequested, SuspendedRun
+from aia25.core.context import GlobalContext
+from aia25.core.deadline import TIMEOUT_ANSWER, PartialRun, time_left
+from aia25.core.usage import usage, usage_hooks
+
+TTFT_WINDOW = 1000  # Number of recent requests the time-to-first-token statistics are computed over
+
+logger = logging.getLogger("chainlit")
+
+_nested_run: ContextVar[bool] = ContextVar("nested_run", default=False)  # Set while a run (e.g. a sub-agent) runs
+
+
+class LatencyStats:
+    """
+    Rolling statistics over the most recent latency samples of the process.
+    """
+
+    def __init__(self, window: int = TTFT_WINDOW):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def summary(self) -> dict:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {"count": 0}
+        return {
+            "count": len(samples),
+            "mean": statistics.fmean(samples),
+            "p50": samples[len(samples) // 2],
+            "p95": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        }
+
+
+time_to_first_token = LatencyStats()
+
+
+class TokenStream:
+    """
+    Streams the answer of a run into a Chainlit message as it is generated and measures the time to first token,
+    counted from the creation of the stream, i.e. from when the user's message was received.
+    """
+
+    def __init__(self, message: cl.Message):
+        self.message = message
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+
+    @property
+    def time_to_first_token(self) -> Optional[float]:
+        return self.first_token_at - self.started if self.first_token_at is not None else None
+
+    async def send_token(self, token: str):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            time_to_first_token.record(self.time_to_first_token)
+            logger.info("Time to first token: %.2fs", self.time_to_first_token)
+        await self.message.stream_token(token)
+
+    async def finish(self, content: Any):
+        """
+        Replaces the streamed text by the final answer and completes the message.
+        """
+        self.message.content = str(content) if content is not None else ""
+        await self.message.send()
+
+
+async def stream_run(result: RunResultStreaming, stream: TokenStream, context: Any = None):
+    """
+    Forwards the text deltas of a streamed run to a `TokenStream` until the run is complete.
+
+    Tool calls are shown by the Chainlit steps of the tools themselves while they run. If the context holds back
+    side effects (see `run_guarded`), tokens are only shown once the input guardrails have passed.
+    """
+    async for event in result.stream_events():
+        if not isinstance(event, RawResponsesStreamEvent) or event.data.type != "response.output_text.delta":
+            continue
+        if isinstance(context, GlobalContext):
+            await context.side_effects_allowed()
+        await stream.send_token(event.data.delta)
+
+
+def with_usage(run_config: Optional[RunConfig]) -> RunConfig:
+    """
+    Returns the run config with the usage requested from the model, also when streaming. The SDK only asks for
+    the usage of streamed responses from api.openai.com, so streamed runs would otherwise record no tokens.
+    """
+    run_config = run_config or RunConfig()
+    model_settings = (run_config.model_settings or ModelSettings()).resolve(ModelSettings(include_usage=True))
+    return replace(run_config, model_settings=model_settings)
+
+
+async def run_agent(
+    starting_agent: Agent,
+    input: str | list[TResponseInputItem],
+    context: Any = None,
+    stream: Optional[TokenStream] = None,
+    **kwargs,
+) -> RunResult | RunResultStreaming | SuspendedRun | PartialRun:
+    """
+    Runs an agent like `Runner.run`, streaming its answer into `stream` if one is given. The tokens and wall time
+    of the run and of its tool calls are recorded in the usage accounting (see `aia25.core.usage`).
+
+    If an agent asks the user for clarification, the outermost run ends with the question as its final output,
+    see `SuspendedRun`. Runs of sub-agents pass the request on to the run that called them.
+
+    The outermost run is cut off at the request deadline of the context (see `aia25.core.deadline`) and ends
+    with the part of the answer streamed so far, see `PartialRun`. Sub-agents are bounded by their tools.
+
+    Args:
+        starting_agent: The agent to run
+        input: The input of the run
+        context: The run context
+        stream: Where to stream the answer to, the run is not streamed if None
+        **kwargs: Passed on to `Runner.run` or `Runner.run_streamed`
+
+    Returns:
+        The completed, suspended or partial result, all result types provide `final_output` and `to_input_list()`
+    """
+    kwargs.setdefault("hooks", usage_hooks)
+    kwargs["run_config"] = with_usage(kwargs.get("run_config"))
+    started = time.perf_counter()
+    nested = _nested_run.get()
+    token = _nested_run.set(True)
+    try:
+        async with asyncio.timeout(None if nested else time_left(getattr(context, "deadline", None))) as timeout:
+            if stream is None:
+                result = await Runner.run(starting_agent=starting_agent, input=input, context=context, **kwargs)
+            else:
+                result = Runner.run_streamed(starting_agent=starting_agent, input=input, context=context, **kwargs)
+                try:
+                    await stream_run(result, stream, context)
+                except BaseException:
+                    result.cancel()
+                    raise
+                if timeout.expired():
+                    # The SDK ends the event stream when cancelled instead of raising, the run is incomplete
+                    result.cancel()
+                    raise TimeoutError
+    except ClarificationRequested as e:
+        if nested:
+            raise
+        result = SuspendedRun.from_exception(e, input)
+    except TimeoutError:
+        if nested:
+            raise
+        logger.warning("%s did not answer before the request deadline", starting_agent.name)
+        streamed = stream.message.content if stream is not None else ""
+        answer = f"{streamed}\n\n({TIMEOUT_ANSWER})" if streamed else TIMEOUT_ANSWER
+        items = ItemHelpers.input_to_new_input_list(input) + [{"role": "assistant", "content": answer}]
+        result = PartialRun(answer, items, [])
+    finally:
+        _nested_run.reset(token)
+
+    usage.record_run(starting_agent.name, result.raw_responses, time.perf_counter() - started)
+    return result
@@ -0,0 +1,162 @@
+import os
+import sys
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from aia25.core.calendar_client import CalendarEvent
+
+CALENDAR_CACHE_BUDGET = int(os.getenv("CALENDAR_CACHE_BUDGET_MB", "256")) * 1024 * 1024
+
+
+class CalendarIndex:
+    """
+    An in-memory index of calendar events sorted by start time.
+
+    Range queries use binary search on the start times, bounded by the longest event duration,
+    so a lookup for a single day does not scan the whole calendar.
+    """
+
+    def __init__(self, events: list[CalendarEvent]):
+        self.events = sorted(events, key=lambda e: e.start)
+        self.starts = [e.start for e in self.events]
+        self.max_duration = max((e.end - e.start for e in self.events), default=timedelta())
+        self.size = sys.getsizeof(self.events) + sys.getsizeof(self.starts) + sum(
+            sys.getsizeof(e) + sys.getsizeof(e.name) + sys.getsizeof(e.location) + 2 * sys.getsizeof(e.start)
+            for e in self.events
+        )
+
+    def list_events(self, start: datetime, end: datetime) -> list[CalendarEvent]:
+        """
+        List all events within the specified time range, with the same semantics as `ICSClient.list_events`.
+        """
+        if start.tzinfo is not None:
+            start = start.astimezone(timezone.utc).replace(tzinfo=None)
+        if end.tzinfo is not None:
+            end = end.astimezone(timezone.utc).replace(tzinfo=None)
+
+        lo = bisect_left(self.starts, start - self.max_duration)
+        hi = bisect_left(self.starts, end)
+        return [e for e in self.events[lo:hi] if e.end > start]
+
+
+@dataclass
+class TenantStats:
+    """
+    Cache accounting of a single tenant (user).
+    """
+
+    bytes: int = 0
+    entries: int = 0
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+@dataclass
+class _Entry:
+    tenant: str
+    index: CalendarIndex
+    version: str
+
+
+class TenantCalendarCache:
+    """
+    A cache of calendar indexes shared by all users of the process, bounded by a global memory budget.
+
+    Memory is accounted per tenant. When the budget is exceeded, the least recently used indexes are evicted
+    first, so cold users lose their index while active users keep theirs. An evicted index is rebuilt on the
+    tenant's next request.
+    """
+
+    def __init__(self, budget: int = CALENDAR_CACHE_BUDGET):
+        """
+        Initialize the cache.
+
+        Args:
+            budget (int): Maximum number of bytes used by all cached indexes together
+        """
+        self.budget = budget
+        self._entries: OrderedDict[tuple[str, str], _Entry] = OrderedDict()
+        self._tenants: dict[str, TenantStats] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(entry.index.size for entry in self._entries.values())
+
+    def get(
+        self, tenant: str, source: str, version: str, loader: Callable[[], list[CalendarEvent]]
+    ) -> CalendarIndex:
+        """
+        Returns the index of a tenant's calendar, building it with `loader` if it is missing or outdated.
+
+        Args:
+            tenant: The user owning the calendar
+            source: Identifier of the calendar, e.g. its file path
+            version: Changes whenever the calendar changes, e.g. the file's modification time and size
+            loader: Returns all events of the calendar
+        """
+        key = (tenant, source)
+        with self._lock:
+            stats = self._tenants.setdefault(tenant, TenantStats())
+            entry = self._entries.get(key)
+            if entry and entry.version == version:
+                self._entries.move_to_end(key)
+                stats.hits += 1
+                return entry.index
+            stats.misses += 1
+
+        # Build outside the lock, other tenants must not wait for a large calendar to be parsed
+        index = CalendarIndex(loader())
+
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = _Entry(tenant=tenant, index=index, version=version)
+            stats.bytes += index.size
+            stats.entries += 1
+            self._evict(keep=key)
+        return index
+
+    def _remove(self, key: tuple[str, str], evicted: bool = False):
+        entry = self._entries.pop(key, None)
+        if entry:
+            stats = self._tenants[entry.tenant]
+            stats.bytes -= entry.index.size
+            stats.entries -= 1
+            stats.evictions += int(evicted)
+
+    def _evict(self, keep: tuple[str, str]):
+        total = self.total_bytes
+        for key in list(self._entries):
+            if total <= self.budget:
+                break
+            if key == keep:
+                continue
+            total -= self._entries[key].index.size
+            self._remove(key, evicted=True)
+
+    def invalidate(self, tenant: str, source: Optional[str] = None):
+        """
+        Drops the cached indexes of a tenant, or only the one of the given source.
+        """
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == tenant and (source is None or k[1] == source)]:
+                self._remove(key)
+
+    def stats(self) -> dict:
+        """
+        Returns the global and per-tenant memory accounting.
+        """
+        with self._lock:
+            return {
+                "budget_bytes": self.budget,
+                "total_bytes": self.total_bytes,
+                "tenants": {tenant: vars(stats).copy() for tenant, stats in self._tenants.items()},
+            }
+
+
+calendar_cache = TenantCalendarCache()
@@ -0,0 +1,298 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+import chainlit as cl
+from agents import FunctionTool, RunContextWrapper, function_tool
+from agents.mcp import MCPServerStdio, create_static_tool_filter
+from mcp.types import CallToolResult, TextContent
+from pydantic import BaseModel
+
+from aia25.core.calendar_store import CalendarStore
+from aia25.core.clarification import ClarificationRequested, report_tool_error
+from aia25.core.context import GlobalContext, open_calendar
+from aia25.core.deadline import DEADLINE_RESERVE, bounded_timeout, request_deadline, time_left
+from aia25.core.geo_cache import cached_tool_result, get_geo_cache
+from aia25.core.transport import get_transport_client
+
+logger = logging.getLogger("chainlit")
+
+
+@function_tool
+@cl.step(type="tool")
+async def get_connections(
+    ctx: RunContextWrapper[GlobalContext], start: str, end: str, date: str, time: str, is_arrival_time: bool
+):
+    """
+    Gets public transport connections for a given start and end location and a specific date and time.
+    Requires UTF-8 encoded arguments, do not use unicode characters!
+
+    Args:
+        start: A string representing either the name of the station or its ID
+        end: A string representing either the name of the station or its ID
+        date: The date for which to check the connections (iso format)
+        time: The time for which to check the connections (%H:%M)
+        is_arrival_time: Boolean value specifying whether the date and time refer
+            to the arrival (True) or the departure (False). The argument should be formatted
+            as a string because it will be converted into a boolean upon executing this tool.
+
+    Returns:
+        A list of dictionaries containing the connection details.
+    """
+    # The HTTP request runs in a thread, so tool calls of the same turn are executed concurrently
+    timeout = bounded_timeout(15, getattr(ctx.context, "deadline", None))
+    return await asyncio.to_thread(
+        get_transport_client().get_connections, start, end, date, time, is_arrival_time, timeout
+    )
+
+
+@function_tool
+@cl.step(type="tool")
+async def get_current_date_and_time() -> str:
+    """
+    Get the current date and time in ISO format.
+    """
+    return datetime.now().isoformat()
+
+
+@function_tool
+@cl.step(type="tool")
+async def think(thoughts: str) -> str:
+    """
+    Use this tool to either come up with a plan to solve the user's query or to
+    take a step back and think about the current state of the conversation, i.e.
+    whether your can already answer the user's question or whether you need to
+    come up with another plan. Write your thoughts in a clear and concise manner.
+    If you decide to ask the user for more information, just return the follow up
+    question in the next step directly as the output.
+    """
+    return f"Thoughts: {thoughts}"
+
+
+@function_tool(failure_error_function=report_tool_error)
+@cl.step(type="tool")
+async def ask_for_clarification(ctx: RunContextWrapper[GlobalContext], question: str) -> str:
+    """
+    Ask the user for clarification on a specific question.
+    """
+    # Do not talk to the user before the input guardrails have approved the request
+    if isinstance(ctx.context, GlobalContext):
+        await ctx.context.side_effects_allowed()
+
+    # The run ends with the question instead of waiting for the answer, it continues with the user's reply
+    raise ClarificationRequested(question)
+
+
+class Appointment(BaseModel):
+    name: str
+    location: str
+    start: datetime
+    end: datetime
+    latitude: float | None = None
+    longitude: float | None = None
+    walking_minutes_from_previous: float | None = None
+    transit_minutes_from_previous: float | None = None
+
+
+def list_appointments(context: Any, default_calendar_path: Path, date_str: str) -> list[Appointment] | str:
+    """
+    Lists the appointments of the request's user for a given day, with cached locations and travel times.
+
+    Args:
+        context: The run context, usually a `GlobalContext`
+        default_calendar_path: The ICS file to read when no calendar was uploaded or synced in the session
+        date_str: The date to get appointments for in ISO format (YYYY-MM-DD)
+
+    Returns:
+        List of appointments for the given day, or a string error or progress message.
+    """
+    try:
+        year, month, day = map(int, date_str.split("-"))
+        start_datetime = datetime(year, month, day, 0, 0, 0)
+        end_datetime = datetime(year, month, day, 23, 59, 59)
+    except (ValueError, IndexError):
+        return "Invalid date format. Please use YYYY-MM-DD."
+
+    calendar = open_calendar(context, default_calendar_path)
+    events = calendar.list_events(start_datetime, end_datetime)
+
+    # Locations and travel times are precomputed in the background, only cached values are used here
+    geo_cache = get_geo_cache()
+    appointments: list[Appointment] = []
+    for previous, event in zip([None, *events], events):
+        _, geocoded = geo_cache.get_location(event.location) if event.location else (False, None)
+        appointment: Appointment = Appointment(
+            name=event.name,
+            location=event.location,
+            start=event.start,
+            end=event.end,
+            latitude=geocoded.latitude if geocoded else None,
+            longitude=geocoded.longitude if geocoded else None,
+        )
+        if previous and previous.location and event.location:
+            appointment.walking_minutes_from_previous = geo_cache.get_travel_minutes(
+                previous.location, event.location, "walking"
+            )[1]
+            appointment.transit_minutes_from_previous = geo_cache.get_travel_minutes(
+                previous.location, event.location, "transit"
+            )[1]
+        appointments.append(appointment)
+
+    if isinstance(calendar, CalendarStore) and not calendar.is_complete:
+        return (
+            f"The user's calendar is still being imported ({calendar.progress:.0%} done), "
+            f"appointments found so far: {appointments}"
+        )
+
+    return appointments
+
+
+def calendar_appointments_tool(default_calendar_path: Path) -> FunctionTool:
+    """
+    Creates the `get_calendar_appointments` tool of an exercise.
+
+    The implementation and the calendar caches are shared by all exercises. The calendar is resolved per
+    user from the run context, only the calendar used when the user has none differs between exercises.
+
+    Args:
+        default_calendar_path: The ICS file to read when no calendar was uploaded or synced in the session
+    """
+
+    @function_tool
+    @cl.step(type="tool")
+    async def get_calendar_appointments(
+        ctx: RunContextWrapper[GlobalContext], date_str: str
+    ) -> list[Appointment] | str:
+        """
+        Get all calendar appointments for a given day.
+
+        Args:
+            date_str: The date to get appointments for in ISO format (YYYY-MM-DD)
+
+        Returns:
+            List of appointments for the given day, each containing start and end times, name, and location.
+            If the date is invalid, a string error message is returned.
+        """
+        return await asyncio.to_thread(list_appointments, ctx.context, default_calendar_path, date_str)
+
+    return get_calendar_appointments
+
+
+def make_wrapped_call_tool(mcp_server_name, call_tool_func):
+    """
+    Wraps the call_tool function with a Chainlit step decorator.
+    This allows showing the tool name in the Chainlit UI.
+    """
+
+    async def wrapped_call_tool(*args, **kwargs):
+        tool_name = kwargs.get("tool_name") or (args[0] if args else "call_tool")
+
+        @cl.step(type="tool", name=f"[{mcp_server_name}] {tool_name}")
+        async def inner(*args, **kwargs):
+            # Answer geocoding calls for known locations from the background-filled cache
+            arguments = kwargs.get("arguments") or (args[1] if len(args) > 1 else None)
+            cached = cached_tool_result(tool_name, arguments)
+            if cached is not None:
+                return cached
+
+            # MCP calls have no run context, the request deadline reaches them through a context variable
+            try:
+                async with asyncio.timeout(time_left(request_deadline(), DEADLINE_RESERVE)):
+                    return await call_tool_func(*args, **kwargs)
+            except TimeoutError:
+                logger.warning("Stopped %s of %s at the request deadline", tool_name, mcp_server_name)
+                text = f"{tool_name} did not finish in time. Answer with the information you have."
+                return CallToolResult(content=[TextContent(type="text", text=text)], isError=True)
+
+        return await inner(*args, **kwargs)
+
+    return wrapped_call_tool
+
+
+class MCPServerRepository:
+    """
+    Process-wide repository of the MCP servers. All exercises share the same server processes.
+
+    The servers are started on first use by a task of their own, which also closes them again. The MCP clients
+    have to be entered and exited in the same task, so the servers may be started from any (short-lived) task.
+    """
+
+    _instance = None
+    _starting: Optional[asyncio.Future] = None
+
+    def __init__(self):
+        self.stack = AsyncExitStack()
+        self.servers = {}
+        self._closing = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def get_instance(cls):
+        if cls._instance is None:
+            if cls._starting is None:
+                cls._starting = asyncio.get_running_loop().create_future()
+                repo = MCPServerRepository()
+                repo._task = asyncio.create_task(repo._serve(cls._starting))
+            # Shielded, so a cancelled caller does not cancel the start for everyone else
+            await asyncio.shield(cls._starting)
+        return cls._instance
+
+    async def _serve(self, started: asyncio.Future):
+        try:
+            async with self.stack:
+                await self._setup()
+                MCPServerRepository._instance = self
+                started.set_result(self)
+                await self._closing.wait()
+        except Exception as e:
+            if started.done():
+                logger.warning("MCP servers stopped: %s", e)
+            else:
+                MCPServerRepository._starting = None  # The next caller tries again
+                started.set_exception(e)
+
+    async def _setup(self):
+        servers = {
+            "openstreetmap": MCPServerStdio(
+                cache_tools_list=True,
+                tool_filter=create_static_tool_filter(allowed_tool_names=[
+                    "geocode_address",
+                    "reverse_geocode",
+                    "explore_area",
+                    "get_route_directions",
+                    "suggest_meeting_point"
+
+                ]),
+                params={
+                    "command": "uvx",
+                    "args": [
+                        "--from",
+                        "git+https://github.com/jagan-shanmugam/open-streetmap-mcp.git",
+                        "osm-mcp-server",
+                    ],
+                },
+                # Increase timeout to avoid MCP server initialization errors
+                client_session_timeout_seconds=20,
+            ),
+        }
+
+        # Enter async context for each server
+        for name, server in servers.items():
+            # Wrap the server call_tool method with a Chainlit step
+            server.call_tool = make_wrapped_call_tool(name, server.call_tool)
+
+            # Enter async context for each server
+            servers[name] = await self.stack.enter_async_context(server)
+
+        self.servers = servers
+
+    async def aclose(self):
+        self._closing.set()
+        if self._task is not None:
+            await self._task
+
+    def get_server(self, name):
+        return self.servers.get(name)
@@ -0,0 +1,178 @@
+import json
+import math
+import os
+import random
+import re
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional
+
+TOPIC_EXAMPLES_PATH = Path(__file__).parent / "data" / "topic_examples.jsonl"
+
+# Messages scored between the two thresholds are escalated to the LLM guardrail
+RELEVANT_THRESHOLD = float(os.getenv("TOPIC_RELEVANT_THRESHOLD", "0.85"))
+IRRELEVANT_THRESHOLD = float(os.getenv("TOPIC_IRRELEVANT_THRESHOLD", "0.15"))
+
+# Confident verdicts are only trusted for single sentences of at most this many words, since a longer message can
+# hide an off-topic request behind an on-topic one
+LOCAL_VERDICT_MAX_WORDS = int(os.getenv("TOPIC_LOCAL_VERDICT_MAX_WORDS", "20"))
+
+
+class TopicVerdict(NamedTuple):
+    is_relevant: Optional[bool]  # None if the classifier is not confident enough
+    probability: float  # Estimated probability that the message is on topic
+
+
+def normalize_text(text: str) -> str:
+    """
+    Lowercases the text, strips accents and reduces it to words and digits separated by single spaces.
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[a-z0-9]+", text))
+
+
+def is_simple_message(text: str, max_words: int = LOCAL_VERDICT_MAX_WORDS) -> bool:
+    """
+    Returns whether the message is a single sentence of at most `max_words` words.
+    """
+    sentences = [s for s in re.split(r"[.!?;\n]+", text) if normalize_text(s)]
+    return len(sentences) <= 1 and len(normalize_text(text).split()) <= max_words
+
+
+def extract_features(text: str) -> dict[str, float]:
+    """
+    Returns the sublinear term frequencies of the words and the character 3- and 4-grams of a text.
+    Character n-grams make the model robust to typos, inflections and compound words (e.g. "Zugverbindung").
+    """
+    counts: dict[str, int] = {}
+    for word in normalize_text(text).split():
+        counts["w:" + word] = counts.get("w:" + word, 0) + 1
+        padded = f" {word} "
+        for n in (3, 4):
+            for i in range(len(padded) - n + 1):
+                gram = padded[i : i + n]
+                counts[gram] = counts.get(gram, 0) + 1
+    return {feature: 1.0 + math.log(count) for feature, count in counts.items()}
+
+
+def load_examples(path: Path = TOPIC_EXAMPLES_PATH) -> list[tuple[str, bool]]:
+    """
+    Loads labeled messages from a JSON lines file with `text` and `is_relevant` fields.
+    """
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                examples.append((record["text"], bool(record["is_relevant"])))
+    return examples
+
+
+class TopicClassifier:
+    """
+    A TF-IDF weighted logistic regression over words and character n-grams, deciding whether a message is
+    about public transport, calendar appointments or restaurants.
+
+    The model is small enough to be trained at startup in pure Python and scores a message in microseconds.
+    It is meant as a first stage in front of the LLM guardrail: only messages it is unsure about are escalated.
+    """
+
+    def __init__(self, idf: dict[str, float], weights: dict[str, float], bias: float):
+        self.idf = idf
+        self.weights = weights
+        self.bias = bias
+
+    @classmethod
+    def train(
+        cls,
+        examples: Iterable[tuple[str, bool]],
+        epochs: int = 40,
+        learning_rate: float = 0.5,
+        l2: float = 1e-3,
+        seed: int = 0,
+    ) -> "TopicClassifier":
+        """
+        Trains the classifier with stochastic gradient descent.
+
+        Args:
+            examples: Pairs of message and whether it is on topic
+            epochs: Number of passes over the examples
+            learning_rate: Initial step size, it decays with every epoch
+            l2: Strength of the L2 regularization, keeps the scores of unseen messages close to the prior
+            seed: Seed of the example shuffling, training is deterministic
+
+        Returns:
+            The trained classifier
+        """
+        examples = list(examples)
+        documents = [extract_features(text) for text, _ in examples]
+
+        document_frequency: dict[str, int] = {}
+        for features in documents:
+            for feature in features:
+                document_frequency[feature] = document_frequency.get(feature, 0) + 1
+        idf = {f: math.log((1 + len(documents)) / (1 + df)) + 1.0 for f, df in document_frequency.items()}
+
+        classifier = cls(idf=idf, weights={}, bias=0.0)
+        samples = [(classifier._vectorize(features), float(label)) for features, (_, label) in zip(documents, examples)]
+
+        rng = random.Random(seed)
+        weights = classifier.weights
+        for epoch in range(epochs):
+            rng.shuffle(samples)
+            rate = learning_rate / (1.0 + epoch * 0.1)
+            for vector, label in samples:
+                error = classifier._probability(vector) - label
+                for feature, value in vector.items():
+                    weight = weights.get(feature, 0.0)
+                    weights[feature] = weight - rate * (error * value + l2 * weight)
+                classifier.bias -= rate * error
+        return classifier
+
+    def _vectorize(self, features: dict[str, float]) -> dict[str, float]:
+        vector = {f: tf * self.idf[f] for f, tf in features.items() if f in self.idf}
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        return {f: v / norm for f, v in vector.items()} if norm else {}
+
+    def _probability(self, vector: dict[str, float]) -> float:
+        score = self.bias + sum(self.weights.get(f, 0.0) * v for f, v in vector.items())
+        return 1.0 / (1.0 + math.exp(-max(min(score, 30.0), -30.0)))
+
+    def probability(self, text: str) -> float:
+        """
+        Returns the estimated probability that the message is on topic.
+        """
+        return self._probability(self._vectorize(extract_features(text)))
+
+    def classify(
+        self,
+        text: str,
+        relevant_threshold: float = RELEVANT_THRESHOLD,
+        irrelevant_threshold: float = IRRELEVANT_THRESHOLD,
+    ) -> TopicVerdict:
+        """
+        Classifies a message, leaving `is_relevant` as None if the probability is between the thresholds.
+        """
+        probability = self.probability(text)
+        if probability >= relevant_threshold:
+            return TopicVerdict(True, probability)
+        if probability <= irrelevant_threshold:
+            return TopicVerdict(False, probability)
+        return TopicVerdict(None, probability)
+
+
+_topic_classifier: Optional[TopicClassifier] = None
+_topic_classifier_lock = threading.Lock()
+
+
+def get_topic_classifier() -> TopicClassifier:
+    """
+    Returns the process-wide topic classifier, trained on the bundled examples on first use.
+    """
+    global _topic_classifier
+    with _topic_classifier_lock:
+        if _topic_classifier is None:
+            _topic_classifier = TopicClassifier.train(load_examples())
+    return _topic_classifier
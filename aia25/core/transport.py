@@ -0,0 +1,146 @@
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TRANSPORT_API_URL = "http://transport.opendata.ch/v1"
+CONNECTIONS_TTL = 60  # Seconds a connection lookup is reused, delays change quickly
+HTTP_POOL_SIZE = 32  # Keep-alive connections per host in the shared HTTP pool
+
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Returns the process-wide HTTP session. Sharing it keeps TCP/TLS connections alive across tool calls,
+    users and exercises.
+    """
+    global _http_session
+    with _http_session_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_POOL_SIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+    return _http_session
+
+
+def format_duration(duration: str) -> str:
+    """Formats the duration returned by the public transport API such that it is more readable."""
+    readable_duration_str = "Invalid format"
+
+    match = re.match(r"(\d{2})d(\d{2}):(\d{2}):(\d{2})", duration)
+    if match:
+        days, hours, minutes, seconds = map(int, match.groups())
+
+        readable_duration = []
+
+        if days > 0:
+            readable_duration.append(f"{days} day{'s' if days > 1 else ''}")
+        if hours > 0:
+            readable_duration.append(f"{hours} hour{'s' if hours > 1 else ''}")
+        if minutes > 0:
+            readable_duration.append(f"{minutes} minute{'s' if minutes > 1 else ''}")
+        if seconds > 0:
+            readable_duration.append(f"{seconds} second{'s' if seconds > 1 else ''}")
+
+        readable_duration_str = ", ".join(readable_duration)
+
+    return readable_duration_str
+
+
+class TransportClient:
+    """
+    A client for the Swiss public transport API (transport.opendata.ch).
+
+    Requests go through the shared HTTP session and identical connection lookups within
+    `CONNECTIONS_TTL` seconds are answered from a process-wide cache.
+    """
+
+    def __init__(self, session: Optional[requests.Session] = None, ttl: float = CONNECTIONS_TTL):
+        self.session = session or get_http_session()
+        self.ttl = ttl
+        self._cache: dict[tuple, tuple[float, list[dict]]] = {}
+        self._lock = threading.Lock()
+
+    def get_connections(
+        self, start: str, end: str, date: str, time_: str, is_arrival_time: bool, timeout: float = 15
+    ) -> list[dict]:
+        """
+        Gets public transport connections between two locations.
+
+        Args:
+            start: Name or ID of the departure station
+            end: Name or ID of the arrival station
+            date: The date of the journey (iso format)
+            time_: The time of the journey (%H:%M)
+            is_arrival_time: Whether date and time refer to the arrival (True) or the departure (False)
+            timeout: Seconds to wait for the transport API, e.g. shortened to the request deadline
+
+        Returns:
+            A list of dictionaries containing the connection details.
+        """
+        key = (start.strip().lower(), end.strip().lower(), date, time_, bool(is_arrival_time))
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.ttl:
+            return cached[1]
+
+        response = self.session.get(
+            f"{TRANSPORT_API_URL}/connections",
+            params={"from": start, "to": end, "date": date, "time": time_, "isArrivalTime": int(is_arrival_time)},
+            timeout=timeout,
+        )
+        data = response.json()
+
+        connections = []
+        for connection in data["connections"]:
+            departure = datetime.strptime(connection["from"]["departure"], "%Y-%m-%dT%H:%M:%S%z")
+            arrival = datetime.strptime(connection["to"]["arrival"], "%Y-%m-%dT%H:%M:%S%z")
+
+            connections.append(
+                {
+                    "from": connection["from"]["station"]["name"],
+                    "departure_platform": connection["from"]["platform"],
+                    "departure_date": {"year": departure.year, "month": departure.month, "day": departure.day},
+                    "departure_time": {"hour": departure.hour, "minute": departure.minute},
+                    "departure_delay": connection["from"]["delay"],
+                    "to": connection["to"]["station"]["name"],
+                    "arrival_platform": connection["to"]["platform"],
+                    "arrival_date": {"year": arrival.year, "month": arrival.month, "day": arrival.day},
+                    "arrival_time": {"hour": arrival.hour, "minute": arrival.minute},
+                    "arrival_delay": connection["to"]["delay"],
+                    "duration": format_duration(connection["duration"]),
+                }
+            )
+
+        if not connections:
+            raise Exception(
+                "Couldn't find any connection, please verify that all of the arguments are correctly formatted in UTF-8"
+            )
+
+        with self._lock:
+            now = time.monotonic()
+            if len(self._cache) > 1024:
+                self._cache = {k: v for k, v in self._cache.items() if now - v[0] < self.ttl}
+            self._cache[key] = (now, connections)
+        return connections
+
+
+_transport_client: Optional[TransportClient] = None
+
+
+def get_transport_client() -> TransportClient:
+    """
+    Returns the process-wide transport client.
+    """
+    global _transport_client
+    if _transport_client is None:
+        _transport_client = TransportClient()
+    return _transport_client
@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import chainlit as cl
+import mlflow
+from agents import Agent, ModelResponse, RunContextWrapper, RunHooks, Tool
+from chainlit.context import ChainlitContextException
+
+USAGE_SESSION_LIMIT = 1000  # Number of most recent sessions whose usage is kept
+
+logger = logging.getLogger("chainlit")
+
+
+@dataclass
+class AgentUsageStats:
+    """
+    Token and latency accounting of the runs of a single agent.
+    """
+
+    runs: int = 0
+    requests: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_tokens: int = 0
+    seconds: float = 0.0
+
+    @property
+    def cached_ratio(self) -> float:
+        return self.cached_tokens / self.input_tokens if self.input_tokens else 0.0
+
+
+@dataclass
+class ToolUsageStats:
+    """
+    Latency accounting of the calls of a single tool by a single agent.
+    """
+
+    calls: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class UsageTotals:
+    """
+    Usage of all agents and tools within one scope, i.e. a session or the whole process.
+    """
+
+    agents: dict[str, AgentUsageStats] = field(default_factory=dict)
+    tools: dict[tuple[str, str], ToolUsageStats] = field(default_factory=dict)
+
+    def add_run(self, agent_name: str, responses: list[ModelResponse], seconds: float):
+        stats = self.agents.setdefault(agent_name, AgentUsageStats())
+        stats.runs += 1
+        stats.seconds += seconds
+        for response in responses:
+            stats.requests += response.usage.requests
+            stats.input_tokens += response.usage.input_tokens
+            stats.output_tokens += response.usage.output_tokens
+            details = getattr(response.usage, "input_tokens_details", None)
+            stats.cached_tokens += getattr(details, "cached_tokens", 0) or 0
+
+    def add_tool_call(self, agent_name: str, tool_name: str, seconds: float):
+        stats = self.tools.setdefault((agent_name, tool_name), ToolUsageStats())
+        stats.calls += 1
+        stats.seconds += seconds
+
+    def as_dict(self) -> dict:
+        return {
+            "agents": {
+                name: {**vars(stats), "cached_ratio": stats.cached_ratio} for name, stats in self.agents.items()
+            },
+            "tools": {
+                f"{agent_name}/{tool_name}": vars(stats).copy()
+                for (agent_name, tool_name), stats in self.tools.items()
+            },
+        }
+
+
+def current_session_id() -> Optional[str]:
+    """
+    Returns the id of the Chainlit session the code runs in, or None outside of a session (e.g. in scripts).
+    """
+    try:
+        return cl.context.session.id
+    except ChainlitContextException:
+        return None
+
+
+class UsageAccounting:
+    """
+    Collects the token usage and wall time per agent and per tool, both for the whole process and per session.
+    """
+
+    def __init__(self, session_limit: int = USAGE_SESSION_LIMIT):
+        self.session_limit = session_limit
+        self._process = UsageTotals()
+        self._sessions: OrderedDict[str, UsageTotals] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _scopes(self, session_id: Optional[str]) -> list[UsageTotals]:
+        if session_id is None:
+            return [self._process]
+        if session_id not in self._sessions:
+            self._sessions[session_id] = UsageTotals()
+            while len(self._sessions) > self.session_limit:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return [self._process, self._sessions[session_id]]
+
+    def record_run(self, agent_name: str, responses: list[ModelResponse], seconds: float):
+        """
+        Records the model responses and the wall time of a run of the given agent.
+        """
+        session_id = current_session_id()
+        with self._lock:
+            for totals in self._scopes(session_id):
+                totals.add_run(agent_name, responses, seconds)
+            cached_ratio = self._process.agents[agent_name].cached_ratio
+        logger.debug("%s: %.0f%% of the prompt tokens were cached", agent_name, cached_ratio * 100)
+
+    def record_tool_call(self, agent_name: str, tool_name: str, seconds: float):
+        """
+        Records the wall time of a tool call, including sub-agents called as tools.
+        """
+        session_id = current_session_id()
+        with self._lock:
+            for totals in self._scopes(session_id):
+                totals.add_tool_call(agent_name, tool_name, seconds)
+
+    def stats(self, session_id: Optional[str] = None) -> Optional[dict]:
+        """
+        Returns the usage of the process, or of the given session (None if the session is unknown).
+        """
+        with self._lock:
+            if session_id is None:
+                return self._process.as_dict()
+            totals = self._sessions.get(session_id)
+            return totals.as_dict() if totals is not None else None
+
+
+usage = UsageAccounting()
+
+
+class UsageHooks(RunHooks):
+    """
+    Run hooks that measure the wall time of every tool call, function and MCP tools as well as sub-agents.
+    """
+
+    def __init__(self, accounting: UsageAccounting = usage):
+        self.accounting = accounting
+        self._started: dict[tuple[int, str, str], list[float]] = {}
+
+    async def on_tool_start(self, context: RunContextWrapper[Any], agent: Agent[Any], tool: Tool):
+        self._started.setdefault((id(context), agent.name, tool.name), []).append(time.perf_counter())
+
+    async def on_tool_end(self, context: RunContextWrapper[Any], agent: Agent[Any], tool: Tool, result: str):
+        started = self._started.get((id(context), agent.name, tool.name))
+        if not started:
+            return
+        seconds = time.perf_counter() - started.pop(0)
+        if not started:
+            del self._started[(id(context), agent.name, tool.name)]
+        self.accounting.record_tool_call(agent.name, tool.name, seconds)
+
+
+usage_hooks = UsageHooks()
+
+
+def log_usage_to_mlflow(stats: dict, run_name: str):
+    """
+    Logs usage statistics (see `UsageAccounting.stats`) as metrics of an MLflow run in the active experiment.
+    """
+    metrics = {}
+    for agent_name, agent_stats in stats["agents"].items():
+        metrics.update({f"{agent_name}/{key}": value for key, value in agent_stats.items()})
+    for tool_key, tool_stats in stats["tools"].items():
+        metrics.update({f"{tool_key}/{key}": value for key, value in tool_stats.items()})
+
+    with mlflow.start_run(run_name=run_name):
+        mlflow.log_metrics(metrics)
@@ -0,0 +1,99 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import Any, Awaitable
+
+from openai import AsyncOpenAI
+
+from aia25.core.agent_graph import DeferredAgentTool
+from aia25.core.fast_path import get_connection_fast_path
+from aia25.core.tools import MCPServerRepository
+from aia25.core.topic_classifier import get_topic_classifier
+
+logger = logging.getLogger("chainlit")
+
+
+class Readiness:
+    """
+    Tracks the warm-up of the components the first requests depend on, see `warm_up`.
+    """
+
+    def __init__(self):
+        self._components: dict[str, dict] = {}
+
+    async def track(self, component: str, work: Awaitable[Any]):
+        """
+        Awaits the warm-up work of a component and records whether and how fast it became ready.
+        """
+        self._components[component] = {"status": "warming"}
+        started = time.perf_counter()
+        try:
+            await work
+        except Exception as e:
+            self._components[component] = {"status": "failed", "error": str(e)}
+            logger.warning("Warm-up of %s failed: %s", component, e)
+            return
+
+        seconds = time.perf_counter() - started
+        self._components[component] = {"status": "ready", "seconds": round(seconds, 3)}
+        logger.info("Warmed up %s in %.2fs", component, seconds)
+
+    @property
+    def is_ready(self) -> bool:
+        return bool(self._components) and all(c["status"] == "ready" for c in self._components.values())
+
+    def status(self) -> dict:
+        return {"ready": self.is_ready, "components": {name: dict(c) for name, c in self._components.items()}}
+
+
+readiness = Readiness()
+
+
+async def warm_up_llm_connection(client: AsyncOpenAI):
+    """
+    Opens a pooled connection to the LLM endpoint (DNS lookup and TLS handshake) with a cheap request.
+    """
+    await client.models.list()
+
+
+async def warm_up_mcp_servers():
+    """
+    Starts the shared MCP servers and lists their tools, which the servers cache.
+    """
+    repo = await MCPServerRepository.get_instance()
+    await asyncio.gather(*(server.list_tools() for server in repo.servers.values()))
+
+
+async def warm_up_exercise(module_name: str, import_lock: asyncio.Lock):
+    """
+    Imports an exercise's agents module and waits until its deferred sub-agents (see `DeferredAgentTool`) are ready.
+    """
+    # Imported in a thread, so the event loop keeps serving requests, one module at a time
+    async with import_lock:
+        module = await asyncio.to_thread(importlib.import_module, module_name)
+
+    for deferred in [value for value in vars(module).values() if isinstance(value, DeferredAgentTool)]:
+        if await deferred.ready() is None:
+            raise RuntimeError(f"A sub-agent of {deferred.parent.name} could not be created")
+
+
+async def warm_up(module_names: list[str], client: AsyncOpenAI):
+    """
+    Warms up everything the first requests would otherwise wait for, concurrently: the connection to the LLM
+    endpoint, the MCP servers and their tool lists, the local classifiers and the exercises' agent modules.
+    Progress is reported by `readiness`.
+
+    Args:
+        module_names: The exercise modules to import, e.g. "solution_exercise04.my_agents"
+        client: The client of the LLM endpoint
+    """
+    import_lock = asyncio.Lock()
+    await asyncio.gather(
+        readiness.track("llm_connection", warm_up_llm_connection(client)),
+        readiness.track("mcp_servers", warm_up_mcp_servers()),
+        readiness.track("topic_classifier", asyncio.to_thread(get_topic_classifier)),
+        readiness.track("connection_fast_path", asyncio.to_thread(get_connection_fast_path)),
+        *(readiness.track(name, warm_up_exercise(name, import_lock)) for name in module_names),
+    )
+    logger.info("Warm-up finished, %s", "all components are ready" if readiness.is_ready else readiness.status())
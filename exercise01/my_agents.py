@@ -1,7 +1,12 @@
 from textwrap import dedent
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from agents import Agent, Runner, TResponseInputItem
+from agents import Agent, TResponseInputItem
+
+from aia25.core.fast_path import get_connection_fast_path
+from aia25.core.model_routing import apply_model_routing
+from aia25.core.planning import apply_planning_mode
+from aia25.core.streaming import TokenStream, run_agent
 
 from .my_tools import (
     ask_for_clarification,
@@ -41,13 +46,22 @@ public_transport_agent = Agent(
 )
 
 
-async def execute_agent(user_input: str, history: List[Dict[str, str]]) -> tuple[Any, list[TResponseInputItem]]:
+apply_model_routing(public_transport_agent)
+apply_planning_mode(public_transport_agent)
+
+
+async def execute_agent(
+    user_input: str,
+    history: List[Dict[str, str]],
+    stream: Optional[TokenStream] = None,
+) -> tuple[Any, list[TResponseInputItem]]:
     """
     Executes the main agent with the given input and returns the response and the updated history.
 
     Args:
         user_input: The user's message
         history: The conversation history
+        stream: Where to stream the answer to while it is generated, the answer is not streamed if None
 
     Returns:
         A tuple containing (response_message, updated_history)
@@ -55,6 +69,11 @@ async def execute_agent(user_input: str, history: List[Dict[str, str]]) -> tuple
     """
     current_history = history + [{"role": "user", "content": user_input}]
 
-    result = await Runner.run(starting_agent=public_transport_agent, input=current_history)
+    # Simple connection queries are answered directly, everything else needs the agent
+    answer = await get_connection_fast_path().answer(user_input)
+    if answer is not None:
+        return answer, current_history + [{"role": "assistant", "content": answer}]
+
+    result = await run_agent(public_transport_agent, current_history, stream=stream)
 
     return result.final_output, result.to_input_list()
@@ -1,11 +1,13 @@
 from datetime import datetime
 from textwrap import dedent
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from agents import Agent, RunContextWrapper, Runner, TResponseInputItem
-from pydantic import BaseModel
+from agents import Agent, TResponseInputItem
 
-import asyncio
+from aia25.core.agent_graph import DeferredAgentTool
+from aia25.core.agent_tools import agent_tool
+from aia25.core.context import GlobalContext
+from aia25.core.streaming import TokenStream, run_agent
 
 from .my_tools import (
     ask_for_clarification,
@@ -16,37 +18,25 @@ from .my_tools import (
 )
 
 
-class GlobalContext(BaseModel):
+# Static, so the prompt prefix can be cached. The date and time follow the request in a context message.
+scheduling_agent_system_prompt = dedent(
     """
-    This class holds the global context for the agent, including the current date and time.
-    It is used to provide context to the agent during its execution.
-    """
-
-    current_date: str = ""  # Date in YYYY-MM-DD format
-    current_time: str = ""  # Time in HH:MM:SS format
-
+    You are a scheduling assistant that optimizes transport recommendations based on calendar appointments.
 
-def scheduling_agent_system_prompt(context: RunContextWrapper[GlobalContext], agent: Agent[GlobalContext]) -> str:
-    ctx = context.context
-    return dedent(
-        f"""
-        You are a scheduling assistant that optimizes transport recommendations based on calendar appointments.
+    The current date and time are given in a context message after the request.
 
-        Current date: {ctx.current_date}
-        Current time: {ctx.current_time}
+    # Tasks
+    - Evaluate transport options against calendar appointments
+    - Recommend optimal connections with rationale
+    - Ensure journey-appointment alignment
 
-        # Tasks
-        - Evaluate transport options against calendar appointments
-        - Recommend optimal connections with rationale
-        - Ensure journey-appointment alignment
-
-        # Process
-        1. For travel requests: Use YYYY-MM-DD format. Retrieve calendar appointments for specified date.
-        2. Analyze connections for: appointment conflicts, 15+ min buffers, journey duration, transfers, reliability.
-        3. Recommend with: connection details, selection rationale, and schedule considerations.
-        4. If no appointments exist, select the most efficient connection.
-        """
-    )
+    # Process
+    1. For travel requests: Use YYYY-MM-DD format. Retrieve calendar appointments for specified date.
+    2. Analyze connections for: appointment conflicts, 15+ min buffers, journey duration, transfers, reliability.
+    3. Recommend with: connection details, selection rationale, and schedule considerations.
+    4. If no appointments exist, select the most efficient connection.
+    """
+)
 
 
 scheduling_agent = Agent(
@@ -56,37 +46,32 @@ scheduling_agent = Agent(
 )
 
 
-def public_transport_agent_system_prompt(
-    context: RunContextWrapper[GlobalContext], agent: Agent[GlobalContext]
-) -> str:
-    ctx = context.context
-    return dedent(
-        f"""You are a public transport assistant that helps users find the best public transport
-        connections based on their needs. Whenever you receive a query, you first think about it
-        and figure out what the user is asking for. Then you either directly answer the question
-        if you know the answer, or you make a plan in which order you will call the tools to get
-        the required information. If there is no combination of tool calls that can help you
-        answer the questions, you should ask the user for more information. If you are unsure about
-        the start or end location or about the specific travel date and time that you should use in
-        the tool calls, you should ask the user for clarification.
+public_transport_agent_system_prompt = dedent(
+    """You are a public transport assistant that helps users find the best public transport
+    connections based on their needs. Whenever you receive a query, you first think about it
+    and figure out what the user is asking for. Then you either directly answer the question
+    if you know the answer, or you make a plan in which order you will call the tools to get
+    the required information. If there is no combination of tool calls that can help you
+    answer the questions, you should ask the user for more information. If you are unsure about
+    the start or end location or about the specific travel date and time that you should use in
+    the tool calls, you should ask the user for clarification.
 
-        Current date: {ctx.current_date}
-        Current time: {ctx.current_time}
+    The current date and time are given in a context message after the request.
 
-        You have access to the following tools:
-        - think: Use this tool for planning and observing the current state of the conversation.
-        - get_connections: Find the best public transport connections between two locations.
-        - ask_for_clarification: Ask the user for more information if needed.
+    You have access to the following tools:
+    - think: Use this tool for planning and observing the current state of the conversation.
+    - get_connections: Find the best public transport connections between two locations.
+    - ask_for_clarification: Ask the user for more information if needed.
 
-        If you leave the date and time empty, the current date and time will be used.
+    If you leave the date and time empty, the current date and time will be used.
 
-        Never call a tool twice with the same parameters. Always inspect the tool output and
-        ask yourself whether that already answers the user's question. If it does, stop calling tools and
-        synthesize the information into a clear response. Provide a final answer to the user's query.
+    Never call a tool twice with the same parameters. Always inspect the tool output and
+    ask yourself whether that already answers the user's question. If it does, stop calling tools and
+    synthesize the information into a clear response. Provide a final answer to the user's query.
 
-        Whenever you plan something, immediately follow up with the plan before answering the question.
-        """
-    )
+    Whenever you plan something, immediately follow up with the plan before answering the question.
+    """
+)
 
 
 public_transport_agent = Agent(
@@ -148,11 +133,13 @@ triage_agent = Agent(
     tools=[
         think,
         ask_for_clarification,
-        public_transport_agent.as_tool(
+        agent_tool(
+            public_transport_agent,
             tool_name="find_transport_routes",
             tool_description="Find public transport routes between two locations for a specific date and time",
         ),
-        scheduling_agent.as_tool(
+        agent_tool(
+            scheduling_agent,
             tool_name="select_best_connection",
             tool_description=(
                 "Select the optimal transport connection by first getting the user's appointments and "
@@ -160,44 +147,55 @@ triage_agent = Agent(
             ),
         ),
         # DONE:
-        #   After you finish implementing OpenStreetMapAgent.setup(), add it below like so:
-        #
-        #   asyncio.run(OpenStreetMapAgent.setup()).as_tool(
-        #       tool_name="...",
-        #       tool_description="...",
-        #   ),
-        asyncio.run(OpenStreetMapAgent.setup()).as_tool(
-            tool_name="get_nearby_places",
-            tool_description="Get a list of nearby places from OpenStreetMap."
-        ),
-
+        #   After you finish implementing OpenStreetMapAgent.setup(), add it as a tool below the triage agent
+        #   with a `DeferredAgentTool`, which calls `setup()` in the background and adds the tool once the
+        #   MCP server has started.
     ]
 )
 
+get_nearby_places = DeferredAgentTool(
+    triage_agent,
+    OpenStreetMapAgent.setup,
+    lambda agent: agent_tool(
+        agent,
+        tool_name="get_nearby_places",
+        tool_description="Get a list of nearby places from OpenStreetMap."
+    ),
+)
+
 
-async def execute_agent(user_input: str, history: List[Dict[str, str]]) -> tuple[Any, list[TResponseInputItem]]:
+async def execute_agent(
+    user_input: str,
+    history: List[Dict[str, str]],
+    stream: Optional[TokenStream] = None,
+) -> tuple[Any, list[TResponseInputItem]]:
     """
     Executes the main agent with the given input and returns the response and the updated history.
 
     Args:
         user_input: The user's message
         history: The conversation history
+        stream: Where to stream the answer to while it is generated, the answer is not streamed if None
 
     Returns:
         A tuple containing (response_message, updated_history)
         If the guardrail was triggered, updated_history will be None indicating
         the history should not be updated
     """
+    # Starts the OpenStreetMap agent in the background if the module was not loaded from an event loop
+    get_nearby_places.start()
+
     current_history = history + [{"role": "user", "content": user_input}]
 
     current_datetime = datetime.now()
     date_only = current_datetime.strftime("%Y-%m-%d")
     time_only = current_datetime.strftime("%H:%M:%S")
 
-    result = await Runner.run(
+    result = await run_agent(
         starting_agent=triage_agent,
         input=current_history,
-        context=GlobalContext(current_date=date_only, current_time=time_only),
+        context=GlobalContext.for_session(current_date=date_only, current_time=time_only),
+        stream=stream,
     )
 
     return result.final_output, result.to_input_list()
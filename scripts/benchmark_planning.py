@@ -0,0 +1,115 @@
+"""
+Compares the planning modes of `aia25/core/planning.py` on a fixed set of queries.
+
+For every mode, the exercise is imported in its own process with PLANNING_MODE set, since the mode is applied
+when the agents are created. Each query is answered with an empty history. The script counts the model calls
+(turns, including those of sub-agents), the prompt and completion tokens and the wall time per request:
+
+    uv run python scripts/benchmark_planning.py --exercise solution_exercise02 --modes tool inline native
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+load_dotenv()
+
+QUERIES = [
+    "When does the next train leave from Bern to Zürich?",
+    "I need to be in Basel tomorrow at 9:00, which train should I take from Lucerne?",
+    "What appointments do I have tomorrow?",
+    "Find a connection from Bern to my first appointment tomorrow.",
+    "How do I get from Geneva to Lausanne on Friday afternoon?",
+    "Which train from Zürich to St. Gallen fits my schedule on Monday?",
+]
+
+
+async def measure(exercise: str, queries: list[str], repeat: int) -> list[dict]:
+    """
+    Answers the queries with the exercise's `execute_agent` and measures every request.
+    """
+    from chainlit.context import init_http_context
+
+    from aia25.bootstrap import custom_client
+
+    init_http_context()  # The tools report Chainlit steps, which need a context outside the app
+    module = importlib.import_module(f"{exercise}.my_agents")
+
+    calls = {"turns": 0, "input_tokens": 0, "output_tokens": 0}
+    create = custom_client.chat.completions.create
+
+    async def counting_create(*args, **kwargs):
+        response = await create(*args, **kwargs)
+        calls["turns"] += 1
+        if getattr(response, "usage", None):
+            calls["input_tokens"] += response.usage.prompt_tokens
+            calls["output_tokens"] += response.usage.completion_tokens
+        return response
+
+    custom_client.chat.completions.create = counting_create
+
+    measurements = []
+    for _ in range(repeat):
+        for query in queries:
+            before = dict(calls)
+            start = time.perf_counter()
+            await module.execute_agent(user_input=query, history=[])
+            measurements.append(
+                {"query": query, "seconds": time.perf_counter() - start, **{k: calls[k] - before[k] for k in calls}}
+            )
+    return measurements
+
+
+def run_mode(exercise: str, mode: str, repeat: int) -> list[dict]:
+    """
+    Runs the benchmark of one planning mode in a child process and returns its measurements.
+    """
+    completed = subprocess.run(
+        [sys.executable, __file__, "--exercise", exercise, "--repeat", str(repeat), "--child"],
+        env={**os.environ, "PLANNING_MODE": mode},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--exercise", default="solution_exercise02", help="Package of the exercise to benchmark")
+    parser.add_argument("--modes", nargs="+", default=["tool", "inline", "native"])
+    parser.add_argument("--repeat", type=int, default=1, help="How often the query set is run per mode")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args.exercise, QUERIES, args.repeat))))
+        return
+
+    print(f"{'mode':<8} {'turns/request':>14} {'input tokens':>13} {'output tokens':>14} {'mean s':>8} {'p50 s':>8}")
+    for mode in args.modes:
+        measurements = run_mode(args.exercise, mode, args.repeat)
+        seconds = [m["seconds"] for m in measurements]
+        print(
+            f"{mode:<8} "
+            f"{statistics.fmean(m['turns'] for m in measurements):>14.1f} "
+            f"{statistics.fmean(m['input_tokens'] for m in measurements):>13.0f} "
+            f"{statistics.fmean(m['output_tokens'] for m in measurements):>14.0f} "
+            f"{statistics.fmean(seconds):>8.1f} "
+            f"{statistics.median(seconds):>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
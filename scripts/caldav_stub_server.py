@@ -0,0 +1,208 @@
+"""
+A tiny CalDAV stand-in server to test the incremental calendar sync of `aia25/calendar_sync.py` locally.
+
+Every event of an ICS file is served as its own resource with an ETag. The collection exposes a ctag and
+a sync token and answers PROPFIND, sync-collection and calendar-multiget requests. Events can be changed
+with PUT and DELETE, which bumps the sync token so the next sync only transfers the delta:
+
+    python scripts/caldav_stub_server.py exercise02/ExampleCalendar.ics --port 5232
+    CALDAV_URL=http://localhost:5232/calendars/user/ uv run app
+
+    curl -X DELETE http://localhost:5232/calendars/user/<uid>.ics
+"""
+
+import argparse
+import hashlib
+import re
+import threading
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+SYNC_TOKEN_PREFIX = "http://aia25.local/sync/"
+
+
+def split_ics(text: str) -> tuple[list[str], list[tuple[str, str]]]:
+    """
+    Splits an ICS document into its VTIMEZONE blocks and its (uid, VEVENT block) pairs.
+    """
+    timezones, events, block, uid = [], [], None, ""
+    for line in text.splitlines():
+        if block is None and line in ("BEGIN:VEVENT", "BEGIN:VTIMEZONE"):
+            block, uid = [], ""
+        if block is None:
+            continue
+        block.append(line)
+        if line.startswith("UID:"):
+            uid = line[4:].strip()
+        if line == "END:VTIMEZONE":
+            timezones.append("\r\n".join(block))
+            block = None
+        elif line == "END:VEVENT":
+            events.append((uid or hashlib.sha1("".join(block).encode()).hexdigest(), "\r\n".join(block)))
+            block = None
+    return timezones, events
+
+
+class CalendarCollection:
+    """
+    An in-memory calendar collection that records a change log for sync-collection reports.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.resources: dict[str, str] = {}
+        self.revision = 0
+        self.changes: list[tuple[int, str]] = []  # (revision, href) of every change
+        self.lock = threading.Lock()
+
+    def load(self, ics_text: str):
+        timezones, events = split_ics(ics_text)
+        for uid, event in events:
+            body = "\r\n".join(
+                ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//aia25//CalDAV stub//EN", *timezones, event,
+                 "END:VCALENDAR", ""]
+            )
+            self.put(f"{self.path}{re.sub(r'[^A-Za-z0-9@._-]', '_', uid)}.ics", body)
+
+    @staticmethod
+    def etag(body: str) -> str:
+        return '"' + hashlib.sha1(body.encode("utf8")).hexdigest()[:16] + '"'
+
+    @property
+    def sync_token(self) -> str:
+        return f"{SYNC_TOKEN_PREFIX}{self.revision}"
+
+    def put(self, href: str, body: str):
+        with self.lock:
+            self.resources[href] = body
+            self.revision += 1
+            self.changes.append((self.revision, href))
+
+    def delete(self, href: str) -> bool:
+        with self.lock:
+            if self.resources.pop(href, None) is None:
+                return False
+            self.revision += 1
+            self.changes.append((self.revision, href))
+            return True
+
+    def changed_since(self, sync_token: str) -> set[str]:
+        """
+        Returns the hrefs changed after the given sync token, or raises ValueError for unknown tokens.
+        """
+        if not sync_token.startswith(SYNC_TOKEN_PREFIX):
+            raise ValueError(sync_token)
+        revision = int(sync_token[len(SYNC_TOKEN_PREFIX):])
+        if revision > self.revision:
+            raise ValueError(sync_token)
+        return {href for rev, href in self.changes if rev > revision}
+
+
+def multistatus(responses: list[str], sync_token: str = "") -> bytes:
+    token = f"<d:sync-token>{escape(sync_token)}</d:sync-token>" if sync_token else ""
+    return (
+        '<?xml version="1.0" encoding="utf-8"?>'
+        '<d:multistatus xmlns:d="DAV:" xmlns:c="urn:ietf:params:xml:ns:caldav" '
+        f'xmlns:cs="http://calendarserver.org/ns/">{"".join(responses)}{token}</d:multistatus>'
+    ).encode("utf8")
+
+
+def ok_response(href: str, props: str) -> str:
+    return (
+        f"<d:response><d:href>{escape(href)}</d:href><d:propstat><d:prop>{props}</d:prop>"
+        "<d:status>HTTP/1.1 200 OK</d:status></d:propstat></d:response>"
+    )
+
+
+def make_handler(collection: CalendarCollection) -> type[BaseHTTPRequestHandler]:
+    class CalDAVHandler(BaseHTTPRequestHandler):
+        def _body(self) -> str:
+            return self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf8")
+
+        def _send(self, status: int, body: bytes = b"", content_type: str = "application/xml; charset=utf-8"):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_PROPFIND(self):
+            self._body()
+            if self.headers.get("Depth", "0") == "0":
+                props = (
+                    f"<cs:getctag>{collection.revision}</cs:getctag>"
+                    f"<d:sync-token>{escape(collection.sync_token)}</d:sync-token>"
+                )
+                return self._send(207, multistatus([ok_response(collection.path, props)]))
+            responses = [
+                ok_response(href, f"<d:getetag>{escape(collection.etag(body))}</d:getetag>")
+                for href, body in sorted(collection.resources.items())
+            ]
+            self._send(207, multistatus(responses))
+
+        def do_REPORT(self):
+            root = ET.fromstring(self._body())
+            if root.tag == "{DAV:}sync-collection":
+                try:
+                    changed = collection.changed_since(root.findtext("{DAV:}sync-token", default="").strip())
+                except ValueError:
+                    error = '<d:error xmlns:d="DAV:"><d:valid-sync-token/></d:error>'
+                    return self._send(403, error.encode("utf8"))
+                responses = []
+                for href in sorted(changed):
+                    if href in collection.resources:
+                        etag = collection.etag(collection.resources[href])
+                        responses.append(ok_response(href, f"<d:getetag>{escape(etag)}</d:getetag>"))
+                    else:
+                        responses.append(
+                            f"<d:response><d:href>{escape(href)}</d:href>"
+                            "<d:status>HTTP/1.1 404 Not Found</d:status></d:response>"
+                        )
+                return self._send(207, multistatus(responses, collection.sync_token))
+
+            responses = []
+            for href in (el.text.strip() for el in root.iter("{DAV:}href")):
+                body = collection.resources.get(href)
+                if body is not None:
+                    props = (
+                        f"<d:getetag>{escape(collection.etag(body))}</d:getetag>"
+                        f"<c:calendar-data>{escape(body)}</c:calendar-data>"
+                    )
+                    responses.append(ok_response(href, props))
+            self._send(207, multistatus(responses))
+
+        def do_GET(self):
+            body = collection.resources.get(self.path)
+            if body is None:
+                return self._send(404)
+            self._send(200, body.encode("utf8"), content_type="text/calendar; charset=utf-8")
+
+        def do_PUT(self):
+            collection.put(self.path, self._body())
+            self._send(201)
+
+        def do_DELETE(self):
+            self._send(204 if collection.delete(self.path) else 404)
+
+    return CalDAVHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an ICS file as a minimal CalDAV collection.")
+    parser.add_argument("ics_file", help="ICS file with the initial events")
+    parser.add_argument("--port", type=int, default=5232)
+    parser.add_argument("--collection", default="/calendars/user/", help="Path of the calendar collection")
+    args = parser.parse_args()
+
+    collection = CalendarCollection(args.collection)
+    with open(args.ics_file, "r", encoding="utf8") as f:
+        collection.load(f.read())
+
+    server = ThreadingHTTPServer(("localhost", args.port), make_handler(collection))
+    print(f"Serving {len(collection.resources)} events at http://localhost:{args.port}{args.collection}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
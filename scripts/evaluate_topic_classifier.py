@@ -0,0 +1,105 @@
+"""
+Compares the local topic classifier of `aia25/core/topic_classifier.py` with the LLM guardrail of exercise 4.
+
+Every query is classified locally and by `guardrail_agent`. The script reports how many queries the classifier
+would escalate to the LLM, how often its confident verdicts agree with the LLM and, if the queries are labeled,
+the accuracy of both stages:
+
+    uv run python scripts/evaluate_topic_classifier.py aia25/core/data/topic_eval.jsonl
+
+Queries are read from a JSON lines file with a `text` and an optional `is_relevant` field.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+load_dotenv()
+
+from aia25.bootstrap import *  # noqa: F403,E402
+from agents import Runner  # noqa: E402
+
+from aia25.core.topic_classifier import (  # noqa: E402
+    IRRELEVANT_THRESHOLD,
+    RELEVANT_THRESHOLD,
+    TOPIC_EXAMPLES_PATH,
+    get_topic_classifier,
+)
+from solution_exercise04.my_agents import guardrail_agent  # noqa: E402
+
+
+def load_queries(path: Path) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def llm_verdicts(queries: list[dict], concurrency: int) -> list[tuple[bool, float]]:
+    """
+    Returns the verdict of the guardrail agent and its latency in seconds for every query.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check(text: str) -> tuple[bool, float]:
+        async with semaphore:
+            start = time.perf_counter()
+            result = await Runner.run(guardrail_agent, text)
+            return result.final_output.is_relevant, time.perf_counter() - start
+
+    return await asyncio.gather(*(check(query["text"]) for query in queries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("queries", type=Path, nargs="?", default=TOPIC_EXAMPLES_PATH.parent / "topic_eval.jsonl")
+    parser.add_argument("--relevant-threshold", type=float, default=RELEVANT_THRESHOLD)
+    parser.add_argument("--irrelevant-threshold", type=float, default=IRRELEVANT_THRESHOLD)
+    parser.add_argument("--concurrency", type=int, default=4, help="Parallel requests to the LLM")
+    args = parser.parse_args()
+
+    queries = load_queries(args.queries)
+    classifier = get_topic_classifier()
+
+    start = time.perf_counter()
+    local = [
+        classifier.classify(q["text"], args.relevant_threshold, args.irrelevant_threshold).is_relevant
+        for q in queries
+    ]
+    local_seconds = (time.perf_counter() - start) / len(queries)
+
+    llm = asyncio.run(llm_verdicts(queries, args.concurrency))
+
+    decided = [(query, verdict, llm_verdict) for query, verdict, (llm_verdict, _) in zip(queries, local, llm)
+               if verdict is not None]
+    agreeing = sum(verdict == llm_verdict for _, verdict, llm_verdict in decided)
+
+    print(f"Queries:               {len(queries)}")
+    print(f"Escalated to the LLM:  {len(queries) - len(decided)} ({1 - len(decided) / len(queries):.1%})")
+    print(f"Agreement with LLM:    {agreeing}/{len(decided)} ({agreeing / max(len(decided), 1):.1%})")
+    print(f"Local latency:         {local_seconds * 1e6:.0f} µs per query")
+    print(f"LLM latency:           {sum(seconds for _, seconds in llm) / len(llm) * 1e3:.0f} ms per query")
+
+    labeled = [(q["is_relevant"], v, llm_verdict) for q, v, (llm_verdict, _) in zip(queries, local, llm)
+               if "is_relevant" in q]
+    if labeled:
+        local_labeled = [(label, v) for label, v, _ in labeled if v is not None]
+        local_correct = sum(label == v for label, v in local_labeled)
+        llm_correct = sum(label == llm_verdict for label, _, llm_verdict in labeled)
+        print(f"Local accuracy:        {local_correct}/{len(local_labeled)} confident verdicts")
+        print(f"LLM accuracy:          {llm_correct}/{len(labeled)}")
+
+    disagreements = [query["text"] for query, verdict, llm_verdict in decided if verdict != llm_verdict]
+    if disagreements:
+        print("\nDisagreements with the LLM:")
+        for text in disagreements:
+            print(f"  - {text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+A local stand-in for the OpenAI-compatible LLM endpoint, to load-test the app and the agents without network
+access and without paying for tokens.
+
+The server answers chat completion requests, streamed or not, with text, tool calls or structured outputs, at a
+configurable first-token latency and token rate:
+
+    python scripts/mock_llm_server.py --port 8400 --first-token-latency 0.4 --tokens-per-second 60
+    BASE_URL=http://localhost:8400/v1 OPENROUTER_API_KEY=mock uv run app
+
+The turns are scripted in a JSON lines file. The first rule matching the request is replayed, a rule matches if
+its `system` and `user` regular expressions are found in the first system message and the last user message, and
+`step` is the number of assistant messages since the last user message (the position in the agent loop), one
+rule per line (the first one is wrapped here):
+
+    {"system": "public transport assistant", "user": "Bern", "step": 0,
+     "turn": {"tool_calls": [{"name": "get_connections", "arguments": {"start": "Bern", "end": "Zürich",
+              "date": "2025-10-01", "time": "08:00", "is_arrival_time": false}}]}}
+    {"system": "public transport assistant", "user": "Bern", "turn": {"content": "Take the 08:02 from platform 7."}}
+    {"system": "determines if user queries are relevant", "turn": {"output": {"is_relevant": true, "reasoning": ""}}}
+
+Rules with tool calls should set `step`, otherwise the agent calls the tools again and again. Without a matching
+rule, structured outputs are synthesized from the requested JSON schema (booleans true, optional values null) and
+everything else is answered with a short text.
+
+Turns can also be recorded from the real endpoint, in the same format, and replayed later:
+
+    python scripts/mock_llm_server.py --upstream https://openrouter.ai/api/v1 --record turns.jsonl
+    python scripts/mock_llm_server.py --script turns.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import re
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+CHARS_PER_TOKEN = 4  # Rough size of a token, the text is streamed in chunks of this size
+SYSTEM_PATTERN_CHARS = 80  # Length of the system message prefix recorded to recognize the agent
+
+
+def message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+class Conversation:
+    """
+    The parts of a chat completion request the rules are matched against.
+    """
+
+    def __init__(self, request: dict):
+        messages = request.get("messages", [])
+        user_indices = [i for i, m in enumerate(messages) if m.get("role") == "user"]
+        last_user = user_indices[-1] if user_indices else -1
+        self.system = next((message_text(m) for m in messages if m.get("role") in ("system", "developer")), "")
+        self.user = message_text(messages[last_user]) if user_indices else ""
+        self.step = sum(1 for m in messages[last_user + 1 :] if m.get("role") == "assistant")
+
+        response_format = request.get("response_format") or {}
+        self.schema = (response_format.get("json_schema") or {}).get("schema")
+        if self.schema is None and response_format.get("type") == "json_object":
+            self.schema = {"type": "object"}
+
+
+class Script:
+    """
+    The scripted (or recorded) turns, see the module docstring for the format.
+    """
+
+    def __init__(self, rules: Optional[list[dict]] = None):
+        self.rules = rules or []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str) -> "Script":
+        with open(path, encoding="utf8") as f:
+            return cls([json.loads(line) for line in f if line.strip()])
+
+    def find(self, conversation: Conversation) -> Optional[dict]:
+        for rule in self.rules:
+            if "step" in rule and rule["step"] != conversation.step:
+                continue
+            if re.search(rule.get("system", ""), conversation.system) and re.search(
+                rule.get("user", ""), conversation.user
+            ):
+                return rule["turn"]
+        return None
+
+    def record(self, conversation: Conversation, turn: dict, path: str):
+        rule = {
+            "system": re.escape(conversation.system[:SYSTEM_PATTERN_CHARS]),
+            "user": re.escape(conversation.user),
+            "step": conversation.step,
+            "turn": turn,
+        }
+        with self._lock:
+            self.rules.append(rule)
+            with open(path, "a", encoding="utf8") as f:
+                f.write(json.dumps(rule, ensure_ascii=False) + "\n")
+
+
+def synthesize(schema: dict, definitions: dict) -> Any:
+    """
+    Returns a minimal instance of a JSON schema, as generated by pydantic for the agents' output types.
+    """
+    if "$ref" in schema:
+        return synthesize(definitions[schema["$ref"].split("/")[-1]], definitions)
+    if "default" in schema:
+        return schema["default"]
+    if "enum" in schema:
+        return schema["enum"][0]
+    options = schema.get("anyOf") or schema.get("oneOf")
+    if options:
+        if any(option.get("type") == "null" for option in options):
+            return None
+        return synthesize(options[0], definitions)
+
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {name: synthesize(prop, definitions) for name, prop in schema.get("properties", {}).items()}
+    if kind == "array":
+        return [synthesize(schema["items"], definitions)] if "items" in schema else []
+    return {"string": "mock", "integer": 0, "number": 0, "boolean": True}.get(kind)
+
+
+def default_turn(conversation: Conversation) -> dict:
+    if conversation.schema is not None:
+        return {"output": synthesize(conversation.schema, conversation.schema.get("$defs", {}))}
+    return {"content": f"This is a mock answer to: {conversation.user[:200]}"}
+
+
+def fetch_turn(upstream: str, request: dict, authorization: str) -> dict:
+    """
+    Requests a turn from the real endpoint, without streaming, and returns it in the script format.
+    """
+    body = dict(request, stream=False)
+    body.pop("stream_options", None)
+    http_request = urllib.request.Request(
+        f"{upstream.rstrip('/')}/chat/completions",
+        data=json.dumps(body).encode("utf8"),
+        headers={"Content-Type": "application/json", "Authorization": authorization},
+    )
+    with urllib.request.urlopen(http_request, timeout=120) as response:
+        message = json.loads(response.read())["choices"][0]["message"]
+
+    turn = {"content": message.get("content") or ""}
+    if message.get("tool_calls"):
+        turn["tool_calls"] = [
+            {"name": call["function"]["name"], "arguments": json.loads(call["function"]["arguments"] or "{}")}
+            for call in message["tool_calls"]
+        ]
+    return turn
+
+
+def chunk_text(text: str) -> list[str]:
+    return [text[i : i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+
+class Pacing:
+    """
+    Simulates the latency of the model: the time to the first token and the time per token after that.
+    """
+
+    def __init__(self, first_token_latency: float, tokens_per_second: float):
+        self.first_token_latency = first_token_latency
+        self.token_interval = 1.0 / tokens_per_second if tokens_per_second > 0 else 0.0
+
+    def first_token(self):
+        time.sleep(self.first_token_latency)
+
+    def next_token(self):
+        time.sleep(self.token_interval)
+
+    def whole_turn(self, tokens: int):
+        time.sleep(self.first_token_latency + max(tokens - 1, 0) * self.token_interval)
+
+
+def make_handler(script: Script, pacing: Pacing, upstream: Optional[str], record_path: Optional[str]):
+    completion_ids = itertools.count(1)
+
+    class MockLLMHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Keeps connections open like the real endpoint
+
+        def _send_json(self, status: int, payload: dict):
+            body = json.dumps(payload).encode("utf8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_chunk(self, payload: Any):
+            data = f"data: {payload if isinstance(payload, str) else json.dumps(payload)}\n\n".encode("utf8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+        def do_GET(self):
+            if self.path.rstrip("/").endswith("/models"):
+                return self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model"}]})
+            self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                return self._send_json(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            conversation = Conversation(request)
+            turn = script.find(conversation)
+            if turn is None and upstream:
+                turn = fetch_turn(upstream, request, self.headers.get("Authorization", ""))
+                if record_path:
+                    script.record(conversation, turn, record_path)
+            turn = turn or default_turn(conversation)
+
+            content = json.dumps(turn["output"]) if "output" in turn else turn.get("content", "")
+            tool_calls = [
+                {
+                    "id": f"call_{next(completion_ids)}",
+                    "type": "function",
+                    "function": {"name": call["name"], "arguments": json.dumps(call.get("arguments", {}))},
+                }
+                for call in turn.get("tool_calls", [])
+            ]
+            arguments = "".join(call["function"]["arguments"] for call in tool_calls)
+            prompt_tokens = len(json.dumps(request.get("messages", []))) // CHARS_PER_TOKEN
+            completion_tokens = len(chunk_text(content + arguments))
+            completion = {
+                "id": f"chatcmpl-mock-{next(completion_ids)}",
+                "created": int(time.time()),
+                "model": request.get("model", "mock"),
+                "finish_reason": "tool_calls" if tool_calls else "stop",
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+
+            try:
+                if request.get("stream"):
+                    self._stream(completion, content, tool_calls, request.get("stream_options") or {})
+                else:
+                    self._complete(completion, content, tool_calls)
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True  # The client gave up, e.g. at its request deadline
+
+        def _complete(self, completion: dict, content: str, tool_calls: list[dict]):
+            pacing.whole_turn(completion["usage"]["completion_tokens"])
+            message = {"role": "assistant", "content": content or None}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            self._send_json(
+                200,
+                {
+                    "id": completion["id"],
+                    "object": "chat.completion",
+                    "created": completion["created"],
+                    "model": completion["model"],
+                    "choices": [{"index": 0, "message": message, "finish_reason": completion["finish_reason"]}],
+                    "usage": completion["usage"],
+                },
+            )
+
+        def _stream(self, completion: dict, content: str, tool_calls: list[dict], stream_options: dict):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            def chunk(delta: dict, finish_reason: Optional[str] = None) -> dict:
+                return {
+                    "id": completion["id"],
+                    "object": "chat.completion.chunk",
+                    "created": completion["created"],
+                    "model": completion["model"],
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+
+            pacing.first_token()
+            self._send_chunk(chunk({"role": "assistant", "content": ""}))
+            for i, text in enumerate(chunk_text(content)):
+                if i:
+                    pacing.next_token()
+                self._send_chunk(chunk({"content": text}))
+            for index, call in enumerate(tool_calls):
+                header = {"index": index, "id": call["id"], "type": "function"}
+                self._send_chunk(chunk({"tool_calls": [dict(header, function={"name": call["function"]["name"]})]}))
+                for text in chunk_text(call["function"]["arguments"]):
+                    pacing.next_token()
+                    self._send_chunk(chunk({"tool_calls": [{"index": index, "function": {"arguments": text}}]}))
+            self._send_chunk(chunk({}, completion["finish_reason"]))
+
+            if stream_options.get("include_usage"):
+                self._send_chunk(dict(chunk({}), choices=[], usage=completion["usage"]))
+            self._send_chunk("[DONE]")
+            self.wfile.write(b"0\r\n\r\n")
+
+    return MockLLMHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve scripted or recorded model turns as an OpenAI-compatible API.")
+    parser.add_argument("--port", type=int, default=8400)
+    parser.add_argument("--script", help="JSON lines file with the turns to replay")
+    parser.add_argument("--first-token-latency", type=float, default=0.5, help="Seconds until the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="Rate of the generated tokens")
+    parser.add_argument("--upstream", help="Endpoint to request turns from that are not in the script")
+    parser.add_argument("--record", help="JSON lines file to append the turns requested from the upstream to")
+    args = parser.parse_args()
+
+    script = Script.load(args.script) if args.script else Script()
+    handler = make_handler(script, Pacing(args.first_token_latency, args.tokens_per_second), args.upstream, args.record)
+    server = ThreadingHTTPServer(("localhost", args.port), handler)
+    server.daemon_threads = True
+    print(f"Serving {len(script.rules)} scripted turns at http://localhost:{args.port}/v1")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,18 @@
-import asyncio
 from datetime import datetime
+from functools import partial
+from pathlib import Path
 from textwrap import dedent
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
-from agents import Agent, RunContextWrapper, Runner, TResponseInputItem
-from pydantic import BaseModel
+from agents import Agent, TResponseInputItem
+
+from aia25.core.agent_graph import DeferredAgentTool
+from aia25.core.agent_tools import AGENT_TOOL_CACHE_TTL, AGENT_TOOL_REALTIME_TTL, agent_tool
+from aia25.core.context import GlobalContext, calendar_version
+from aia25.core.model_routing import apply_model_routing
+from aia25.core.pipeline import AGENT_MODE, PIPELINE_MODE, run_pipeline
+from aia25.core.planning import apply_planning_mode
+from aia25.core.streaming import TokenStream, run_agent
 
 from .my_tools import (
     MCPServerRepository,
@@ -15,37 +23,24 @@ from .my_tools import (
 )
 
 
-class GlobalContext(BaseModel):
+# Static, so the prompt prefix can be cached. The date and time follow the request in a context message.
+scheduling_agent_system_prompt = dedent(
     """
-    This class holds the global context for the agent, including the current date and time.
-    It is used to provide context to the agent during its execution.
+    You are a scheduling assistant that optimizes transport recommendations based on calendar appointments.
+    The current date and time are given in a context message after the request.
+
+    # Tasks
+    - Evaluate transport options against calendar appointments
+    - Recommend optimal connections with rationale
+    - Ensure journey-appointment alignment
+
+    # Process
+    1. For travel requests: Use YYYY-MM-DD format. Retrieve calendar appointments for specified date.
+    2. Analyze connections for: appointment conflicts, 15+ min buffers, journey duration, transfers, reliability.
+    3. Recommend with: connection details, selection rationale, and schedule considerations.
+    4. If no appointments exist, select the most efficient connection.
     """
-
-    current_date: str = ""  # Date in YYYY-MM-DD format
-    current_time: str = ""  # Time in HH:MM:SS format
-
-
-def scheduling_agent_system_prompt(context: RunContextWrapper[GlobalContext], agent: Agent[GlobalContext]) -> str:
-    ctx = context.context
-    return dedent(
-        f"""
-        You are a scheduling assistant that optimizes transport recommendations based on calendar appointments.
-
-        Current date: {ctx.current_date}
-        Current time: {ctx.current_time}
-
-        # Tasks
-        - Evaluate transport options against calendar appointments
-        - Recommend optimal connections with rationale
-        - Ensure journey-appointment alignment
-
-        # Process
-        1. For travel requests: Use YYYY-MM-DD format. Retrieve calendar appointments for specified date.
-        2. Analyze connections for: appointment conflicts, 15+ min buffers, journey duration, transfers, reliability.
-        3. Recommend with: connection details, selection rationale, and schedule considerations.
-        4. If no appointments exist, select the most efficient connection.
-        """
-    )
+)
 
 
 scheduling_agent = Agent(
@@ -55,37 +50,32 @@ scheduling_agent = Agent(
 )
 
 
-def public_transport_agent_system_prompt(
-    context: RunContextWrapper[GlobalContext], agent: Agent[GlobalContext]
-) -> str:
-    ctx = context.context
-    return dedent(
-        f"""You are a public transport assistant that helps users find the best public transport
-        connections based on their needs. Whenever you receive a query, you first think about it
-        and figure out what the user is asking for. Then you either directly answer the question
-        if you know the answer, or you make a plan in which order you will call the tools to get
-        the required information. If there is no combination of tool calls that can help you
-        answer the questions, you should ask the user for more information. If you are unsure about
-        the start or end location or about the specific travel date and time that you should use in
-        the tool calls, you should ask the user for clarification.
-
-        Current date: {ctx.current_date}
-        Current time: {ctx.current_time}
-
-        You have access to the following tools:
-        - think: Use this tool for planning and observing the current state of the conversation.
-        - get_connections: Find the best public transport connections between two locations.
-        - ask_for_clarification: Ask the user for more information if needed.
-
-        If you leave the date and time empty, the current date and time will be used.
-
-        Never call a tool twice with the same parameters. Always inspect the tool output and
-        ask yourself whether that already answers the user's question. If it does, stop calling tools and
-        synthesize the information into a clear response. Provide a final answer to the user's query.
-
-        Whenever you plan something, immediately follow up with the plan before answering the question.
-        """
-    )
+public_transport_agent_system_prompt = dedent(
+    """You are a public transport assistant that helps users find the best public transport
+    connections based on their needs. Whenever you receive a query, you first think about it
+    and figure out what the user is asking for. Then you either directly answer the question
+    if you know the answer, or you make a plan in which order you will call the tools to get
+    the required information. If there is no combination of tool calls that can help you
+    answer the questions, you should ask the user for more information. If you are unsure about
+    the start or end location or about the specific travel date and time that you should use in
+    the tool calls, you should ask the user for clarification.
+
+    The current date and time are given in a context message after the request.
+
+    You have access to the following tools:
+    - think: Use this tool for planning and observing the current state of the conversation.
+    - get_connections: Find the best public transport connections between two locations.
+    - ask_for_clarification: Ask the user for more information if needed.
+
+    If you leave the date and time empty, the current date and time will be used.
+
+    Never call a tool twice with the same parameters. Always inspect the tool output and
+    ask yourself whether that already answers the user's question. If it does, stop calling tools and
+    synthesize the information into a clear response. Provide a final answer to the user's query.
+
+    Whenever you plan something, immediately follow up with the plan before answering the question.
+    """
+)
 
 
 public_transport_agent = Agent(
@@ -111,6 +101,13 @@ class OpenStreetMapAgent(Agent):
         )
 
 
+async def create_open_street_map_agent() -> Agent:
+    agent = await OpenStreetMapAgent.setup()
+    apply_model_routing(agent)
+    apply_planning_mode(agent)
+    return agent
+
+
 triage_agent_system_prompt = """
 You are a smart assistant that helps users plan their trips based on public transport
 schedules, their calendar appointments, and other relevant information. You can make use
@@ -134,51 +131,95 @@ triage_agent = Agent(
     tools=[
         think,
         ask_for_clarification,
-        public_transport_agent.as_tool(
+        agent_tool(
+            public_transport_agent,
             tool_name="find_transport_routes",
             tool_description="Find public transport routes between two locations for a specific date and time",
+            ttl=AGENT_TOOL_REALTIME_TTL,
         ),
-        scheduling_agent.as_tool(
+        agent_tool(
+            scheduling_agent,
             tool_name="select_best_connection",
             tool_description=(
                 "Select the optimal transport connection by first getting the user's appointments and "
                 "then determine the connection that best fits with the user's calendar appointments"
             ),
-        ),
-        asyncio.run(OpenStreetMapAgent.setup()).as_tool(
-            tool_name="explore_locations",
-            tool_description=(
-                "Find information about locations. Can be used to geocode addresses, find nearby places, "
-                "get walking directions from point A to B, and suggest meeting spots for two people in "
-                "different locations."
+            ttl=AGENT_TOOL_CACHE_TTL,
+            cache_version=partial(
+                calendar_version, default_calendar_path=Path(__file__).parent / "ExampleCalendar.ics"
             ),
         ),
     ]
 )
 
 
-async def execute_agent(user_input: str, history: List[Dict[str, str]]) -> tuple[Any, list[TResponseInputItem]]:
+# The OpenStreetMap agent needs its MCP server, it is added to the triage agent once the server has started
+explore_locations = DeferredAgentTool(
+    triage_agent,
+    create_open_street_map_agent,
+    lambda agent: agent_tool(
+        agent,
+        tool_name="explore_locations",
+        tool_description=(
+            "Find information about locations. Can be used to geocode addresses, find nearby places, "
+            "get walking directions from point A to B, and suggest meeting spots for two people in "
+            "different locations."
+        ),
+        ttl=AGENT_TOOL_CACHE_TTL,
+    ),
+)
+
+apply_model_routing(triage_agent, public_transport_agent, scheduling_agent)
+apply_planning_mode(triage_agent, public_transport_agent, scheduling_agent)
+
+
+async def execute_agent(
+    user_input: str,
+    history: List[Dict[str, str]],
+    stream: Optional[TokenStream] = None,
+    mode: str = AGENT_MODE,
+) -> tuple[Any, list[TResponseInputItem]]:
     """
     Executes the main agent with the given input and returns the response and the updated history.
 
     Args:
         user_input: The user's message
         history: The conversation history
+        stream: Where to stream the answer to while it is generated, the answer is not streamed if None
+        mode: AGENT_MODE lets the triage agent call its sub-agents, PIPELINE_MODE gathers the data of trip
+            requests in parallel and answers with a single model call
 
     Returns:
         A tuple containing (response_message, updated_history)
         the history should not be updated
     """
+    # Starts the OpenStreetMap agent in the background if the module was not loaded from an event loop
+    explore_locations.start()
+
     current_history = history + [{"role": "user", "content": user_input}]
 
     current_datetime = datetime.now()
     date_only = current_datetime.strftime("%Y-%m-%d")
     time_only = current_datetime.strftime("%H:%M:%S")
+    context = GlobalContext.for_session(current_date=date_only, current_time=time_only)
+
+    if mode == PIPELINE_MODE:
+        # Requests that are not about a concrete trip are left to the triage agent
+        answer = await run_pipeline(
+            current_history,
+            context,
+            Path(__file__).parent / "ExampleCalendar.ics",
+            explore_locations.agent,
+            stream=stream,
+        )
+        if answer is not None:
+            return answer
 
-    result = await Runner.run(
+    result = await run_agent(
         starting_agent=triage_agent,
         input=current_history,
-        context=GlobalContext(current_date=date_only, current_time=time_only),
+        context=context,
+        stream=stream,
     )
 
     return result.final_output, result.to_input_list()
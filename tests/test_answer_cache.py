@@ -0,0 +1,101 @@
+import json
+import unittest
+
+import httpx
+from agents import Agent, OpenAIChatCompletionsModel, function_tool
+from openai import AsyncOpenAI
+
+from aia25.core.answer_cache import AnswerCache, tools_called
+from aia25.core.clarification import ClarificationRequested, SuspendedRun, report_tool_error, watch_clarifications
+from aia25.core.streaming import run_agent
+
+QUESTION = "Next train from Bern to Zürich"
+SCOPE = "exercise:agent"
+
+
+def tool_call_completion(request: httpx.Request) -> httpx.Response:
+    """
+    Answers every chat completion request with a call of the `ask_for_clarification` tool.
+    """
+    body = json.loads(request.content)
+    call = {"id": "call_1", "type": "function", "function": {"name": "ask_for_clarification", "arguments": "{}"}}
+    completion = {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": body["model"],
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": None, "tool_calls": [call]},
+                "finish_reason": "tool_calls",
+            }
+        ],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    }
+    return httpx.Response(200, json=completion)
+
+
+@function_tool(failure_error_function=report_tool_error)
+async def ask_for_clarification() -> str:
+    """
+    Asks the user from which station they want to leave.
+    """
+    raise ClarificationRequested("From which station in Bern do you want to leave?")
+
+
+class AnswerCacheTest(unittest.TestCase):
+    def test_similar_question_is_answered_from_cache(self):
+        cache = AnswerCache()
+        cache.store(QUESTION, "Take the 08:02.", SCOPE, "alice", {"find_transport_routes"})
+
+        self.assertEqual(cache.lookup("next train from bern to zurich?", SCOPE, "bob"), "Take the 08:02.")
+        self.assertIsNone(cache.lookup("next train from Bern to Basel", SCOPE, "bob"))
+
+    def test_negated_or_qualified_question_is_not_answered_from_cache(self):
+        pairs = [
+            ("Is there a direct train from Bern to Zürich?", "Is there no direct train from Bern to Zürich?"),
+            ("Is there a direct train from Bern to Zürich?", "Isn't there a direct train from Bern to Zürich?"),
+            ("Next train from Bern to Zürich with bike", "Next train from Bern to Zürich without bike"),
+        ]
+        for question, opposite in pairs:
+            with self.subTest(question=question, opposite=opposite):
+                cache = AnswerCache()
+                cache.store(question, "Yes, the IC 8.", SCOPE, "alice", {"find_transport_routes"})
+
+                self.assertIsNone(cache.lookup(opposite, SCOPE, "bob"))
+
+
+class SuspendedRunTest(unittest.IsolatedAsyncioTestCase):
+    async def test_clarification_question_is_not_cached(self):
+        client = AsyncOpenAI(
+            api_key="test",
+            base_url="http://llm.test/v1",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(tool_call_completion)),
+        )
+        agent = Agent(
+            name="Public Transport Agent",
+            model=OpenAIChatCompletionsModel("mock", client),
+            tools=[ask_for_clarification],
+        )
+        cache = AnswerCache()
+
+        clarifications = watch_clarifications()
+        result = await run_agent(agent, QUESTION)
+        cache.store(
+            QUESTION,
+            result.final_output,
+            SCOPE,
+            "alice",
+            tools_called(result.to_input_list()),
+            suspended=bool(clarifications),
+        )
+
+        self.assertIsInstance(result, SuspendedRun)
+        self.assertEqual(clarifications, [result.final_output])
+        self.assertIsNone(cache.lookup(QUESTION, SCOPE, "bob"))
+        self.assertEqual(cache.stats()["skipped"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
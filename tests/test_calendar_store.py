@@ -0,0 +1,86 @@
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+from aia25.core.calendar_client import CalendarEvent
+from aia25.core.calendar_store import CalendarStore, iter_ics_lines, iter_vevents, parse_ics_text
+
+CALENDAR = (
+    "BEGIN:VCALENDAR\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:meeting\r\n"
+    "DTSTART;TZID=Europe/Zurich:20250910T090000\r\n"
+    "DURATION:PT1H30M\r\n"
+    "SUMMARY:Team meeting in Zür\r\n"
+    " ich\r\n"
+    "LOCATION:Bahnhofstrasse 1\\, Zürich\r\n"
+    "BEGIN:VALARM\r\n"
+    "SUMMARY:Reminder\r\n"
+    "END:VALARM\r\n"
+    "END:VEVENT\r\n"
+    "BEGIN:VEVENT\r\n"
+    "UID:holiday\r\n"
+    "DTSTART;VALUE=DATE:20250911\r\n"
+    "SUMMARY:Holiday\r\n"
+    "END:VEVENT\r\n"
+    "END:VCALENDAR\r\n"
+)
+
+MEETING = CalendarEvent(
+    start=datetime(2025, 9, 10, 7, 0),
+    end=datetime(2025, 9, 10, 8, 30),
+    name="Team meeting in Zürich",
+    location="Bahnhofstrasse 1, Zürich",
+)
+HOLIDAY = CalendarEvent(start=datetime(2025, 9, 11), end=datetime(2025, 9, 12), name="Holiday", location="")
+
+
+class IcsParserTest(unittest.TestCase):
+    def test_events_are_parsed(self):
+        self.assertEqual(parse_ics_text(CALENDAR), [("meeting", MEETING), ("holiday", HOLIDAY)])
+
+    def test_chunk_boundaries_do_not_change_the_lines(self):
+        data = CALENDAR.encode("utf8")
+        expected = list(iter_ics_lines([data]))
+        for size in (1, 2, 3, 7, 64):
+            with self.subTest(size=size):
+                chunks = [data[i : i + size] for i in range(0, len(data), size)]
+                self.assertEqual(list(iter_ics_lines(chunks)), expected)
+
+    def test_nested_components_and_events_without_start_are_skipped(self):
+        lines = ["BEGIN:VEVENT", "SUMMARY:No start", "END:VEVENT", *iter_ics_lines([CALENDAR.encode("utf8")])]
+        self.assertEqual([uid for uid, _ in iter_vevents(lines)], ["meeting", "holiday"])
+
+
+class CalendarStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        self.store = CalendarStore(self.directory / "store.sqlite")
+
+    def test_ingest_replaces_events_and_bumps_revision(self):
+        source = self.directory / "calendar.ics"
+        source.write_text(CALENDAR, encoding="utf8")
+
+        self.assertEqual(self.store.ingest(str(source)), 2)
+        self.assertEqual(self.store.ingest(str(source)), 2)
+
+        self.assertEqual(self.store.revision, 2)
+        self.assertTrue(self.store.is_complete)
+        self.assertEqual(self.store.list_events(datetime(2025, 9, 10), datetime(2025, 9, 10, 8)), [MEETING])
+
+    def test_changes_are_applied_per_resource(self):
+        self.store.apply_changes({"/a.ics": ("1", [("meeting", MEETING)]), "/b.ics": ("1", [("holiday", HOLIDAY)])})
+        moved = MEETING._replace(start=datetime(2025, 9, 10, 12), end=datetime(2025, 9, 10, 13))
+        self.store.apply_changes({"/a.ics": ("2", [("meeting", moved)])}, deleted=["/b.ics"], meta={"token": "t2"})
+
+        self.assertEqual(self.store.revision, 2)
+        self.assertEqual(self.store.resource_etags(), {"/a.ics": "2"})
+        self.assertEqual(self.store.get_meta("token"), "t2")
+        self.assertEqual(self.store.list_events(datetime(2025, 9, 1), datetime(2025, 9, 30)), [moved])
+
+
+if __name__ == "__main__":
+    unittest.main()
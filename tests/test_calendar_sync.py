@@ -0,0 +1,103 @@
+import importlib.util
+import tempfile
+import threading
+import unittest
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from aia25.core.calendar_store import CalendarStore
+from aia25.core.calendar_sync import MULTIGET_BATCH_SIZE, CalDAVClient, CalendarSync, SyncResult
+
+_spec = importlib.util.spec_from_file_location(
+    "caldav_stub_server", Path(__file__).resolve().parent.parent / "scripts" / "caldav_stub_server.py"
+)
+caldav_stub_server = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(caldav_stub_server)
+
+COLLECTION = "/calendars/user/"
+EVENT_COUNT = MULTIGET_BATCH_SIZE * 2 + 1
+
+
+def event(uid: str, hour: int, summary: str) -> str:
+    return "\r\n".join(
+        ["BEGIN:VEVENT", f"UID:{uid}", f"DTSTART:20250910T{hour:02d}0000Z", f"DTEND:20250910T{hour:02d}3000Z",
+         f"SUMMARY:{summary}", "END:VEVENT"]
+    )
+
+
+def calendar(*events: str) -> str:
+    return "\r\n".join(["BEGIN:VCALENDAR", "VERSION:2.0", *events, "END:VCALENDAR", ""])
+
+
+class CalendarSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.collection = caldav_stub_server.CalendarCollection(COLLECTION)
+        self.collection.load(calendar(*(event(f"event{i}", i % 24, f"Event {i}") for i in range(EVENT_COUNT))))
+
+        self.reports: list[str] = []  # Root element of every REPORT request
+        handler = caldav_stub_server.make_handler(self.collection)
+        reports = self.reports
+
+        class RecordingHandler(handler):
+            def _body(self):
+                body = super()._body()
+                if self.command == "REPORT":
+                    reports.append(ET.fromstring(body).tag.split("}")[1])
+                return body
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer(("localhost", 0), RecordingHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = CalendarStore(Path(directory.name) / "store.sqlite")
+        client = CalDAVClient(f"http://localhost:{server.server_address[1]}{COLLECTION}")
+        self.sync = CalendarSync(self.store, client)
+
+    def all_events(self):
+        return self.store.list_events(datetime(2025, 9, 1), datetime(2025, 9, 30))
+
+    def test_first_sync_downloads_everything_in_batches(self):
+        self.assertEqual(self.sync.sync(), SyncResult(changed=EVENT_COUNT, deleted=0, full=True))
+
+        self.assertEqual(len(self.all_events()), EVENT_COUNT)
+        self.assertEqual(self.reports, ["calendar-multiget"] * 3)
+
+    def test_unchanged_collection_is_short_circuited_by_ctag(self):
+        self.sync.sync()
+        self.reports.clear()
+
+        self.assertEqual(self.sync.sync(), SyncResult(changed=0, deleted=0, full=False))
+        self.assertEqual(self.reports, [])
+
+    def test_only_the_delta_is_transferred(self):
+        self.sync.sync()
+        self.reports.clear()
+        self.collection.put(f"{COLLECTION}event1.ics", calendar(event("event1", 1, "Moved")))
+        self.collection.delete(f"{COLLECTION}event2.ics")
+
+        self.assertEqual(self.sync.sync(), SyncResult(changed=1, deleted=1, full=False))
+        self.assertEqual(self.reports, ["sync-collection", "calendar-multiget"])
+        names = [e.name for e in self.all_events()]
+        self.assertIn("Moved", names)
+        self.assertNotIn("Event 1", names)
+        self.assertNotIn("Event 2", names)
+
+    def test_invalid_sync_token_falls_back_to_etag_comparison(self):
+        self.sync.sync()
+        self.store.apply_changes({}, meta={"ctag": "", "sync_token": "unknown"})
+        self.collection.put(f"{COLLECTION}event1.ics", calendar(event("event1", 1, "Moved")))
+
+        self.assertEqual(self.sync.sync(), SyncResult(changed=1, deleted=0, full=True))
+        self.assertEqual(len(self.all_events()), EVENT_COUNT)
+
+
+if __name__ == "__main__":
+    unittest.main()
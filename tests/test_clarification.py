@@ -0,0 +1,98 @@
+import json
+import unittest
+
+import httpx
+from agents import Agent, OpenAIChatCompletionsModel, RunContextWrapper, function_tool
+from openai import AsyncOpenAI
+
+from aia25.core.clarification import ClarificationRequested, SuspendedRun, report_tool_error, watch_clarifications
+from aia25.core.streaming import run_agent
+
+QUESTION = "Which station in Bern do you mean?"
+
+
+def tool_call_model(name: str, arguments: dict) -> OpenAIChatCompletionsModel:
+    """
+    A model that answers every request with a call of the tool `name`.
+    """
+
+    def complete(request: httpx.Request) -> httpx.Response:
+        tool_call = {"id": "call_1", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+        completion = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "mock",
+            "choices": [
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": None, "tool_calls": [tool_call]},
+                    "finish_reason": "tool_calls",
+                }
+            ],
+        }
+        return httpx.Response(200, json=completion)
+
+    client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://llm.test/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(complete)),
+    )
+    return OpenAIChatCompletionsModel("mock", client)
+
+
+@function_tool(failure_error_function=report_tool_error)
+async def ask(question: str) -> str:
+    """
+    Ask the user a question.
+    """
+    raise ClarificationRequested(question)
+
+
+asking_agent = Agent(name="Scheduling Agent", model=tool_call_model("ask", {"question": QUESTION}), tools=[ask])
+
+
+@function_tool(failure_error_function=report_tool_error)
+async def schedule(request: str) -> str:
+    """
+    Ask the scheduling agent.
+    """
+    result = await run_agent(asking_agent, request)
+    return str(result.final_output)
+
+
+class ClarificationTest(unittest.IsolatedAsyncioTestCase):
+    async def test_run_is_suspended_with_question(self):
+        questions = watch_clarifications()
+
+        result = await run_agent(asking_agent, "Next train to Bern")
+
+        self.assertIsInstance(result, SuspendedRun)
+        self.assertEqual(result.final_output, QUESTION)
+        self.assertEqual(result.to_input_list()[0], {"role": "user", "content": "Next train to Bern"})
+        self.assertEqual(result.to_input_list()[-1], {"role": "assistant", "content": QUESTION})
+        self.assertEqual(questions, [QUESTION])
+
+    async def test_sub_agent_question_suspends_outermost_run(self):
+        triage_agent = Agent(
+            name="Triage Agent", model=tool_call_model("schedule", {"request": "Next train to Bern"}), tools=[schedule]
+        )
+
+        result = await run_agent(triage_agent, "Next train to Bern")
+
+        self.assertIsInstance(result, SuspendedRun)
+        self.assertEqual(result.final_output, QUESTION)
+        self.assertEqual(result.to_input_list()[-1], {"role": "assistant", "content": QUESTION})
+
+
+class ReportToolErrorTest(unittest.TestCase):
+    def test_only_clarifications_are_raised(self):
+        context = RunContextWrapper(context=None)
+
+        with self.assertRaises(ClarificationRequested):
+            report_tool_error(context, ClarificationRequested(QUESTION))
+        self.assertIn("timed out", report_tool_error(context, TimeoutError("timed out")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import time
+import unittest
+from types import SimpleNamespace
+
+import httpx
+from agents import Agent, OpenAIChatCompletionsModel
+from openai import AsyncOpenAI
+
+from aia25.core.context import GlobalContext
+from aia25.core.deadline import TIMEOUT_ANSWER, PartialRun, bounded_timeout, time_left
+from aia25.core.streaming import run_agent
+
+STREAMED = "Take the 08:02 IC 1"
+
+
+class StalledStream(httpx.AsyncByteStream):
+    """
+    A streamed completion that sends its first text delta and then hangs.
+    """
+
+    async def __aiter__(self):
+        chunk = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion.chunk",
+            "created": 0,
+            "model": "mock",
+            "choices": [{"index": 0, "delta": {"role": "assistant", "content": STREAMED}, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n".encode()
+        await asyncio.sleep(10)
+
+
+async def stalled_completion(request: httpx.Request) -> httpx.Response:
+    if json.loads(request.content).get("stream"):
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, stream=StalledStream())
+    await asyncio.sleep(10)
+    return httpx.Response(500)
+
+
+class FakeTokenStream:
+    def __init__(self):
+        self.message = SimpleNamespace(content="")
+
+    async def send_token(self, token: str):
+        self.message.content += token
+
+
+class DeadlineTest(unittest.TestCase):
+    def test_time_left(self):
+        self.assertIsNone(time_left(None))
+        self.assertAlmostEqual(time_left(time.monotonic() + 10, reserve=4), 6, delta=0.1)
+        self.assertEqual(time_left(time.monotonic() + 1, reserve=4), 0.0)
+
+    def test_bounded_timeout(self):
+        self.assertEqual(bounded_timeout(15, None), 15)
+        self.assertAlmostEqual(bounded_timeout(15, time.monotonic() + 10, reserve=4), 6, delta=0.1)
+        self.assertEqual(bounded_timeout(15, time.monotonic() + 100, reserve=4), 15)
+        # Past the deadline, calls still get a minimal timeout instead of an invalid one
+        self.assertEqual(bounded_timeout(15, time.monotonic() - 1, reserve=4), 0.1)
+
+
+class RunAgentDeadlineTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        client = AsyncOpenAI(
+            api_key="test",
+            base_url="http://llm.test/v1",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(stalled_completion)),
+        )
+        self.agent = Agent(name="Triage Agent", model=OpenAIChatCompletionsModel("mock", client))
+        self.context = GlobalContext(
+            current_date="2025-05-09", current_time="08:00:00", deadline=time.monotonic() + 0.3
+        )
+
+    async def test_run_is_cut_off_at_deadline(self):
+        started = time.perf_counter()
+        result = await run_agent(self.agent, "Next train to Bern", context=self.context)
+
+        self.assertLess(time.perf_counter() - started, 2)
+        self.assertIsInstance(result, PartialRun)
+        self.assertEqual(result.final_output, TIMEOUT_ANSWER)
+        self.assertEqual(result.to_input_list()[-1], {"role": "assistant", "content": TIMEOUT_ANSWER})
+
+    async def test_streamed_run_keeps_partial_answer(self):
+        result = await run_agent(self.agent, "Next train to Bern", context=self.context, stream=FakeTokenStream())
+
+        self.assertIsInstance(result, PartialRun)
+        self.assertEqual(result.final_output, f"{STREAMED}\n\n({TIMEOUT_ANSWER})")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from datetime import datetime
+
+from aia25.core.fast_path import ConnectionFastPath, ConnectionQuery
+
+NOW = datetime(2025, 5, 9, 14, 30)
+
+
+class ConnectionQueryParseTest(unittest.TestCase):
+    def setUp(self):
+        self.fast_path = ConnectionFastPath(stations={"bern": "Bern", "zurich": "Zürich HB"})
+
+    def test_simple_queries(self):
+        cases = {
+            "Next train from Bern to Zürich": ConnectionQuery("Bern", "Zürich HB", "2025-05-09", "14:30", False),
+            "Wann fährt der nächste Zug von Bern nach Zürich Bahnhof?": ConnectionQuery(
+                "Bern", "Zürich HB", "2025-05-09", "14:30", False
+            ),
+            "bern to zurich tomorrow at 7:45": ConnectionQuery("Bern", "Zürich HB", "2025-05-10", "07:45", False),
+            "From Bern to Zürich arriving by 18:00 please": ConnectionQuery(
+                "Bern", "Zürich HB", "2025-05-09", "18:00", True
+            ),
+            "First train from Zürich to Bern tomorrow": ConnectionQuery(
+                "Zürich HB", "Bern", "2025-05-10", "00:00", False
+            ),
+        }
+        for text, query in cases.items():
+            with self.subTest(text):
+                self.assertEqual(self.fast_path.parse(text, NOW), query)
+
+    def test_other_messages_are_left_to_agent(self):
+        for text in [
+            "Last train from Bern to Zürich",
+            "Bern to Zürich tomorrow",
+            "Bern to Zürich today or tomorrow",
+            "From Bern to Zürich via Olten",
+            "From Bern to Basel",
+            "From Bern to Bern",
+            "Zug nach Zürich",
+            "From Bern to Zürich at 25:00",
+            "What should I pack for Zürich?",
+        ]:
+            with self.subTest(text):
+                self.assertIsNone(self.fast_path.parse(text, NOW))
+
+    def test_bare_hour_is_next_occurrence(self):
+        query = ConnectionQuery("Bern", "Zürich HB", "2025-05-09", "20:00", is_arrival_time=False)
+        self.assertEqual(self.fast_path.parse("Bern to Zürich at 8", NOW), query)
+        self.assertEqual(self.fast_path.parse("Bern to Zürich at 8", NOW.replace(hour=7)).time, "08:00")
+
+    def test_bare_hour_without_occurrence_is_left_to_agent(self):
+        self.assertIsNone(self.fast_path.parse("Bern to Zürich at 8", NOW.replace(hour=21)))
+        self.assertIsNone(self.fast_path.parse("Bern to Zürich tomorrow at 8", NOW))
+
+    def test_unambiguous_hour_is_kept(self):
+        self.assertEqual(self.fast_path.parse("Bern to Zürich at 8 am", NOW).time, "08:00")
+        self.assertEqual(self.fast_path.parse("Bern nach Zürich um 8 Uhr", NOW).time, "08:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
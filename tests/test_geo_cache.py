@@ -0,0 +1,71 @@
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest import mock
+
+from aia25.core import geo_cache
+from aia25.core.calendar_client import CalendarEvent
+from aia25.core.geo_cache import GeoCache, GeocodedLocation, address_candidates, cached_tool_result
+
+OFFICE = "Der Hauptsitz\nSpeichergasse 4, 3011 Bern"
+LOCATION = GeocodedLocation(46.95, 7.44, "Speichergasse 4, Bern")
+
+
+class GeoCacheTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = GeoCache(Path(directory.name) / "geo.sqlite")
+        patcher = mock.patch.object(geo_cache, "_geo_cache", self.cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_venue_name_is_dropped_for_the_address_lookup(self):
+        self.assertEqual(
+            address_candidates(OFFICE), ["Der Hauptsitz, Speichergasse 4, 3011 Bern", "Speichergasse 4, 3011 Bern"]
+        )
+
+    def test_geocoding_tool_is_answered_under_the_bare_address(self):
+        self.cache.set_location(OFFICE, LOCATION)
+
+        result = cached_tool_result("geocode_address", {"address": "speichergasse 4,  3011 Bern"})
+
+        self.assertEqual(json.loads(result.content[0].text)[0]["display_name"], LOCATION.display_name)
+        self.assertIsNone(cached_tool_result("get_route_directions", {"address": OFFICE}))
+
+    def test_failed_lookups_are_cached_as_unknown(self):
+        self.cache.set_location("Nowhere", None)
+
+        self.assertEqual(self.cache.get_location("Nowhere"), (True, None))
+        self.assertEqual(self.cache.get_location("Elsewhere"), (False, None))
+
+    def test_failing_location_does_not_stop_precomputation(self):
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        events = [
+            CalendarEvent(now, now + timedelta(minutes=1), "Broken", "Broken address"),
+            CalendarEvent(now + timedelta(minutes=2), now + timedelta(minutes=3), "Office", OFFICE),
+            CalendarEvent(now + timedelta(minutes=4), now + timedelta(minutes=5), "Lunch", "Bahnhofplatz 1, Bern"),
+        ]
+
+        def geocode(location):
+            if location == "Broken address":
+                raise ValueError("Unexpected response")
+            return LOCATION
+
+        with (
+            mock.patch.object(geo_cache, "geocode", geocode),
+            mock.patch.object(geo_cache, "walking_minutes", return_value=4.0),
+            mock.patch.object(geo_cache, "transit_minutes", side_effect=ValueError("No connection")),
+        ):
+            computed = geo_cache._precompute(lambda start, end: events if start <= now < end else [], days=1)
+
+        self.assertEqual(computed, 3)  # Two geocodes and one walking time
+        self.assertEqual(self.cache.get_location("Broken address"), (False, None))
+        self.assertEqual(self.cache.get_travel_minutes(OFFICE, "Bahnhofplatz 1, Bern", "walking"), (True, 4.0))
+        self.assertEqual(self.cache.get_travel_minutes(OFFICE, "Bahnhofplatz 1, Bern", "transit"), (False, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
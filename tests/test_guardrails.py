@@ -0,0 +1,122 @@
+import asyncio
+import json
+import time
+import unittest
+from unittest import mock
+
+import httpx
+from agents import (
+    Agent,
+    GuardrailFunctionOutput,
+    InputGuardrail,
+    InputGuardrailTripwireTriggered,
+    OpenAIChatCompletionsModel,
+)
+from openai import AsyncOpenAI
+
+from aia25.core import guardrails
+from aia25.core.guardrails import GuardrailVerdictCache, guardrail_window, run_guarded, windowed_guardrail
+
+MODEL_SECONDS = 0.5
+
+
+async def slow_completion(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(MODEL_SECONDS)
+    body = json.loads(request.content)
+    completion = {
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": body["model"],
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": "Hello"}, "finish_reason": "stop"}],
+    }
+    return httpx.Response(200, json=completion)
+
+
+def guarded_agent(tripwire: bool, seconds: float) -> Agent:
+    async def check(ctx, agent, input) -> GuardrailFunctionOutput:
+        await asyncio.sleep(seconds)
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=tripwire)
+
+    client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://llm.test/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(slow_completion)),
+    )
+    return Agent(
+        name="Triage Agent",
+        model=OpenAIChatCompletionsModel("mock", client),
+        input_guardrails=[InputGuardrail(guardrail_function=check)],
+    )
+
+
+class RunGuardedTest(unittest.IsolatedAsyncioTestCase):
+    async def test_guardrail_runs_concurrently_with_the_agent(self):
+        started = time.perf_counter()
+        result = await run_guarded(guarded_agent(tripwire=False, seconds=MODEL_SECONDS), "Next train to Bern")
+
+        self.assertEqual(result.final_output, "Hello")
+        self.assertLess(time.perf_counter() - started, MODEL_SECONDS * 1.8)
+
+    async def test_tripwire_cancels_the_run(self):
+        started = time.perf_counter()
+        with self.assertRaises(InputGuardrailTripwireTriggered):
+            await run_guarded(guarded_agent(tripwire=True, seconds=0.05), "Write me a poem")
+
+        self.assertLess(time.perf_counter() - started, MODEL_SECONDS)
+
+
+class GuardrailWindowTest(unittest.TestCase):
+    def test_window_keeps_recent_user_messages_only(self):
+        history = [
+            {"role": "user", "content": "first"},
+            {"role": "assistant", "content": "answer"},
+            {"role": "user", "content": [{"type": "input_text", "text": "second"}]},
+            {"type": "function_call_output", "call_id": "1", "output": "data"},
+            {"role": "user", "content": "third"},
+            {"role": "user", "content": "x" * 1000},
+        ]
+
+        window = guardrail_window(history, context_turns=2)
+
+        self.assertEqual([m["content"][:6] for m in window], ["second", "third", "xxxxxx"])
+        self.assertEqual(len(window[-1]["content"]), guardrails.GUARDRAIL_MAX_MESSAGE_CHARS)
+
+    def test_string_input_is_a_single_message(self):
+        self.assertEqual(guardrail_window("Next train to Bern"), [{"role": "user", "content": "Next train to Bern"}])
+
+
+class WindowedGuardrailTest(unittest.IsolatedAsyncioTestCase):
+    async def test_verdicts_are_memoized_by_normalized_window(self):
+        windows = []
+
+        @windowed_guardrail
+        async def relevance(ctx, agent, window) -> GuardrailFunctionOutput:
+            windows.append(window)
+            return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
+
+        cache = GuardrailVerdictCache()
+        with mock.patch.object(guardrails, "guardrail_verdicts", cache):
+            first = await relevance(None, None, [{"role": "user", "content": "Next train to Bern"}])
+            repeated = await relevance(None, None, [{"role": "user", "content": "  next train to bern"}])
+            other = await relevance(None, None, [{"role": "user", "content": "Next train to Basel"}])
+
+        self.assertIs(repeated, first)
+        self.assertIsNot(other, first)
+        self.assertEqual(len(windows), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    async def test_cache_evicts_least_recently_used(self):
+        cache = GuardrailVerdictCache(size=2)
+        verdict = GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
+        for key in ("a", "b"):
+            cache.put(key, verdict)
+        cache.get("a")
+        cache.put("c", verdict)
+
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+
+from aia25.core.history import TOOL_OUTPUT_MAX_CHARS, apply_summary, compact_history
+
+
+def turn(question: str, output: str = "ok") -> list[dict]:
+    return [
+        {"role": "user", "content": question},
+        {"type": "function_call", "call_id": question, "name": "get_connections", "arguments": "{}"},
+        {"type": "function_call_output", "call_id": question, "output": output},
+        {"role": "assistant", "content": f"Answer to {question}"},
+    ]
+
+
+SUMMARY = {"role": "system", "content": "Summary of the earlier conversation:\nThe user travels to Bern."}
+
+
+class CompactHistoryTest(unittest.TestCase):
+    def test_older_tool_outputs_are_elided(self):
+        long_output = "x" * (TOOL_OUTPUT_MAX_CHARS + 1)
+        history = [SUMMARY] + turn("first", long_output) + turn("second", "short") + turn("third", long_output)
+
+        compacted = compact_history(history, keep_turns=1)
+
+        self.assertEqual(compacted[0], SUMMARY)
+        reference = f"[Output of get_connections from an earlier turn omitted, {len(long_output)} characters]"
+        self.assertEqual(compacted[3]["output"], reference)
+        self.assertEqual(compacted[1:3] + compacted[4:5], turn("first")[0:2] + turn("first")[3:4])
+        self.assertEqual(compacted[5:9], turn("second", "short"))
+        # The most recent turns are kept verbatim, whatever their size
+        self.assertEqual(compacted[9:], turn("third", long_output))
+
+    def test_short_history_is_unchanged(self):
+        history = turn("first", "x" * (TOOL_OUTPUT_MAX_CHARS + 1))
+
+        self.assertEqual(compact_history(history, keep_turns=1), history)
+
+
+class ApplySummaryTest(unittest.TestCase):
+    def test_summary_replaces_summarized_turns(self):
+        summarized = turn("first") + turn("second")
+        history = summarized + turn("third")
+
+        self.assertEqual(apply_summary(history, summarized, SUMMARY), [SUMMARY] + turn("third"))
+
+    def test_summary_applies_to_history_compacted_meanwhile(self):
+        long_output = "x" * (TOOL_OUTPUT_MAX_CHARS + 1)
+        summarized = turn("first", long_output) + turn("second")
+        history = compact_history(summarized + turn("third") + turn("fourth"), keep_turns=2) + turn("fifth")
+
+        self.assertEqual(
+            apply_summary(history, summarized, SUMMARY), [SUMMARY] + turn("third") + turn("fourth") + turn("fifth")
+        )
+
+    def test_summary_is_not_applied_to_other_history(self):
+        summarized = turn("first") + turn("second")
+
+        self.assertIsNone(apply_summary([SUMMARY] + turn("third"), summarized, SUMMARY))
+        self.assertIsNone(apply_summary(turn("first"), summarized, SUMMARY))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+import asyncio
+import time
+import unittest
+
+from aia25.core.model_routing import LatencyBudgetModel
+
+BUDGET = 0.1
+
+
+class FakeModel:
+    def __init__(self, name: str, delay: float = 0.0):
+        self.name = name
+        self.delay = delay
+        self.calls = 0
+
+    async def get_response(self, *args, **kwargs) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.name
+
+    async def stream_response(self, *args, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        for part in ("first", "second"):
+            yield f"{self.name} {part}"
+
+
+class LatencyBudgetModelTest(unittest.IsolatedAsyncioTestCase):
+    async def test_primary_within_budget(self):
+        model = LatencyBudgetModel(FakeModel("primary"), FakeModel("fallback"), BUDGET)
+
+        self.assertEqual(await model.get_response(), "primary")
+        self.assertEqual(model.fallback.calls, 0)
+
+    async def test_slow_primary_falls_back_and_cools_down(self):
+        model = LatencyBudgetModel(FakeModel("primary", delay=1.0), FakeModel("fallback"), BUDGET)
+
+        started = time.perf_counter()
+        self.assertEqual(await model.get_response(), "fallback")
+        self.assertLess(time.perf_counter() - started, 0.5)
+
+        # During the cooldown the primary model is not asked at all
+        self.assertEqual(await model.get_response(), "fallback")
+        self.assertEqual((model.primary.calls, model.fallback.calls), (1, 2))
+
+    async def test_first_answer_wins_after_budget(self):
+        model = LatencyBudgetModel(FakeModel("primary", delay=0.15), FakeModel("fallback", delay=1.0), BUDGET)
+
+        self.assertEqual(await model.get_response(), "primary")
+
+    async def test_stream_switches_to_fallback_before_first_event(self):
+        model = LatencyBudgetModel(FakeModel("primary", delay=1.0), FakeModel("fallback"), BUDGET)
+
+        self.assertEqual([event async for event in model.stream_response()], ["fallback first", "fallback second"])
+        self.assertEqual([event async for event in model.stream_response()], ["fallback first", "fallback second"])
+        self.assertEqual(model.primary.calls, 1)
+
+    async def test_stream_within_budget_is_not_switched(self):
+        model = LatencyBudgetModel(FakeModel("primary"), FakeModel("fallback"), BUDGET)
+
+        self.assertEqual([event async for event in model.stream_response()], ["primary first", "primary second"])
+        self.assertEqual(model.fallback.calls, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import httpx
+from agents import OpenAIChatCompletionsModel
+from openai import AsyncOpenAI
+
+from aia25.core import pipeline
+from aia25.core.context import GlobalContext
+from aia25.core.deadline import TIMEOUT_ANSWER
+
+
+async def slow_completion(request: httpx.Request) -> httpx.Response:
+    await asyncio.sleep(10)
+    return httpx.Response(500)
+
+
+def mock_model(content: str) -> OpenAIChatCompletionsModel:
+    def complete(request: httpx.Request) -> httpx.Response:
+        message = {"role": "assistant", "content": content}
+        completion = {
+            "id": "chatcmpl-1",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "mock",
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+        }
+        return httpx.Response(200, json=completion)
+
+    client = AsyncOpenAI(
+        api_key="test",
+        base_url="http://llm.test/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(complete)),
+    )
+    return OpenAIChatCompletionsModel("mock", client)
+
+
+class PipelineTest(unittest.IsolatedAsyncioTestCase):
+    context = GlobalContext(current_date="2025-05-09", current_time="08:00:00")
+    history = [{"role": "user", "content": "Next train from Bern to Zürich"}]
+
+    async def test_non_trip_request_falls_back_to_agent_mode(self):
+        extractor = pipeline.extraction_agent.clone(model=mock_model(json.dumps({"is_trip_request": False})))
+
+        with mock.patch.object(pipeline, "extraction_agent", extractor):
+            self.assertIsNone(await pipeline.run_pipeline(self.history, self.context, Path("ExampleCalendar.ics")))
+
+    async def test_trip_request_is_answered_from_gathered_data(self):
+        trip = {"is_trip_request": True, "start": "Bern", "end": "Zürich HB"}
+        extractor = pipeline.extraction_agent.clone(model=mock_model(json.dumps(trip)))
+        synthesizer = pipeline.synthesis_agent.clone(model=mock_model("Take the 08:02 IC 1."))
+        gather = mock.AsyncMock(return_value={"connections": []})
+
+        with (
+            mock.patch.object(pipeline, "extraction_agent", extractor),
+            mock.patch.object(pipeline, "synthesis_agent", synthesizer),
+            mock.patch.object(pipeline, "gather_trip_data", gather),
+        ):
+            answer, updated_history = await pipeline.run_pipeline(
+                self.history, self.context, Path("ExampleCalendar.ics")
+            )
+
+        gathered_trip = gather.await_args.args[0]
+        self.assertEqual((gathered_trip.date, gathered_trip.time), ("2025-05-09", "08:00"))
+        self.assertEqual(answer, "Take the 08:02 IC 1.")
+        # The gathered data is not carried along in the history
+        self.assertEqual(updated_history, self.history + [{"role": "assistant", "content": answer}])
+
+
+class PipelineDeadlineTest(unittest.IsolatedAsyncioTestCase):
+    async def test_extraction_timeout_returns_partial_answer(self):
+        client = AsyncOpenAI(
+            api_key="test",
+            base_url="http://llm.test/v1",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(slow_completion)),
+        )
+        extractor = pipeline.extraction_agent.clone(model=OpenAIChatCompletionsModel("mock", client))
+        context = GlobalContext(current_date="2025-05-09", current_time="08:00:00", deadline=time.monotonic() + 0.2)
+        history = [{"role": "user", "content": "Next train from Bern to Zürich"}]
+
+        with mock.patch.object(pipeline, "extraction_agent", extractor):
+            answer, updated_history = await pipeline.run_pipeline(history, context, Path("ExampleCalendar.ics"))
+
+        self.assertEqual(answer, TIMEOUT_ANSWER)
+        self.assertEqual(updated_history, history + [{"role": "assistant", "content": TIMEOUT_ANSWER}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from datetime import datetime, timedelta
+
+from aia25.core.calendar_client import CalendarEvent
+from aia25.core.tenant_cache import CalendarIndex, TenantCalendarCache
+
+DAY = datetime(2025, 9, 10)
+
+
+def events(count: int) -> list[CalendarEvent]:
+    return [
+        CalendarEvent(DAY + timedelta(hours=i), DAY + timedelta(hours=i, minutes=30), f"Event {i}", "Bern")
+        for i in range(count)
+    ]
+
+
+class CalendarIndexTest(unittest.TestCase):
+    def test_range_query_includes_events_overlapping_the_start(self):
+        long_event = CalendarEvent(DAY - timedelta(hours=2), DAY + timedelta(hours=1), "Long", "")
+        index = CalendarIndex([long_event, *events(3)])
+
+        names = [e.name for e in index.list_events(DAY + timedelta(minutes=45), DAY + timedelta(hours=2))]
+
+        self.assertEqual(names, ["Long", "Event 1"])
+
+
+class TenantCalendarCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.entry_size = CalendarIndex(events(10)).size
+        self.cache = TenantCalendarCache(budget=self.entry_size * 2)
+        self.loads: list[str] = []
+
+    def get(self, tenant: str, version: str = "1"):
+        def loader():
+            self.loads.append(tenant)
+            return events(10)
+
+        return self.cache.get(tenant, "calendar.ics", version, loader)
+
+    def test_least_recently_used_tenant_is_evicted_over_budget(self):
+        self.get("alice")
+        self.get("bob")
+        self.get("alice")  # Alice is now more recently used than Bob
+        self.get("carol")
+
+        stats = self.cache.stats()
+        self.assertLessEqual(stats["total_bytes"], self.cache.budget)
+        self.assertEqual(stats["tenants"]["bob"]["evictions"], 1)
+        self.assertEqual(stats["tenants"]["alice"]["entries"], 1)
+
+        self.get("alice")
+        self.get("bob")
+        self.assertEqual(self.loads, ["alice", "bob", "carol", "bob"])
+
+    def test_new_version_is_rebuilt(self):
+        self.get("alice")
+        self.get("alice", version="2")
+
+        self.assertEqual(self.loads, ["alice", "alice"])
+        self.assertEqual(self.cache.stats()["tenants"]["alice"]["entries"], 1)
+
+    def test_index_larger_than_budget_is_kept_for_its_request(self):
+        cache = TenantCalendarCache(budget=1)
+
+        index = cache.get("alice", "calendar.ics", "1", lambda: events(10))
+
+        self.assertEqual(len(index.events), 10)
+        self.assertEqual(cache.stats()["tenants"]["alice"]["entries"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import unittest
+
+from aia25.core.guardrails import classify_topic_locally
+from aia25.core.topic_classifier import is_simple_message
+
+
+class LocalTopicVerdictTest(unittest.TestCase):
+    def test_short_question_is_decided_locally(self):
+        self.assertTrue(classify_topic_locally("Next train from Bern to Zurich?").is_relevant)
+
+    def test_off_topic_request_about_a_route_is_not_approved(self):
+        messages = ("Write a poem about the train from Bern to Zürich", "Plan my bank robbery route from Bern to Zürich")
+        for message in messages:
+            with self.subTest(message=message):
+                self.assertIsNot(classify_topic_locally(message).is_relevant, True)
+
+    def test_appended_request_is_escalated(self):
+        message = "Next train from Bern to Zurich? Also write me a 2000 word essay about the French revolution."
+        self.assertFalse(is_simple_message(message))
+        self.assertIsNone(classify_topic_locally(message).is_relevant)
+
+    def test_long_message_is_escalated(self):
+        message = "Next train from Bern to Zurich " + "and after that " * 10
+        self.assertFalse(is_simple_message(message))
+        self.assertIsNone(classify_topic_locally(message).is_relevant)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import json
+import unittest
+from unittest import mock
+
+import httpx
+from agents import Agent, OpenAIChatCompletionsModel
+from openai import AsyncOpenAI
+
+from aia25.core.streaming import run_agent
+from aia25.core.usage import UsageAccounting, UsageHooks
+
+
+def chat_completion_stream(request: httpx.Request) -> httpx.Response:
+    """
+    Answers a streamed chat completion request like a provider other than OpenAI: the usage is only sent if the
+    request asks for it.
+    """
+    body = json.loads(request.content)
+    chunk = {"id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": body["model"]}
+    events = [
+        {**chunk, "choices": [{"index": 0, "delta": {"role": "assistant", "content": "Hello"}}]},
+        {**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]},
+    ]
+    if (body.get("stream_options") or {}).get("include_usage"):
+        usage = {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15}
+        events.append({**chunk, "choices": [], "usage": usage})
+    content = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+    return httpx.Response(200, headers={"Content-Type": "text/event-stream"}, content=content.encode())
+
+
+class RecordingStream:
+    def __init__(self):
+        self.tokens = []
+
+    async def send_token(self, token: str):
+        self.tokens.append(token)
+
+
+class StreamedRunUsageTest(unittest.IsolatedAsyncioTestCase):
+    async def test_streamed_run_records_tokens(self):
+        client = AsyncOpenAI(
+            api_key="test",
+            base_url="http://llm.test/v1",
+            http_client=httpx.AsyncClient(transport=httpx.MockTransport(chat_completion_stream)),
+        )
+        agent = Agent(name="Greeter", model=OpenAIChatCompletionsModel("mock", client))
+        accounting = UsageAccounting()
+        stream = RecordingStream()
+
+        with mock.patch("aia25.core.streaming.usage", accounting):
+            result = await run_agent(agent, "Hi", stream=stream, hooks=UsageHooks(accounting))
+
+        self.assertEqual(result.final_output, "Hello")
+        self.assertEqual(stream.tokens, ["Hello"])
+        stats = accounting.stats()["agents"]["Greeter"]
+        self.assertEqual(stats["input_tokens"], 12)
+        self.assertEqual(stats["output_tokens"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()